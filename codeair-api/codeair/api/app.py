@@ -7,7 +7,9 @@ from codeair.api.routes import (agent_router, auth_router, healthcheck_router, p
                                 webhook_router)
 from codeair.config import Config
 from codeair.di.containers import api_dependencies
-from codeair.di.providers import DatabaseClientManager, HTTPClientManager, jwt_auth
+from codeair.di.providers import (DatabaseClientManager, HTTPClientManager, job_log_broadcaster, jwt_auth,
+                                  provide_gitlab_client, provide_job_log_repository, provide_job_repository,
+                                  provide_user_repository, provide_user_service)
 from codeair.domain.errors import DomainError
 from litestar import Litestar
 from litestar.config.cors import CORSConfig
@@ -37,12 +39,29 @@ def create_app() -> Litestar:
     async def on_startup(app: Litestar) -> None:
         logger.info("CodeAir server is starting up...")
         logger.info(f"Connecting to database: {Config.Database.URL}")
-        await DatabaseClientManager.get_client()
-        HTTPClientManager.get_client()
+        db_client = await DatabaseClientManager.get_client()
+        http_client = HTTPClientManager.get_client(HTTPClientManager.GITLAB)
         logger.info("Database and HTTP clients initialized")
 
+        job_log_broadcaster.start(provide_job_log_repository(db_client))
+
+        # Workers keep partitions ahead too, this covers the API running while none do
+        try:
+            await provide_job_repository(db_client).create_partitions(Config.Worker.PARTITION_MONTHS_AHEAD)
+        except Exception as e:
+            logger.warning(f"Failed to create job partitions: {e}")
+
+        user_service = provide_user_service(provide_gitlab_client(http_client), provide_user_repository(db_client))
+        try:
+            bot_user = await user_service.get_bot_user_info(refresh=True)
+            logger.info(f"Bot user info cached: {bot_user.username}")
+        except Exception as e:
+            # Not fatal, the first request that needs it will fetch it
+            logger.warning(f"Failed to warm up bot user info: {e}")
+
     async def on_shutdown(app: Litestar) -> None:
         logger.info("CodeAir server is shutting down...")
+        await job_log_broadcaster.close()
         await DatabaseClientManager.shutdown()
         await HTTPClientManager.shutdown()
         logger.info("All clients shut down")
@@ -1,16 +1,23 @@
+import asyncio
+import base64
+import binascii
+import json
 from datetime import datetime
-from typing import Annotated, Any
+from typing import Annotated, Any, AsyncGenerator
 from uuid import UUID
 
 from codeair.config import Config
 from codeair.domain.agents.models import Agent, AgentConfig, AgentEngine, AgentProvider, AgentType
+from codeair.domain.errors import EntityNotFoundError, ValidationError
 from codeair.domain.job_logs import JobLogRepository
 from codeair.domain.projects import ProjectRepository
 from codeair.domain.users import User
 from codeair.services import AgentService, WebhookService
+from codeair.services.job_log_broadcaster import JobLogBroadcaster
 from codeair.services.project_service import ProjectService
 from litestar import Response, Router, get, patch, post
 from litestar.params import Body, Parameter
+from litestar.response import ServerSentEvent, ServerSentEventMessage
 from litestar.status_codes import HTTP_200_OK, HTTP_201_CREATED
 from pydantic import BaseModel
 
@@ -38,9 +45,24 @@ class JobLogResponse(BaseModel):
     elapsed_ms: int | None
 
 
+class JobLogSummaryResponse(BaseModel):
+    job_id: int
+    mr_url: str
+    created_at: datetime
+    started_at: datetime | None
+    ended_at: datetime | None
+    exit_code: int | None
+    elapsed_ms: int | None
+    stdout_preview: str | None
+    stderr_preview: str | None
+    stdout_bytes: int | None
+    stderr_bytes: int | None
+
+
 class AgentLogsResponse(BaseModel):
     total: int
-    logs: list[JobLogResponse]
+    logs: list[JobLogSummaryResponse]
+    next_cursor: str | None
 
 
 @post("/api/v1/projects/{project_id:str}/agents")
@@ -53,7 +75,8 @@ async def create_agent(
     webhook_service: WebhookService,
     current_user: User,
 ) -> Response[Any]:
-    # Fetch project from GitLab to ensure it exists
+    # Fetch project from GitLab to ensure it exists, bypassing any cached answer
+    project_service.invalidate_project(project_id)
     await project_service.get_project_by_id(project_id)
 
     webhook_id = await project_repository.save_to_db(project_id, current_user.id)
@@ -184,11 +207,24 @@ async def get_agent_placeholders(
     )
 
 
+def _encode_logs_cursor(created_at: datetime, job_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{job_id}".encode()).decode()
+
+
+def _decode_logs_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, job_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(job_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValidationError("Invalid cursor")
+
+
 @get("/api/v1/projects/{project_id:str}/agents/{agent_id:str}/logs")
 async def get_agent_logs(
     project_id: Annotated[int, Parameter(gt=0)],
     agent_id: Annotated[UUID, Parameter()],
     limit: Annotated[int, Parameter(gt=0, le=100, default=10)],
+    cursor: Annotated[str | None, Parameter(default=None)],
     project_service: ProjectService,
     agent_service: AgentService,
     job_log_repository: JobLogRepository,
@@ -199,19 +235,24 @@ async def get_agent_logs(
     # Verify agent exists and belongs to the project
     agent: Agent = await agent_service.get_agent(agent_id)
 
-    # Get logs for this agent
-    logs_data = await job_log_repository.find_by_agent_id(str(agent.id), limit=limit)
+    # Get logs for this agent, one extra to know whether there is a next page
+    before = _decode_logs_cursor(cursor) if cursor else None
+    logs_data = await job_log_repository.find_by_agent_id(str(agent.id), limit=limit + 1, before=before)
+    has_more = len(logs_data) > limit
+    logs_data = logs_data[:limit]
     logs = [
-        JobLogResponse(
+        JobLogSummaryResponse(
             job_id=log["job_id"],
             mr_url=log["mr_url"],
             created_at=log["created_at"],
             started_at=log.get("started_at"),
             ended_at=log.get("ended_at"),
             exit_code=log.get("exit_code"),
-            stdout=log.get("stdout"),
-            stderr=log.get("stderr"),
             elapsed_ms=log.get("elapsed_ms"),
+            stdout_preview=log.get("stdout_preview"),
+            stderr_preview=log.get("stderr_preview"),
+            stdout_bytes=log.get("stdout_bytes"),
+            stderr_bytes=log.get("stderr_bytes"),
         )
         for log in logs_data
     ]
@@ -220,7 +261,8 @@ async def get_agent_logs(
         status_code=HTTP_200_OK,
         content=AgentLogsResponse(
             total=len(logs),
-            logs=logs
+            logs=logs,
+            next_cursor=_encode_logs_cursor(logs[-1].created_at, logs[-1].job_id) if has_more else None,
         )
     )
 
@@ -233,6 +275,8 @@ async def get_job_log(
     project_service: ProjectService,
     agent_service: AgentService,
     job_log_repository: JobLogRepository,
+    offset: Annotated[int, Parameter(ge=0, default=0)],
+    limit: Annotated[int | None, Parameter(gt=0, default=None)],
 ) -> Response[JobLogResponse]:
     # Fetch project from GitLab to ensure it exists
     await project_service.get_project_by_id(project_id)
@@ -246,6 +290,12 @@ async def get_job_log(
     if not log_data:
         raise Exception("Job log not found")
 
+    # Optional character range of stdout/stderr, for paging through large outputs
+    end = offset + limit if limit is not None else None
+    for stream in ("stdout", "stderr"):
+        if log_data.get(stream) is not None:
+            log_data[stream] = log_data[stream][offset:end]
+
     log = JobLogResponse(
         job_id=log_data["job_id"],
         mr_url=log_data["mr_url"],
@@ -264,8 +314,81 @@ async def get_job_log(
     )
 
 
+async def _tail_job_log(
+    job_id: int,
+    agent_id: str,
+    last_seq: int,
+    job_log_repository: JobLogRepository,
+    job_log_broadcaster: JobLogBroadcaster,
+    keepalive_interval: float = 15.0,
+) -> AsyncGenerator[ServerSentEventMessage, None]:
+    # Subscribe before the first read, so nothing written in between is missed
+    events = job_log_broadcaster.subscribe(job_id)
+    try:
+        event = "sync"
+        while True:
+            if event in ("chunk", "sync"):
+                for chunk in await job_log_repository.find_chunks(job_id, after_seq=last_seq):
+                    last_seq = chunk.seq
+                    yield ServerSentEventMessage(
+                        event="chunk",
+                        id=chunk.seq,
+                        data=json.dumps({"stream": chunk.stream, "data": chunk.data}),
+                    )
+
+            if event in ("end", "sync"):
+                state = await job_log_repository.find_job_state(job_id, agent_id)
+                if state is None or state["ended_at"] is not None or state["exit_code"] is not None:
+                    yield ServerSentEventMessage(
+                        event="end",
+                        data=json.dumps({
+                            "exit_code": state and state["exit_code"],
+                            "elapsed_ms": state and state["elapsed_ms"],
+                        }),
+                    )
+                    return
+
+            try:
+                event = await asyncio.wait_for(events.get(), timeout=keepalive_interval)
+            except asyncio.TimeoutError:
+                event = None
+                yield ServerSentEventMessage(comment="keepalive")
+    finally:
+        job_log_broadcaster.unsubscribe(job_id, events)
+
+
+@get("/api/v1/projects/{project_id:str}/agents/{agent_id:str}/logs/{job_id:int}/stream")
+async def stream_job_log(
+    project_id: Annotated[int, Parameter(gt=0)],
+    agent_id: Annotated[UUID, Parameter()],
+    job_id: Annotated[int, Parameter(gt=0)],
+    project_service: ProjectService,
+    agent_service: AgentService,
+    job_log_repository: JobLogRepository,
+    job_log_broadcaster: JobLogBroadcaster,
+    last_event_id: Annotated[int | None, Parameter(header="Last-Event-ID", required=False)] = None,
+) -> ServerSentEvent:
+    """Follow a job's output as it is produced; ends with an "end" event once the job is done."""
+    # Fetch project from GitLab to ensure it exists
+    await project_service.get_project_by_id(project_id)
+
+    # Verify agent exists and belongs to the project
+    agent: Agent = await agent_service.get_agent(agent_id)
+
+    if not await job_log_repository.find_job_state(job_id, str(agent.id)):
+        raise EntityNotFoundError("Job not found")
+
+    return ServerSentEvent(_tail_job_log(
+        job_id,
+        str(agent.id),
+        last_seq=last_event_id or 0,
+        job_log_repository=job_log_repository,
+        job_log_broadcaster=job_log_broadcaster,
+    ))
+
+
 agent_router = Router(
     path="",
     route_handlers=[create_agent, list_agents, get_agent_placeholders, get_agent,
-                    update_agent, get_agent_logs, get_job_log],
+                    update_agent, get_agent_logs, get_job_log, stream_job_log],
 )
@@ -5,6 +5,7 @@ from typing import Optional
 
 from codeair.clients import DatabaseClient, GitLabClient
 from codeair.config import Config as cfg
+from codeair.di.providers import HTTPClientManager
 from litestar import Response, Router, get
 from litestar.status_codes import HTTP_200_OK, HTTP_503_SERVICE_UNAVAILABLE
 from pydantic import BaseModel, Field
@@ -50,6 +51,17 @@ class DetailedHealthResponse(HealthResponse):
     checks: dict[str, HealthCheckResult]
 
 
+class HTTPPoolStats(BaseModel):
+    max_connections: int
+    connections: int
+    active_connections: int
+    idle_connections: int
+    queued_requests: int
+
+
+class HTTPPoolsResponse(BaseModel):
+    pools: dict[str, HTTPPoolStats]
+
 
 @get("/api/v1/healthcheck")
 async def healthcheck() -> Response[HealthResponse]:
@@ -103,10 +115,25 @@ async def detailed_healthcheck(
     )
 
 
+@get("/api/v1/healthcheck/http-pools")
+async def http_pools() -> Response[HTTPPoolsResponse]:
+    """Pools opened by the API process only, the worker logs the state of its external pool."""
+    return Response(
+        content=HTTPPoolsResponse(
+            pools={
+                upstream: HTTPPoolStats(**stats)
+                for upstream, stats in HTTPClientManager.get_pool_stats().items()
+            },
+        ),
+        status_code=HTTP_200_OK,
+    )
+
+
 healthcheck_router = Router(
     path="",
     route_handlers=[
         healthcheck,
         detailed_healthcheck,
+        http_pools,
     ],
 )
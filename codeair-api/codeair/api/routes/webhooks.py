@@ -2,11 +2,13 @@ from enum import StrEnum
 from typing import Annotated
 from uuid import UUID
 
+from codeair.config import Config
 from codeair.domain.projects import ProjectRepository
+from codeair.domain.webhooks import WebhookDeliveryRepository, WebhookInboxRepository
 from codeair.services.job_queue_service import JobQueueService
 from litestar import Response, Router, post
 from litestar.params import Body, Parameter
-from litestar.status_codes import HTTP_200_OK, HTTP_404_NOT_FOUND
+from litestar.status_codes import HTTP_200_OK, HTTP_202_ACCEPTED, HTTP_404_NOT_FOUND
 from pydantic import BaseModel, Field, HttpUrl
 
 __all__ = ["webhook_router"]
@@ -18,14 +20,23 @@ class WebhookEventType(StrEnum):
 
 class MergeRequestAction(StrEnum):
     OPEN = "open"
+    REOPEN = "reopen"
     UPDATE = "update"
     CLOSE = "close"
     MERGE = "merge"
 
 
+class LastCommit(BaseModel):
+    id: str | None = Field(default=None, min_length=1)
+
+
 class ObjectAttributes(BaseModel):
     action: str | None = Field(default=None, min_length=1)
     url: HttpUrl | None = Field(default=None)
+    iid: int | None = Field(default=None)
+    last_commit: LastCommit | None = Field(default=None)
+    # Only set on "update" events that pushed new commits, the previous head SHA
+    oldrev: str | None = Field(default=None)
 
 
 class WebhookPayload(BaseModel):
@@ -37,12 +48,23 @@ class WebhookResponse(BaseModel):
     message: str
 
 
-def is_merge_request_open_event(data: WebhookPayload) -> bool:
-    return (
-        data.event_type == WebhookEventType.MERGE_REQUEST
-        and data.object_attributes is not None
-        and data.object_attributes.action == MergeRequestAction.OPEN
-    )
+def is_merge_request_revision_event(data: WebhookPayload) -> bool:
+    """An MR was opened or reopened, or got new commits (an "update" that only edits the MR has no oldrev)."""
+    if data.event_type != WebhookEventType.MERGE_REQUEST or data.object_attributes is None:
+        return False
+    action = data.object_attributes.action
+    if action in (MergeRequestAction.OPEN, MergeRequestAction.REOPEN):
+        return True
+    return action == MergeRequestAction.UPDATE and data.object_attributes.oldrev is not None
+
+
+def build_job_payload(data: WebhookPayload) -> dict:
+    last_commit = data.object_attributes.last_commit
+    return {
+        "mr_url": str(data.object_attributes.url),
+        "iid": data.object_attributes.iid,
+        "head_sha": last_commit.id if last_commit else None,
+    }
 
 
 @post("/api/v1/webhooks/{webhook_id:str}")
@@ -51,7 +73,17 @@ async def handle_webhook(
     data: Annotated[WebhookPayload, Body()],
     project_repository: ProjectRepository,
     job_queue_service: JobQueueService,
+    webhook_delivery_repository: WebhookDeliveryRepository,
+    webhook_inbox_repository: WebhookInboxRepository,
+    event_uuid: Annotated[UUID | None, Parameter(header="X-Gitlab-Event-UUID")] = None,
 ) -> Response[WebhookResponse]:
+    # GitLab retries slow deliveries with the same event UUID, only the first one is handled
+    if event_uuid and not await webhook_delivery_repository.record(event_uuid, webhook_id):
+        return Response(
+            status_code=HTTP_200_OK,
+            content=WebhookResponse(message=f"Delivery {event_uuid} already received")
+        )
+
     project_id = await project_repository.get_project_id_by_webhook_id(webhook_id)
 
     if not project_id:
@@ -60,10 +92,31 @@ async def handle_webhook(
             content=WebhookResponse(message=f"Webhook {webhook_id} not found")
         )
 
-    if is_merge_request_open_event(data):
-        jobs = await job_queue_service.enqueue_jobs_for_project(project_id, payload={
-            "mr_url": str(data.object_attributes.url),
-        })
+    # Accept the event with a single insert, the dispatcher worker turns it into jobs
+    if Config.Webhooks.ASYNC_INGESTION and is_merge_request_revision_event(data):
+        try:
+            await webhook_inbox_repository.append(webhook_id, event_uuid, build_job_payload(data))
+        except Exception:
+            if event_uuid:
+                await webhook_delivery_repository.forget(event_uuid)
+            raise
+
+        return Response(
+            status_code=HTTP_202_ACCEPTED,
+            content=WebhookResponse(message=f"Queued webhook {webhook_id} event")
+        )
+
+    if is_merge_request_revision_event(data):
+        try:
+            jobs = await job_queue_service.enqueue_jobs_for_project(project_id, payload={
+                **build_job_payload(data),
+                "project_id": project_id,
+            })
+        except Exception:
+            # Let GitLab's retry of this delivery through
+            if event_uuid:
+                await webhook_delivery_repository.forget(event_uuid)
+            raise
 
         return Response(
             status_code=HTTP_200_OK,
@@ -0,0 +1,5 @@
+from codeair.cache.mr_context_cache import MRContextCache
+from codeair.cache.single_flight import SingleFlight
+from codeair.cache.ttl_cache import MISSING, TTLCache
+
+__all__ = ["TTLCache", "MISSING", "SingleFlight", "MRContextCache"]
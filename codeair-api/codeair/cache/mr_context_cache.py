@@ -0,0 +1,120 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+__all__ = ["MRContextCache"]
+
+
+class MRContextCache:
+    """
+    On-disk cache of merge request contexts (MR metadata and diffs).
+
+    Entries are content-addressed by (project, MR IID, head SHA), so they never go stale:
+    a new push means a new key. Least recently used entries are evicted once the
+    total size goes over `max_bytes`. Size accounting is per process.
+
+    Filled and read for EXTERNAL engine jobs, so retries and every external agent on the
+    same MR revision share one diff fetch. pr_agent jobs don't go through it.
+    """
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self._directory = Path(directory)
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[str, int] = OrderedDict()  # key -> size, least recently used first
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(project: int | str, iid: int, head_sha: str) -> str:
+        return hashlib.sha256(f"{project}:{iid}:{head_sha}".encode()).hexdigest()
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, project: int | str, iid: int, head_sha: str) -> dict[str, Any] | None:
+        return await asyncio.to_thread(self._get, self.make_key(project, iid, head_sha))
+
+    async def set(self, project: int | str, iid: int, head_sha: str, context: dict[str, Any]) -> None:
+        data = json.dumps(context).encode()
+        await asyncio.to_thread(self._set, self.make_key(project, iid, head_sha), data)
+
+    def _path(self, key: str) -> Path:
+        return self._directory / f"{key}.json"
+
+    def _load(self) -> None:
+        # Pick up entries left by a previous run, oldest access first
+        if self._loaded:
+            return
+        self._directory.mkdir(parents=True, exist_ok=True)
+
+        files = []
+        for path in self._directory.iterdir():
+            if path.suffix == ".tmp":
+                path.unlink(missing_ok=True)
+            elif path.suffix == ".json":
+                stat = path.stat()
+                files.append((stat.st_mtime, path.stem, stat.st_size))
+
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._loaded = True
+        self._evict()
+
+    def _get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            self._load()
+            if key not in self._entries:
+                self.misses += 1
+                return None
+
+            path = self._path(key)
+            try:
+                with open(path, "rb") as f:
+                    context = json.load(f)
+                os.utime(path)  # so the order survives a restart
+            except (OSError, ValueError):
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return context
+
+    def _set(self, key: str, data: bytes) -> None:
+        if len(data) > self._max_bytes:
+            return  # would evict everything else and still not fit
+
+        with self._lock:
+            self._load()
+            path = self._path(key)
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+            self._total_bytes += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._total_bytes > self._max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        self._total_bytes -= self._entries.pop(key, 0)
+        self._path(key).unlink(missing_ok=True)
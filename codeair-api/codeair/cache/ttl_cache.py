@@ -0,0 +1,70 @@
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, TypeVar
+
+__all__ = ["TTLCache", "MISSING"]
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class _Missing:
+    def __repr__(self) -> str:
+        return "MISSING"
+
+
+# Returned by TTLCache.get on a miss, so that a cached None can be told apart from no entry
+MISSING: Any = _Missing()
+
+
+class TTLCache(Generic[K, V]):
+    """
+    In-process LRU cache with per-entry expiration.
+
+    Entries holding None are negative results and expire after `negative_ttl`
+    (defaults to `ttl`).
+    """
+
+    def __init__(self, maxsize: int, ttl: float, negative_ttl: float | None = None) -> None:
+        if maxsize < 1:
+            raise ValueError("Cache maxsize must be at least 1")
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self._entries: OrderedDict[K, tuple[V, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: K, default: Any = MISSING) -> V | Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        if ttl is None:
+            ttl = self._negative_ttl if value is None else self._ttl
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: K) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
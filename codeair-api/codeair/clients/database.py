@@ -1,20 +1,25 @@
 from contextlib import asynccontextmanager
-from typing import Optional
+from typing import Callable, Optional
 
-from asyncpg import Pool, Record, create_pool
+from asyncpg import Connection, Pool, Record, connect, create_pool
 
-__all__ = ["DatabaseClient", "Record"]
+__all__ = ["DatabaseClient", "Record", "Connection"]
 
 
 class DatabaseClient:
     def __init__(self, connection_url: str):
         self.connection_url = connection_url
         self._pool: Optional[Pool] = None
+        self._listeners: list[Connection] = []
 
     async def connect(self) -> None:
         self._pool = await create_pool(self.connection_url)
 
     async def disconnect(self) -> None:
+        for conn in self._listeners:
+            if not conn.is_closed():
+                await conn.close()
+        self._listeners.clear()
         if self._pool:
             await self._pool.close()
 
@@ -41,6 +46,26 @@ class DatabaseClient:
         async with self.acquire() as conn:
             return await conn.execute(query, *args)
 
+    async def listen(
+        self,
+        channel: str,
+        callback: Callable[[str], None],
+        on_terminate: Callable[[], None] | None = None,
+    ) -> Connection:
+        # LISTEN needs a connection of its own: pooled ones are handed back and reused
+        conn = await connect(self.connection_url)
+        await conn.add_listener(channel, lambda _conn, _pid, _channel, payload: callback(payload))
+        if on_terminate:
+            conn.add_termination_listener(lambda _conn: on_terminate())
+        self._listeners.append(conn)
+        return conn
+
+    async def unlisten(self, conn: Connection) -> None:
+        if conn in self._listeners:
+            self._listeners.remove(conn)
+        if not conn.is_closed():
+            await conn.close()
+
     async def healthcheck(self) -> bool:
         await self.execute("SELECT 1")
         return True
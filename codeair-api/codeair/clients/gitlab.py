@@ -1,11 +1,14 @@
+import asyncio
 from logging import Logger
 from typing import Any, TypedDict
+from urllib.parse import quote
 
 import httpx
 from codeair.clients.git_provider import GitProvider
+from codeair.clients.rate_limit import RateLimiter, RetryPolicy
 
-__all__ = ["GitLabClient", "UserData", "ProjectData", "WebhookData", "GitLabAPIError", "GitLabAuthError",
-           "GitlabNotFoundError"]
+__all__ = ["GitLabClient", "UserData", "ProjectData", "WebhookData", "MergeRequestData", "MergeRequestDiffData",
+           "GitLabAPIError", "GitLabAuthError", "GitlabNotFoundError"]
 
 
 class UserData(TypedDict):
@@ -39,6 +42,27 @@ class WebhookData(TypedDict):
     enable_ssl_verification: bool
 
 
+class MergeRequestData(TypedDict):
+    project_id: int
+    iid: int
+    title: str
+    description: str | None
+    source_branch: str
+    target_branch: str
+    head_sha: str
+    base_sha: str | None
+    web_url: str
+
+
+class MergeRequestDiffData(TypedDict):
+    old_path: str
+    new_path: str
+    diff: str
+    new_file: bool
+    renamed_file: bool
+    deleted_file: bool
+
+
 class GitLabAPIError(Exception):
     pass
 
@@ -52,10 +76,61 @@ class GitlabNotFoundError(GitLabAPIError):
 
 
 class GitLabClient(GitProvider):
-    def __init__(self, api_base_url: str, http_client: httpx.AsyncClient, logger: Logger) -> None:
+    def __init__(
+        self,
+        api_base_url: str,
+        http_client: httpx.AsyncClient,
+        logger: Logger,
+        retry_policy: RetryPolicy | None = None,
+        rate_limiter: RateLimiter | None = None,
+    ) -> None:
         self._api_base_url = api_base_url
         self._client = http_client
         self._logger = logger
+        self._retry_policy = retry_policy or RetryPolicy(max_retries=0)
+        self._rate_limiter = rate_limiter
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        access_token: str | None = None,
+        headers: dict[str, str] | None = None,
+        retry: bool = True,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        headers = dict(headers or {})
+        if access_token:
+            headers["Authorization"] = f"Bearer {access_token}"
+
+        attempt = 0
+        while True:
+            if self._rate_limiter and access_token:
+                await self._rate_limiter.acquire(access_token)
+
+            try:
+                response = await self._client.request(method, url, headers=headers, **kwargs)
+            except httpx.TransportError as e:
+                if not retry or not self._retry_policy.can_retry(method, attempt):
+                    raise
+                delay = self._retry_policy.backoff(attempt)
+                self._logger.warning(f"GitLab {method} {url} failed with {e!r}, retrying in {delay:.2f}s")
+            else:
+                if self._rate_limiter and access_token:
+                    self._rate_limiter.observe(access_token, response)
+
+                if not retry or not self._retry_policy.can_retry(method, attempt, response):
+                    return response
+                delay = self._retry_policy.delay_for(response, attempt)
+                if delay is None:
+                    self._logger.warning(f"GitLab {method} {url} returned {response.status_code}, "
+                                         f"retry window is too far away, giving up")
+                    return response
+                self._logger.warning(f"GitLab {method} {url} returned {response.status_code}, "
+                                     f"retrying in {delay:.2f}s")
+
+            attempt += 1
+            await asyncio.sleep(delay)
 
     async def exchange_oauth_code(
         self,
@@ -64,7 +139,8 @@ class GitLabClient(GitProvider):
         client_secret: str,
         redirect_uri: str,
     ) -> str:
-        response = await self._client.post(
+        response = await self._request(
+            "POST",
             f"{self._api_base_url}/oauth/token",
             data={
                 "client_id": client_id,
@@ -87,9 +163,10 @@ class GitLabClient(GitProvider):
         return token_data["access_token"]
 
     async def get_user_by_token(self, access_token: str) -> UserData:
-        response = await self._client.get(
+        response = await self._request(
+            "GET",
             f"{self._api_base_url}/api/v4/user",
-            headers={"Authorization": f"Bearer {access_token}"},
+            access_token=access_token,
         )
 
         if response.status_code == 401:
@@ -110,12 +187,29 @@ class GitLabClient(GitProvider):
         }
 
     async def get_project(self, project_id: int, access_token: str) -> ProjectData:
-        response = await self._client.get(
+        project_data, _ = await self.get_project_if_modified(project_id, access_token)
+        if project_data is None:
+            raise GitLabAPIError("Unexpected 304 response for unconditional project request")
+        return project_data
+
+    async def get_project_if_modified(
+        self,
+        project_id: int,
+        access_token: str,
+        etag: str | None = None,
+    ) -> tuple[ProjectData | None, str | None]:
+        """Fetch a project, returning (None, etag) when GitLab answers 304 for the given ETag."""
+        response = await self._request(
+            "GET",
             f"{self._api_base_url}/api/v4/projects/{project_id}",
-            headers={"Authorization": f"Bearer {access_token}"},
+            access_token=access_token,
+            headers={"If-None-Match": etag} if etag else None,
         )
 
-        if response.status_code == 404:
+        if response.status_code == 304:
+            self._logger.debug(f"Project not modified: id={project_id}")
+            return None, etag
+        elif response.status_code == 404:
             self._logger.warning(f"Project not found: project_id={project_id}")
             raise GitlabNotFoundError("Project not found")
         elif response.status_code == 401:
@@ -139,12 +233,13 @@ class GitLabClient(GitProvider):
             "created_at": project_data["created_at"],
             "last_activity_at": project_data["last_activity_at"],
             "avatar_url": project_data.get("avatar_url"),
-        }
+        }, response.headers.get("ETag")
 
     async def search_projects(self, query: str, access_token: str) -> list[ProjectData]:
-        response = await self._client.get(
+        response = await self._request(
+            "GET",
             f"{self._api_base_url}/api/v4/projects",
-            headers={"Authorization": f"Bearer {access_token}"},
+            access_token=access_token,
             params={
                 "search": query.strip(),
                 "membership": True,
@@ -181,7 +276,7 @@ class GitLabClient(GitProvider):
 
     async def healthcheck(self) -> bool:
         try:
-            response = await self._client.get(f"{self._api_base_url}")
+            response = await self._request("GET", f"{self._api_base_url}", retry=False)
             if response.status_code != 302:
                 self._logger.error(f"GitLab healthcheck failed: expected 302, got {response.status_code}")
                 raise GitLabAPIError(f"GitLab healthcheck failed: {response.status_code}")
@@ -193,9 +288,10 @@ class GitLabClient(GitProvider):
 
     async def get_project_webhooks(self, project_id: int, access_token: str) -> list[WebhookData]:
         """Get all webhooks for a GitLab project."""
-        response = await self._client.get(
+        response = await self._request(
+            "GET",
             f"{self._api_base_url}/api/v4/projects/{project_id}/hooks",
-            headers={"Authorization": f"Bearer {access_token}"},
+            access_token=access_token,
         )
 
         if response.status_code == 401:
@@ -233,9 +329,10 @@ class GitLabClient(GitProvider):
         enable_ssl_verification: bool = False,
     ) -> WebhookData:
         """Create a webhook for a GitLab project."""
-        response = await self._client.post(
+        response = await self._request(
+            "POST",
             f"{self._api_base_url}/api/v4/projects/{project_id}/hooks",
-            headers={"Authorization": f"Bearer {access_token}"},
+            access_token=access_token,
             json={
                 "url": webhook_url,
                 "name": name,
@@ -278,9 +375,10 @@ class GitLabClient(GitProvider):
         enable_ssl_verification: bool = False,
     ) -> WebhookData:
         """Update a webhook for a GitLab project."""
-        response = await self._client.put(
+        response = await self._request(
+            "PUT",
             f"{self._api_base_url}/api/v4/projects/{project_id}/hooks/{webhook_id}",
-            headers={"Authorization": f"Bearer {access_token}"},
+            access_token=access_token,
             json={
                 "url": webhook_url,
                 "name": name,
@@ -310,3 +408,80 @@ class GitLabClient(GitProvider):
             "merge_requests_events": webhook_data.get("merge_requests_events", False),
             "enable_ssl_verification": webhook_data.get("enable_ssl_verification", True),
         }
+
+    async def get_merge_request(self, project: int | str, iid: int, access_token: str) -> MergeRequestData:
+        """Get a merge request; `project` is a project ID or its full path."""
+        response = await self._request(
+            "GET",
+            f"{self._api_base_url}/api/v4/projects/{quote(str(project), safe='')}/merge_requests/{iid}",
+            access_token=access_token,
+        )
+
+        if response.status_code == 401:
+            self._logger.error(f"Failed to get MR {project}!{iid}: Invalid or expired GitLab token")
+            raise GitLabAuthError("Invalid or expired GitLab token")
+        elif response.status_code == 404:
+            self._logger.warning(f"Merge request not found: project={project}, iid={iid}")
+            raise GitlabNotFoundError("Merge request not found")
+        elif response.status_code != 200:
+            self._logger.error(f"Failed to fetch MR {project}!{iid} with status {response.status_code}: {response.text}")
+            raise GitLabAPIError(f"Failed to fetch merge request: {response.status_code}")
+
+        mr_data = response.json()
+        diff_refs = mr_data.get("diff_refs") or {}
+        return {
+            "project_id": mr_data["project_id"],
+            "iid": mr_data["iid"],
+            "title": mr_data["title"],
+            "description": mr_data.get("description"),
+            "source_branch": mr_data["source_branch"],
+            "target_branch": mr_data["target_branch"],
+            "head_sha": mr_data["sha"],
+            "base_sha": diff_refs.get("base_sha"),
+            "web_url": mr_data["web_url"],
+        }
+
+    async def get_merge_request_diffs(
+        self,
+        project: int | str,
+        iid: int,
+        access_token: str,
+    ) -> list[MergeRequestDiffData]:
+        """Get all file diffs of a merge request, following pagination."""
+        diffs: list[MergeRequestDiffData] = []
+        page: str | None = "1"
+
+        while page:
+            response = await self._request(
+                "GET",
+                f"{self._api_base_url}/api/v4/projects/{quote(str(project), safe='')}/merge_requests/{iid}/diffs",
+                access_token=access_token,
+                params={"page": page, "per_page": 100},
+            )
+
+            if response.status_code == 401:
+                self._logger.error(f"Failed to get diffs of MR {project}!{iid}: Invalid or expired GitLab token")
+                raise GitLabAuthError("Invalid or expired GitLab token")
+            elif response.status_code == 404:
+                self._logger.warning(f"Merge request not found: project={project}, iid={iid}")
+                raise GitlabNotFoundError("Merge request not found")
+            elif response.status_code != 200:
+                self._logger.error(f"Failed to fetch diffs of MR {project}!{iid} "
+                                   f"with status {response.status_code}: {response.text}")
+                raise GitLabAPIError(f"Failed to fetch merge request diffs: {response.status_code}")
+
+            diffs.extend(
+                {
+                    "old_path": diff["old_path"],
+                    "new_path": diff["new_path"],
+                    "diff": diff.get("diff", ""),
+                    "new_file": diff.get("new_file", False),
+                    "renamed_file": diff.get("renamed_file", False),
+                    "deleted_file": diff.get("deleted_file", False),
+                }
+                for diff in response.json()
+            )
+            page = response.headers.get("X-Next-Page")
+
+        self._logger.debug(f"Fetched {len(diffs)} diff(s) of MR {project}!{iid}")
+        return diffs
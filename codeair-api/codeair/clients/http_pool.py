@@ -0,0 +1,23 @@
+import httpx
+
+__all__ = ["read_pool_stats"]
+
+
+def read_pool_stats(client: httpx.AsyncClient) -> dict[str, int]:
+    """
+    Connection pool state of an httpx client.
+
+    httpx doesn't expose it publicly, so it is read from httpcore internals; callers should
+    expect this to raise after an upgrade.
+    """
+    pool = client._transport._pool  # type: ignore[attr-defined]
+    connections = list(pool.connections)
+    requests = list(pool._requests)
+    idle = sum(1 for connection in connections if connection.is_idle())
+    return {
+        "max_connections": int(pool._max_connections),
+        "connections": len(connections),
+        "active_connections": len(connections) - idle,
+        "idle_connections": idle,
+        "queued_requests": sum(1 for request in requests if request.is_queued()),
+    }
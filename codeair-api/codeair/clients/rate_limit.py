@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import random
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+__all__ = ["RetryPolicy", "TokenBucket", "RateLimiter"]
+
+
+class RetryPolicy:
+    RETRY_STATUSES = frozenset({429, 502, 503, 504})
+    IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+    def __init__(self, max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 10.0) -> None:
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def can_retry(self, method: str, attempt: int, response: httpx.Response | None = None) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        if response is None:
+            # Network error: we can't know whether the request reached GitLab
+            return method in self.IDEMPOTENT_METHODS
+        if response.status_code == 429:
+            # Rejected before processing, safe to repeat whatever the method
+            return True
+        return response.status_code in self.RETRY_STATUSES and method in self.IDEMPOTENT_METHODS
+
+    def backoff(self, attempt: int) -> float:
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def delay_for(self, response: httpx.Response, attempt: int) -> float | None:
+        """Seconds to wait before retrying, or None when the server asks for more than backoff_max."""
+        delay = _parse_retry_after(response.headers.get("Retry-After"))
+        if delay is None and response.headers.get("RateLimit-Remaining") == "0":
+            delay = _parse_rate_limit_reset(response.headers.get("RateLimit-Reset"))
+        if delay is None:
+            return self.backoff(attempt)
+        return delay if delay <= self.backoff_max else None
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int) -> None:
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+
+            self._tokens = min(self._burst, self._tokens + (now - self._updated_at) * self._rate)
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self._rate)
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class RateLimiter:
+    """Client-side token bucket per access token, so we throttle ourselves before GitLab does."""
+
+    def __init__(self, rate: float, burst: int, max_buckets: int = 1_000) -> None:
+        self._rate = rate
+        self._burst = burst
+        self._max_buckets = max_buckets
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    def _bucket(self, access_token: str) -> TokenBucket:
+        key = hashlib.sha256(access_token.encode()).hexdigest()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self._rate, self._burst)
+            while len(self._buckets) > self._max_buckets:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(key)
+        return bucket
+
+    async def acquire(self, access_token: str) -> None:
+        if self._rate <= 0:
+            return
+        await self._bucket(access_token).acquire()
+
+    def observe(self, access_token: str, response: httpx.Response) -> None:
+        if self._rate <= 0:
+            return
+        # GitLab says the quota is spent, hold every request with this token until it resets
+        if response.headers.get("RateLimit-Remaining") == "0":
+            reset_in = _parse_rate_limit_reset(response.headers.get("RateLimit-Reset"))
+            if reset_in:
+                self._bucket(access_token).pause(reset_in)
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _parse_rate_limit_reset(value: str | None) -> float | None:
+    # RateLimit-Reset is a Unix timestamp
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value) - time.time())
+    except ValueError:
+        return None
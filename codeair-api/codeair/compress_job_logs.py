@@ -0,0 +1,60 @@
+"""
+Compress job log bodies written before compression was introduced (migration 0009).
+
+Trains a zstd dictionary on recent output first (unless one exists, or --retrain is given),
+then converts rows in batches. Also fills in previews and sizes (migration 0010) of rows
+that were compressed before those existed. Safe to interrupt and run again; run VACUUM on job_logs
+afterwards to give the space back.
+
+    python -m codeair.compress_job_logs [--batch-size 500] [--retrain]
+"""
+import argparse
+import asyncio
+import logging
+
+from codeair.di.providers import DatabaseClientManager, provide_job_log_repository
+from codeair.domain.job_logs.compression import train_dictionary
+
+
+async def main(batch_size: int, sample_size: int, retrain: bool) -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    logger = logging.getLogger("app.compress_job_logs")
+
+    db_client = await DatabaseClientManager.get_client()
+    job_log_repository = provide_job_log_repository(db_client)
+
+    try:
+        if retrain or not await job_log_repository.find_latest_dictionary():
+            samples = await job_log_repository.find_sample_bodies(sample_size)
+            dictionary = train_dictionary(samples)
+            if dictionary:
+                dictionary_id = await job_log_repository.create_dictionary(dictionary)
+                logger.info(f"Trained dictionary {dictionary_id} on {len(samples)} sample(s)")
+            else:
+                logger.info(f"Not enough output to train a dictionary ({len(samples)} sample(s)), compressing without")
+
+        total = 0
+        while converted := await job_log_repository.compress_uncompressed(batch_size):
+            total += converted
+            logger.info(f"Compressed {total} job log(s) so far")
+        logger.info(f"Done, compressed {total} job log(s)")
+
+        total = 0
+        while summarized := await job_log_repository.backfill_summaries(batch_size):
+            total += summarized
+        logger.info(f"Filled in summaries of {total} compressed job log(s)")
+    finally:
+        await DatabaseClientManager.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compress job log bodies stored as text")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--sample-size", type=int, default=1000, help="job logs to train the dictionary on")
+    parser.add_argument("--retrain", action="store_true", help="train a new dictionary even if one exists")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.batch_size, args.sample_size, args.retrain))
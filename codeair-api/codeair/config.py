@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 import cabina
@@ -34,6 +35,11 @@ class Config(cabina.Config):
         OAUTH_AUTHORIZE_URL: str = env.str("GITLAB_OAUTH_AUTHORIZE_URL", default="")
         API_BASE_URL: str = env.str("GITLAB_API_BASE_URL")
         BOT_TOKEN: str = env.str("CODEAIR_BOT_TOKEN")
+        MAX_RETRIES: int = env.int("GITLAB_MAX_RETRIES", default=3)
+        RETRY_BACKOFF_BASE: float = env.float("GITLAB_RETRY_BACKOFF_BASE", default=0.5)
+        RETRY_BACKOFF_MAX: float = env.float("GITLAB_RETRY_BACKOFF_MAX", default=10.0)
+        RATE_LIMIT_PER_SECOND: float = env.float("GITLAB_RATE_LIMIT_PER_SECOND", default=10.0)
+        RATE_LIMIT_BURST: int = env.int("GITLAB_RATE_LIMIT_BURST", default=20)
 
     class JWT(cabina.Section):
         SECRET_KEY: str = env.str("JWT_SECRET_KEY")
@@ -54,5 +60,78 @@ class Config(cabina.Config):
     class Database(cabina.Section):
         URL: str = env.str("DATABASE_URL")
 
+    class HTTP(cabina.Section):
+        GITLAB_MAX_CONNECTIONS: int = env.int("HTTP_GITLAB_MAX_CONNECTIONS", default=100)
+        GITLAB_MAX_KEEPALIVE_CONNECTIONS: int = env.int("HTTP_GITLAB_MAX_KEEPALIVE_CONNECTIONS", default=20)
+        GITLAB_KEEPALIVE_EXPIRY: float = env.float("HTTP_GITLAB_KEEPALIVE_EXPIRY", default=30.0)
+        GITLAB_TIMEOUT: float = env.float("HTTP_GITLAB_TIMEOUT", default=10.0)
+        GITLAB_HTTP2: bool = env.bool("HTTP_GITLAB_HTTP2", default=False)
+        EXTERNAL_MAX_CONNECTIONS: int = env.int("HTTP_EXTERNAL_MAX_CONNECTIONS", default=50)
+        EXTERNAL_MAX_KEEPALIVE_CONNECTIONS: int = env.int("HTTP_EXTERNAL_MAX_KEEPALIVE_CONNECTIONS", default=10)
+        EXTERNAL_KEEPALIVE_EXPIRY: float = env.float("HTTP_EXTERNAL_KEEPALIVE_EXPIRY", default=30.0)
+        EXTERNAL_TIMEOUT: float = env.float("HTTP_EXTERNAL_TIMEOUT", default=30.0)
+        EXTERNAL_HTTP2: bool = env.bool("HTTP_EXTERNAL_HTTP2", default=False)
+        # How long a request may wait for a free connection before failing
+        POOL_TIMEOUT: float = env.float("HTTP_POOL_TIMEOUT", default=10.0)
+
+    class Cache(cabina.Section):
+        WEBHOOK_MAXSIZE: int = env.int("CACHE_WEBHOOK_MAXSIZE", default=10_000)
+        WEBHOOK_TTL: float = env.float("CACHE_WEBHOOK_TTL", default=600.0)
+        WEBHOOK_NEGATIVE_TTL: float = env.float("CACHE_WEBHOOK_NEGATIVE_TTL", default=30.0)
+        PROJECT_MAXSIZE: int = env.int("CACHE_PROJECT_MAXSIZE", default=1_000)
+        PROJECT_FRESH_TTL: float = env.float("CACHE_PROJECT_FRESH_TTL", default=60.0)
+        PROJECT_STALE_TTL: float = env.float("CACHE_PROJECT_STALE_TTL", default=3600.0)
+        PROJECT_NEGATIVE_TTL: float = env.float("CACHE_PROJECT_NEGATIVE_TTL", default=15.0)
+        SEARCH_MAXSIZE: int = env.int("CACHE_SEARCH_MAXSIZE", default=1_000)
+        SEARCH_TTL: float = env.float("CACHE_SEARCH_TTL", default=30.0)
+        BOT_USER_TTL: float = env.float("CACHE_BOT_USER_TTL", default=3600.0)
+        MR_CONTEXT_DIR: str = env.str("CACHE_MR_CONTEXT_DIR", default="/tmp/codeair/mr-context")
+        MR_CONTEXT_MAX_BYTES: int = env.int("CACHE_MR_CONTEXT_MAX_BYTES", default=512 * 1024 * 1024)
+        AGENT_MAXSIZE: int = env.int("CACHE_AGENT_MAXSIZE", default=1_000)
+        AGENT_TTL: float = env.float("CACHE_AGENT_TTL", default=300.0)
+        WEBHOOK_DELIVERY_MAXSIZE: int = env.int("CACHE_WEBHOOK_DELIVERY_MAXSIZE", default=10_000)
+        WEBHOOK_DELIVERY_TTL: float = env.float("CACHE_WEBHOOK_DELIVERY_TTL", default=600.0)
+
+    class Webhooks(cabina.Section):
+        # How long delivery ids are kept to recognize retried deliveries
+        DELIVERY_RETENTION: float = env.float("WEBHOOKS_DELIVERY_RETENTION", default=86400.0)
+        # Reply 202 once a merge request event is in webhook_inbox and leave the jobs to the dispatcher
+        ASYNC_INGESTION: bool = env.bool("WEBHOOKS_ASYNC_INGESTION", default=False)
+        DISPATCH_BATCH_SIZE: int = env.int("WEBHOOKS_DISPATCH_BATCH_SIZE", default=100)
+        DISPATCH_POLL_INTERVAL: float = env.float("WEBHOOKS_DISPATCH_POLL_INTERVAL", default=5.0)
+        # Failed entries are retried with a growing delay, then left in the inbox with their last error
+        # until the worker purges them once DELIVERY_RETENTION has passed
+        DISPATCH_MAX_ATTEMPTS: int = env.int("WEBHOOKS_DISPATCH_MAX_ATTEMPTS", default=5)
+        DISPATCH_RETRY_DELAY: float = env.float("WEBHOOKS_DISPATCH_RETRY_DELAY", default=30.0)
+        DISPATCH_CLAIM_SECONDS: float = env.float("WEBHOOKS_DISPATCH_CLAIM_SECONDS", default=300.0)
+
+    class Jobs(cabina.Section):
+        # A webhook for an MR revision an agent already ran within this many seconds creates no job for it
+        DEDUP_WINDOW: float = env.float("JOBS_DEDUP_WINDOW", default=3600.0)
+
+    class Worker(cabina.Section):
+        CONCURRENCY: int = env.int("WORKER_CONCURRENCY", default=1)
+        POLL_INTERVAL: float = env.float("WORKER_POLL_INTERVAL", default=1.0)
+        NOTIFY_POLL_INTERVAL: float = env.float("WORKER_NOTIFY_POLL_INTERVAL", default=30.0)
+        SHUTDOWN_TIMEOUT: float = env.float("WORKER_SHUTDOWN_TIMEOUT", default=600.0)
+        LEASE_SECONDS: float = env.float("WORKER_LEASE_SECONDS", default=60.0)
+        MAX_ATTEMPTS: int = env.int("WORKER_MAX_ATTEMPTS", default=3)
+        REAPER_INTERVAL: float = env.float("WORKER_REAPER_INTERVAL", default=30.0)
+        PR_AGENT_POOL_SIZE: int = env.int("WORKER_PR_AGENT_POOL_SIZE", default=0)
+        PR_AGENT_MAX_JOBS_PER_RUNNER: int = env.int("WORKER_PR_AGENT_MAX_JOBS_PER_RUNNER", default=20)
+        PR_AGENT_PYTHON: str = env.str("WORKER_PR_AGENT_PYTHON", default="/usr/local/bin/python3")
+        # Run pending jobs of one MR back to back in one pr_agent child. Every command still fetches
+        # the MR itself and the jobs no longer run in parallel slots, so this is opt-in
+        BATCH_MR_JOBS: bool = env.bool("WORKER_BATCH_MR_JOBS", default=False)
+        LOG_MAX_BYTES: int = env.int("WORKER_LOG_MAX_BYTES", default=1024 * 1024)
+        LOG_FLUSH_INTERVAL: float = env.float("WORKER_LOG_FLUSH_INTERVAL", default=1.0)
+        # WORKER_PARTITION_INTERVAL is the name this had before maintenance did more than partitions
+        MAINTENANCE_INTERVAL: float = env.float(
+            "WORKER_MAINTENANCE_INTERVAL",
+            default=float(os.environ.get("WORKER_PARTITION_INTERVAL", 3600.0)),
+        )
+        PARTITION_MONTHS_AHEAD: int = env.int("WORKER_PARTITION_MONTHS_AHEAD", default=3)
+        RETENTION_MONTHS: int = env.int("WORKER_RETENTION_MONTHS", default=0)
+
 
 Config.prefetch()
@@ -1,3 +1,3 @@
-from codeair.di.containers import api_dependencies, create_agent_worker
+from codeair.di.containers import api_dependencies, create_agent_worker, create_webhook_dispatcher
 
-__all__ = ["api_dependencies", "create_agent_worker"]
+__all__ = ["api_dependencies", "create_agent_worker", "create_webhook_dispatcher"]
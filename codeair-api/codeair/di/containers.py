@@ -1,10 +1,13 @@
 import logging
 
+from codeair.config import Config
 from codeair.di.providers import (provide_agent_repository, provide_agent_service, provide_auth_service,
                                   provide_current_user, provide_db_client, provide_gitlab_client, provide_http_client,
-                                  provide_job_log_repository, provide_job_queue_service, provide_job_repository,
-                                  provide_project_repository, provide_project_service, provide_token_encryption,
-                                  provide_user_repository, provide_user_service, provide_webhook_service)
+                                  provide_job_log_broadcaster, provide_job_log_repository, provide_job_queue_service,
+                                  provide_job_repository, provide_project_repository, provide_project_service,
+                                  provide_token_encryption, provide_user_repository, provide_user_service,
+                                  provide_webhook_delivery_repository, provide_webhook_inbox_repository,
+                                  provide_webhook_service)
 from litestar.di import Provide
 
 api_dependencies = {
@@ -20,10 +23,13 @@ api_dependencies = {
     "job_log_repository": Provide(provide_job_log_repository, sync_to_thread=False),
     "project_repository": Provide(provide_project_repository, sync_to_thread=False),
     "user_repository": Provide(provide_user_repository, sync_to_thread=False),
+    "webhook_delivery_repository": Provide(provide_webhook_delivery_repository, sync_to_thread=False),
+    "webhook_inbox_repository": Provide(provide_webhook_inbox_repository, sync_to_thread=False),
     # Services
     "agent_service": Provide(provide_agent_service, sync_to_thread=False),
     "auth_service": Provide(provide_auth_service, sync_to_thread=False),
     "job_queue_service": Provide(provide_job_queue_service, sync_to_thread=False),
+    "job_log_broadcaster": Provide(provide_job_log_broadcaster, sync_to_thread=False),
     "project_service": Provide(provide_project_service, sync_to_thread=False),
     "user_service": Provide(provide_user_service, sync_to_thread=False),
     "webhook_service": Provide(provide_webhook_service, sync_to_thread=False),
@@ -34,19 +40,36 @@ api_dependencies = {
 
 async def create_agent_worker():
     from codeair.di.providers import (DatabaseClientManager, HTTPClientManager, provide_agent_repository,
-                                      provide_agent_service, provide_job_log_repository, provide_job_queue_service,
-                                      provide_job_repository, provide_token_encryption)
+                                      provide_gitlab_client, provide_job_log_repository,
+                                      provide_job_queue_service, provide_job_repository,
+                                      provide_merge_request_service, provide_token_encryption,
+                                      provide_webhook_delivery_repository, provide_webhook_inbox_repository,
+                                      provide_worker_agent_service)
     from codeair.workers.agent_worker import AgentWorker
+    from codeair.workers.pr_agent_pool import PrAgentRunnerPool
 
     # Initialize dependencies
     db_client = await DatabaseClientManager.get_client()
-    http_client = HTTPClientManager.get_client()
+    http_client = HTTPClientManager.get_client(HTTPClientManager.EXTERNAL)
     job_repository = provide_job_repository(db_client)
     job_log_repository = provide_job_log_repository(db_client)
     agent_repository = provide_agent_repository(db_client)
     token_encryption = provide_token_encryption()
-    agent_service = provide_agent_service(agent_repository, token_encryption)
-    job_queue_service = provide_job_queue_service(job_repository, agent_repository)
+    agent_service = provide_worker_agent_service(agent_repository, token_encryption)
+    job_queue_service = provide_job_queue_service(job_repository, job_log_repository)
+    gitlab_client = provide_gitlab_client(HTTPClientManager.get_client(HTTPClientManager.GITLAB))
+    merge_request_service = provide_merge_request_service(gitlab_client)
+    webhook_delivery_repository = provide_webhook_delivery_repository(db_client)
+    webhook_inbox_repository = provide_webhook_inbox_repository(db_client)
+
+    pr_agent_pool = None
+    if Config.Worker.PR_AGENT_POOL_SIZE > 0:
+        pr_agent_pool = PrAgentRunnerPool(
+            python_path=Config.Worker.PR_AGENT_PYTHON,
+            size=Config.Worker.PR_AGENT_POOL_SIZE,
+            max_jobs_per_runner=Config.Worker.PR_AGENT_MAX_JOBS_PER_RUNNER,
+            logger=logging.getLogger("app.workers.pr_agent_pool"),
+        )
 
     worker = AgentWorker(
         job_queue_service,
@@ -54,6 +77,53 @@ async def create_agent_worker():
         http_client,
         job_log_repository,
         logger=logging.getLogger("app.workers.agent"),
+        concurrency=Config.Worker.CONCURRENCY,
+        poll_interval=Config.Worker.POLL_INTERVAL,
+        notify_poll_interval=Config.Worker.NOTIFY_POLL_INTERVAL,
+        shutdown_timeout=Config.Worker.SHUTDOWN_TIMEOUT,
+        lease_seconds=Config.Worker.LEASE_SECONDS,
+        max_attempts=Config.Worker.MAX_ATTEMPTS,
+        reaper_interval=Config.Worker.REAPER_INTERVAL,
+        pr_agent_pool=pr_agent_pool,
+        merge_request_service=merge_request_service,
+        log_max_bytes=Config.Worker.LOG_MAX_BYTES,
+        log_flush_interval=Config.Worker.LOG_FLUSH_INTERVAL,
+        maintenance_interval=Config.Worker.MAINTENANCE_INTERVAL,
+        partition_months_ahead=Config.Worker.PARTITION_MONTHS_AHEAD,
+        retention_months=Config.Worker.RETENTION_MONTHS,
+        webhook_delivery_repository=webhook_delivery_repository,
+        webhook_delivery_retention=Config.Webhooks.DELIVERY_RETENTION,
+        webhook_inbox_repository=webhook_inbox_repository,
+        webhook_inbox_max_attempts=Config.Webhooks.DISPATCH_MAX_ATTEMPTS,
+        # Batching only pays off when the jobs share a warm runner child
+        batch_mr_jobs=Config.Worker.BATCH_MR_JOBS and pr_agent_pool is not None,
     )
 
     return worker
+
+
+async def create_webhook_dispatcher():
+    from codeair.di.providers import (DatabaseClientManager, HTTPClientManager, provide_gitlab_client,
+                                      provide_job_log_repository, provide_job_queue_service,
+                                      provide_job_repository, provide_project_repository,
+                                      provide_webhook_inbox_repository)
+    from codeair.workers.webhook_dispatcher import WebhookDispatcher
+
+    db_client = await DatabaseClientManager.get_client()
+    gitlab_client = provide_gitlab_client(HTTPClientManager.get_client(HTTPClientManager.GITLAB))
+    job_queue_service = provide_job_queue_service(
+        provide_job_repository(db_client),
+        provide_job_log_repository(db_client),
+    )
+
+    return WebhookDispatcher(
+        provide_webhook_inbox_repository(db_client),
+        provide_project_repository(gitlab_client, db_client),
+        job_queue_service,
+        logger=logging.getLogger("app.workers.webhook_dispatcher"),
+        batch_size=Config.Webhooks.DISPATCH_BATCH_SIZE,
+        poll_interval=Config.Webhooks.DISPATCH_POLL_INTERVAL,
+        max_attempts=Config.Webhooks.DISPATCH_MAX_ATTEMPTS,
+        retry_delay=Config.Webhooks.DISPATCH_RETRY_DELAY,
+        claim_seconds=Config.Webhooks.DISPATCH_CLAIM_SECONDS,
+    )
@@ -1,18 +1,25 @@
 import logging
 from datetime import timedelta
 from typing import Any, AsyncGenerator, Optional
+from uuid import UUID
 
 import httpx
+from codeair.cache import MRContextCache, SingleFlight, TTLCache
 from codeair.clients import DatabaseClient, GitLabClient
+from codeair.clients.http_pool import read_pool_stats
+from codeair.clients.rate_limit import RateLimiter, RetryPolicy
 from codeair.config import Config
-from codeair.domain.agents import AgentRepository
-from codeair.domain.job_logs import JobLogRepository
+from codeair.domain.agents import Agent, AgentRepository
+from codeair.domain.job_logs import JobLogCodec, JobLogRepository
 from codeair.domain.jobs.repository import JobRepository
-from codeair.domain.projects import ProjectRepository
+from codeair.domain.projects import Project, ProjectRepository
 from codeair.domain.users import User, UserRepository
+from codeair.domain.webhooks import WebhookDeliveryRepository, WebhookInboxRepository
 from codeair.services import AgentService, AuthService, UserService, WebhookService
+from codeair.services.job_log_broadcaster import JobLogBroadcaster
 from codeair.services.job_queue_service import JobQueueService
-from codeair.services.project_service import ProjectService
+from codeair.services.merge_request_service import MergeRequestService
+from codeair.services.project_service import CachedProject, ProjectService
 from codeair.services.token_encryption import TokenEncryption
 from litestar import Request
 from litestar.connection import ASGIConnection
@@ -63,6 +70,60 @@ jwt_auth = JWTAuth[User](
 )
 
 
+gitlab_retry_policy = RetryPolicy(
+    max_retries=Config.GitLab.MAX_RETRIES,
+    backoff_base=Config.GitLab.RETRY_BACKOFF_BASE,
+    backoff_max=Config.GitLab.RETRY_BACKOFF_MAX,
+)
+
+# Shared by every GitLabClient of the process, one bucket per access token
+gitlab_rate_limiter = RateLimiter(
+    rate=Config.GitLab.RATE_LIMIT_PER_SECOND,
+    burst=Config.GitLab.RATE_LIMIT_BURST,
+)
+
+# Shared by all requests of the process: webhook_id -> project_id (None when unknown)
+webhook_project_cache: TTLCache[UUID, int | None] = TTLCache(
+    maxsize=Config.Cache.WEBHOOK_MAXSIZE,
+    ttl=Config.Cache.WEBHOOK_TTL,
+    negative_ttl=Config.Cache.WEBHOOK_NEGATIVE_TTL,
+)
+
+# GitLab project metadata (None when GitLab answered 404), served stale while revalidating
+project_cache: TTLCache[int, CachedProject | None] = TTLCache(
+    maxsize=Config.Cache.PROJECT_MAXSIZE,
+    ttl=Config.Cache.PROJECT_STALE_TTL,
+    negative_ttl=Config.Cache.PROJECT_NEGATIVE_TTL,
+)
+
+# Project search results by normalized query
+search_cache: TTLCache[str, list[Project]] = TTLCache(maxsize=Config.Cache.SEARCH_MAXSIZE, ttl=Config.Cache.SEARCH_TTL)
+search_flight: SingleFlight[str, list[Project]] = SingleFlight()
+
+# The GitLab user behind CODEAIR_BOT_TOKEN
+bot_user_cache: TTLCache[str, User] = TTLCache(maxsize=1, ttl=Config.Cache.BOT_USER_TTL)
+bot_user_flight: SingleFlight[str, User] = SingleFlight()
+
+# MR metadata and diffs by head SHA, shared by every job (and retry) on the same MR revision
+mr_context_cache = MRContextCache(directory=Config.Cache.MR_CONTEXT_DIR, max_bytes=Config.Cache.MR_CONTEXT_MAX_BYTES)
+mr_context_flight: SingleFlight[str, dict[str, Any]] = SingleFlight()
+
+# Recently received X-Gitlab-Event-UUIDs, in front of webhook_deliveries
+webhook_delivery_cache: TTLCache[UUID, bool] = TTLCache(
+    maxsize=Config.Cache.WEBHOOK_DELIVERY_MAXSIZE,
+    ttl=Config.Cache.WEBHOOK_DELIVERY_TTL,
+)
+
+# Agents with decrypted tokens for the worker, kept in memory only and dropped when saved
+worker_agent_cache: TTLCache[UUID, Agent] = TTLCache(maxsize=Config.Cache.AGENT_MAXSIZE, ttl=Config.Cache.AGENT_TTL)
+
+# zstd codec for job log bodies, dictionaries are loaded from the database on first use
+job_log_codec = JobLogCodec()
+
+# Started on app startup, feeds the live job log streams
+job_log_broadcaster = JobLogBroadcaster(logger=logging.getLogger("app.services.job_log_broadcaster"))
+
+
 class DatabaseClientManager:
     _instance: Optional[DatabaseClient] = None
 
@@ -81,19 +142,61 @@ class DatabaseClientManager:
 
 
 class HTTPClientManager:
-    _instance: Optional[httpx.AsyncClient] = None
+    GITLAB = "gitlab"
+    EXTERNAL = "external"
+
+    # Each upstream gets its own pool, so a slow external engine can't starve GitLab calls
+    _instances: dict[str, httpx.AsyncClient] = {}
 
     @classmethod
-    def get_client(cls) -> httpx.AsyncClient:
-        if cls._instance is None:
-            cls._instance = httpx.AsyncClient()
-        return cls._instance
+    def _create_client(cls, upstream: str) -> httpx.AsyncClient:
+        if upstream == cls.GITLAB:
+            max_connections = Config.HTTP.GITLAB_MAX_CONNECTIONS
+            max_keepalive_connections = Config.HTTP.GITLAB_MAX_KEEPALIVE_CONNECTIONS
+            keepalive_expiry = Config.HTTP.GITLAB_KEEPALIVE_EXPIRY
+            timeout = Config.HTTP.GITLAB_TIMEOUT
+            http2 = Config.HTTP.GITLAB_HTTP2
+        elif upstream == cls.EXTERNAL:
+            max_connections = Config.HTTP.EXTERNAL_MAX_CONNECTIONS
+            max_keepalive_connections = Config.HTTP.EXTERNAL_MAX_KEEPALIVE_CONNECTIONS
+            keepalive_expiry = Config.HTTP.EXTERNAL_KEEPALIVE_EXPIRY
+            timeout = Config.HTTP.EXTERNAL_TIMEOUT
+            http2 = Config.HTTP.EXTERNAL_HTTP2
+        else:
+            raise ValueError(f"Unknown HTTP upstream: {upstream}")
+
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(timeout, pool=Config.HTTP.POOL_TIMEOUT),
+            http2=http2,
+        )
+
+    @classmethod
+    def get_client(cls, upstream: str = GITLAB) -> httpx.AsyncClient:
+        if upstream not in cls._instances:
+            cls._instances[upstream] = cls._create_client(upstream)
+        return cls._instances[upstream]
+
+    @classmethod
+    def get_pool_stats(cls) -> dict[str, dict[str, int]]:
+        """Stats of the pools opened by this process, pools whose state can't be read are left out."""
+        stats = {}
+        for upstream, client in cls._instances.items():
+            try:
+                stats[upstream] = read_pool_stats(client)
+            except Exception as e:
+                logging.getLogger("app.clients.http").warning(f"Can't read {upstream} HTTP pool stats: {e}")
+        return stats
 
     @classmethod
     async def shutdown(cls) -> None:
-        if cls._instance:
-            await cls._instance.aclose()
-            cls._instance = None
+        for client in cls._instances.values():
+            await client.aclose()
+        cls._instances.clear()
 
 
 async def provide_db_client() -> AsyncGenerator[DatabaseClient, None]:
@@ -102,7 +205,7 @@ async def provide_db_client() -> AsyncGenerator[DatabaseClient, None]:
 
 
 def provide_http_client() -> httpx.AsyncClient:
-    return HTTPClientManager.get_client()
+    return HTTPClientManager.get_client(HTTPClientManager.GITLAB)
 
 
 def provide_gitlab_client(http_client: httpx.AsyncClient) -> GitLabClient:
@@ -110,6 +213,8 @@ def provide_gitlab_client(http_client: httpx.AsyncClient) -> GitLabClient:
         api_base_url=Config.GitLab.API_BASE_URL,
         http_client=http_client,
         logger=logging.getLogger("app.clients.gitlab"),
+        retry_policy=gitlab_retry_policy,
+        rate_limiter=gitlab_rate_limiter,
     )
 
 
@@ -129,6 +234,22 @@ def provide_project_repository(gitlab_client: GitLabClient, db_client: DatabaseC
         gitlab_client,
         db_client,
         logger=logging.getLogger("app.repositories.project"),
+        webhook_cache=webhook_project_cache,
+    )
+
+
+def provide_webhook_delivery_repository(db_client: DatabaseClient) -> WebhookDeliveryRepository:
+    return WebhookDeliveryRepository(
+        db_client,
+        logger=logging.getLogger("app.repositories.webhook_delivery"),
+        delivery_cache=webhook_delivery_cache,
+    )
+
+
+def provide_webhook_inbox_repository(db_client: DatabaseClient) -> WebhookInboxRepository:
+    return WebhookInboxRepository(
+        db_client,
+        logger=logging.getLogger("app.repositories.webhook_inbox"),
     )
 
 
@@ -153,6 +274,21 @@ def provide_agent_service(
     )
 
 
+def provide_worker_agent_service(
+        agent_repository: AgentRepository,
+        token_encryption: TokenEncryption
+) -> AgentService:
+    return AgentService(
+        agent_repository=agent_repository,
+        token_encryption=token_encryption,
+        logger=logging.getLogger("app.services.agent"),
+        default_provider=Config.AI.DEFAULT_PROVIDER,
+        default_model=Config.AI.DEFAULT_MODEL,
+        default_token=Config.AI.DEFAULT_TOKEN,
+        agent_cache=worker_agent_cache,
+    )
+
+
 def provide_auth_service(
     gitlab_client: GitLabClient,
     user_service: UserService,
@@ -181,6 +317,8 @@ def provide_user_service(
         gitlab_client=gitlab_client,
         bot_token=Config.GitLab.BOT_TOKEN,
         logger=logging.getLogger("app.services.user"),
+        bot_user_cache=bot_user_cache,
+        bot_user_flight=bot_user_flight,
     )
 
 
@@ -189,6 +327,20 @@ def provide_project_service(project_repository: ProjectRepository) -> ProjectSer
         project_repository=project_repository,
         bot_token=Config.GitLab.BOT_TOKEN,
         logger=logging.getLogger("app.services.project"),
+        project_cache=project_cache,
+        search_cache=search_cache,
+        search_flight=search_flight,
+        project_fresh_ttl=Config.Cache.PROJECT_FRESH_TTL,
+    )
+
+
+def provide_merge_request_service(gitlab_client: GitLabClient) -> MergeRequestService:
+    return MergeRequestService(
+        gitlab_client=gitlab_client,
+        bot_token=Config.GitLab.BOT_TOKEN,
+        logger=logging.getLogger("app.services.merge_request"),
+        mr_context_cache=mr_context_cache,
+        mr_context_flight=mr_context_flight,
     )
 
 
@@ -212,21 +364,27 @@ def provide_job_repository(db_client: DatabaseClient) -> JobRepository:
     )
 
 
+def provide_job_log_broadcaster() -> JobLogBroadcaster:
+    return job_log_broadcaster
+
+
 def provide_job_log_repository(db_client: DatabaseClient) -> JobLogRepository:
     return JobLogRepository(
         db_client,
         logger=logging.getLogger("app.repositories.job_log"),
+        codec=job_log_codec,
     )
 
 
 def provide_job_queue_service(
-    job_repository: JobRepository,
-    agent_repository: AgentRepository,
+        job_repository: JobRepository,
+        job_log_repository: JobLogRepository
 ) -> JobQueueService:
     return JobQueueService(
         job_repository=job_repository,
-        agent_repository=agent_repository,
+        job_log_repository=job_log_repository,
         logger=logging.getLogger("app.services.job_queue"),
+        dedup_window=Config.Jobs.DEDUP_WINDOW,
     )
 
 
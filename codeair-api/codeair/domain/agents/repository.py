@@ -1,11 +1,15 @@
 import json
 from logging import Logger
+from typing import Callable
 from uuid import UUID
 
-from codeair.clients.database import DatabaseClient, Record
+from codeair.clients.database import Connection, DatabaseClient, Record
 from codeair.domain.agents import Agent, AgentConfig
 
-__all__ = ["AgentRepository"]
+__all__ = ["AgentRepository", "AGENTS_CHANNEL"]
+
+# Postgres NOTIFY channel with the id of every saved agent, for caches to drop it
+AGENTS_CHANNEL = "codeair_agents"
 
 
 class AgentRepository:
@@ -15,6 +19,9 @@ class AgentRepository:
 
     def _row_to_agent(self, row: Record) -> Agent:
         config_data = json.loads(row["config"]) if isinstance(row["config"], str) else row["config"]
+        if "token_hash" in row:
+            # Reads for display get the fingerprint, the encrypted token isn't selected
+            config_data["token"] = row["token_hash"]
         config = AgentConfig(**config_data)
         return Agent(
             id=row["id"],
@@ -30,6 +37,17 @@ class AgentRepository:
         # Note: created_by and updated_by are stored in DB but not exposed in the model
 
     async def find_by_id(self, agent_id: UUID) -> Agent | None:
+        """The agent with its token hash in place of the token."""
+        sql = """
+            SELECT id, agent_type, engine, name, description, enabled, config - 'token' AS config,
+                   token_hash, created_at, updated_at
+            FROM agents
+            WHERE id = $1
+        """
+        row = await self._db_client.fetch_one(sql, agent_id)
+        return self._row_to_agent(row) if row else None
+
+    async def find_by_id_with_encrypted_token(self, agent_id: UUID) -> Agent | None:
         sql = """
             SELECT id, agent_type, engine, name, description, enabled, config,
                    created_at, updated_at
@@ -40,9 +58,10 @@ class AgentRepository:
         return self._row_to_agent(row) if row else None
 
     async def find_by_project_id(self, project_id: int) -> list[Agent]:
+        """Agents with their token hash in place of the token."""
         sql = """
-            SELECT id, agent_type, engine, name, description, enabled, config,
-                   created_at, updated_at
+            SELECT id, agent_type, engine, name, description, enabled, config - 'token' AS config,
+                   token_hash, created_at, updated_at
             FROM agents
             WHERE project_id = $1
             ORDER BY agent_type ASC, created_at DESC
@@ -50,23 +69,25 @@ class AgentRepository:
         rows = await self._db_client.fetch_many(sql, project_id)
         return [self._row_to_agent(row) for row in rows]
 
-    async def save(self, project_id: int, agent: Agent, user_id: int) -> Agent:
+    async def save(self, project_id: int, agent: Agent, user_id: int, token_hash: str) -> Agent:
+        """Saves an agent whose token is encrypted, returns it with `token_hash` in place of the token."""
         config_json = json.dumps(agent.config.model_dump(mode="json"))
 
         sql = """
             INSERT INTO agents
-            (id, project_id, agent_type, engine, name, description, enabled, config,
+            (id, project_id, agent_type, engine, name, description, enabled, config, token_hash,
              created_at, created_by, updated_at, updated_by)
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, NOW(), $9, NOW(), $10)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, NOW(), $10, NOW(), $11)
             ON CONFLICT (id) DO UPDATE SET
                 name = EXCLUDED.name,
                 description = EXCLUDED.description,
                 enabled = EXCLUDED.enabled,
                 config = EXCLUDED.config,
+                token_hash = EXCLUDED.token_hash,
                 updated_at = NOW(),
                 updated_by = EXCLUDED.updated_by
-            RETURNING id, agent_type, engine, name, description, enabled, config,
-                      created_at, updated_at
+            RETURNING id, agent_type, engine, name, description, enabled, config - 'token' AS config,
+                      token_hash, created_at, updated_at, pg_notify($12, id::text)
         """
         row = await self._db_client.fetch_one(
             sql,
@@ -78,8 +99,20 @@ class AgentRepository:
             agent.description,
             agent.enabled,
             config_json,
+            token_hash,
             user_id,
             user_id,
+            AGENTS_CHANNEL,
         )
 
         return self._row_to_agent(row)
+
+    async def listen(
+        self,
+        callback: Callable[[str], None],
+        on_terminate: Callable[[], None] | None = None,
+    ) -> Connection:
+        return await self._db_client.listen(AGENTS_CHANNEL, callback, on_terminate)
+
+    async def unlisten(self, conn: Connection) -> None:
+        await self._db_client.unlisten(conn)
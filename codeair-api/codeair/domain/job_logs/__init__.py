@@ -1,4 +1,5 @@
-from codeair.domain.job_logs.models import JobLog
+from codeair.domain.job_logs.compression import JobLogCodec
+from codeair.domain.job_logs.models import JobLog, JobLogChunk
 from codeair.domain.job_logs.repository import JobLogRepository
 
-__all__ = ["JobLog", "JobLogRepository"]
+__all__ = ["JobLog", "JobLogChunk", "JobLogCodec", "JobLogRepository"]
@@ -0,0 +1,61 @@
+import zstandard
+
+__all__ = ["JobLogCodec", "train_dictionary"]
+
+DICTIONARY_SIZE = 112 * 1024
+
+
+class JobLogCodec:
+    """
+    zstd compression of job log bodies.
+
+    New bodies are compressed with the current (latest trained) dictionary; any known
+    dictionary can be used to decompress, since rows keep the id they were written with.
+    """
+
+    def __init__(self, level: int = 3) -> None:
+        self._level = level
+        self._dictionaries: dict[int, zstandard.ZstdCompressionDict] = {}
+        self._current_dictionary_id: int | None = None
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressors: dict[int | None, zstandard.ZstdDecompressor] = {None: zstandard.ZstdDecompressor()}
+        self.checked_at: float | None = None  # monotonic time the latest dictionary id was last looked up
+
+    @property
+    def current_dictionary_id(self) -> int | None:
+        return self._current_dictionary_id
+
+    def has_dictionary(self, dictionary_id: int | None) -> bool:
+        return dictionary_id is None or dictionary_id in self._dictionaries
+
+    def add_dictionary(self, dictionary_id: int, data: bytes, current: bool = False) -> None:
+        dictionary = zstandard.ZstdCompressionDict(data)
+        self._dictionaries[dictionary_id] = dictionary
+        self._decompressors[dictionary_id] = zstandard.ZstdDecompressor(dict_data=dictionary)
+        if current:
+            self.set_current(dictionary_id)
+
+    def set_current(self, dictionary_id: int) -> None:
+        self._current_dictionary_id = dictionary_id
+        self._compressor = zstandard.ZstdCompressor(level=self._level, dict_data=self._dictionaries[dictionary_id])
+
+    def compress(self, text: str | None) -> bytes | None:
+        if text is None:
+            return None
+        return self._compressor.compress(text.encode())
+
+    def decompress(self, data: bytes | None, dictionary_id: int | None) -> str | None:
+        if data is None:
+            return None
+        return self._decompressors[dictionary_id].decompress(data).decode(errors="replace")
+
+
+def train_dictionary(samples: list[str], size: int = DICTIONARY_SIZE) -> bytes | None:
+    """Train a dictionary on sample log bodies, None if there isn't enough to train on."""
+    encoded = [sample.encode() for sample in samples if sample]
+    if len(encoded) < 10:
+        return None
+    try:
+        return zstandard.train_dictionary(size, encoded).as_bytes()
+    except zstandard.ZstdError:
+        return None
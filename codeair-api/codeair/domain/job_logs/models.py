@@ -2,7 +2,7 @@ from datetime import datetime
 
 from pydantic import BaseModel, Field
 
-__all__ = ["JobLog"]
+__all__ = ["JobLog", "JobLogChunk"]
 
 
 class JobLog(BaseModel):
@@ -12,3 +12,11 @@ class JobLog(BaseModel):
     stderr: str | None = Field(default=None)
     elapsed_ms: int
     created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class JobLogChunk(BaseModel):
+    job_id: int
+    seq: int
+    stream: str
+    data: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -1,52 +1,209 @@
+import time
+from datetime import date, datetime
 from logging import Logger
+from typing import Callable
 
-from codeair.clients.database import DatabaseClient, Record
-from codeair.domain.job_logs import JobLog
+from codeair.clients.database import Connection, DatabaseClient, Record
+from codeair.domain.errors import EntityNotFoundError
+from codeair.domain.job_logs.compression import JobLogCodec
+from codeair.domain.job_logs.models import JobLog, JobLogChunk
 
-__all__ = ["JobLogRepository"]
+__all__ = ["JobLogRepository", "JOB_LOGS_CHANNEL"]
+
+# Postgres NOTIFY channel for job output, payload is "<job_id>:chunk" or "<job_id>:end"
+JOB_LOGS_CHANNEL = "codeair_job_logs"
+
+# Characters of each body (its end) kept uncompressed for log lists
+PREVIEW_LENGTH = 200
+
+# Seconds between lookups of the latest dictionary, so one trained while running gets picked up
+DICTIONARY_CHECK_INTERVAL = 60.0
+
+
+def _preview(text: str | None) -> str | None:
+    return text[-PREVIEW_LENGTH:] if text is not None else None
+
+
+def _size(text: str | None) -> int | None:
+    return len(text.encode()) if text is not None else None
 
 
 class JobLogRepository:
-    def __init__(self, db_client: DatabaseClient, logger: Logger) -> None:
+    def __init__(self, db_client: DatabaseClient, logger: Logger, codec: JobLogCodec) -> None:
         self._db_client = db_client
         self._logger = logger
+        self._codec = codec
+
+    async def _load_codec(self) -> None:
+        checked_at = self._codec.checked_at
+        if checked_at is not None and time.monotonic() - checked_at < DICTIONARY_CHECK_INTERVAL:
+            return
+
+        row = await self._db_client.fetch_one("SELECT MAX(id) AS id FROM job_log_dictionaries")
+        latest_id = row["id"] if row else None
+        if latest_id is not None and latest_id != self._codec.current_dictionary_id:
+            if not self._codec.has_dictionary(latest_id):
+                dictionary = await self.find_dictionary(latest_id)
+                self._codec.add_dictionary(latest_id, dictionary["data"])
+            self._codec.set_current(latest_id)
+            self._logger.info(f"Compressing job logs with dictionary {latest_id}")
+        self._codec.checked_at = time.monotonic()
 
-    def _row_to_job_log(self, row: Record) -> JobLog:
+    async def _decode_bodies(self, row: Record) -> dict:
+        # Bodies are stored compressed; rows written before compression still have them as text
+        data = dict(row)
+        stdout_zst, stderr_zst = data.pop("stdout_zst", None), data.pop("stderr_zst", None)
+        dictionary_id = data.pop("dictionary_id", None)
+        if stdout_zst is None and stderr_zst is None:
+            return data
+
+        if not self._codec.has_dictionary(dictionary_id):
+            dictionary = await self.find_dictionary(dictionary_id)
+            self._codec.add_dictionary(dictionary_id, dictionary["data"])
+        if stdout_zst is not None:
+            data["stdout"] = self._codec.decompress(stdout_zst, dictionary_id)
+        if stderr_zst is not None:
+            data["stderr"] = self._codec.decompress(stderr_zst, dictionary_id)
+        return data
+
+    async def _row_to_job_log(self, row: Record) -> JobLog:
+        data = await self._decode_bodies(row)
         return JobLog(
-            job_id=row["job_id"],
-            exit_code=row["exit_code"],
-            stdout=row.get("stdout"),
-            stderr=row.get("stderr"),
-            elapsed_ms=row["elapsed_ms"],
-            created_at=row["created_at"],
+            job_id=data["job_id"],
+            exit_code=data["exit_code"],
+            stdout=data.get("stdout"),
+            stderr=data.get("stderr"),
+            elapsed_ms=data["elapsed_ms"],
+            created_at=data["created_at"],
         )
 
     async def create(self, job_log: JobLog) -> JobLog:
+        await self._load_codec()
+
+        # The final log supersedes the chunks streamed while the job was running
         sql = """
-            INSERT INTO job_logs (job_id, exit_code, stdout, stderr, elapsed_ms, created_at)
-            VALUES ($1, $2, $3, $4, $5, $6)
-            RETURNING job_id, exit_code, stdout, stderr, elapsed_ms, created_at
+            WITH deleted_chunks AS (
+                DELETE FROM job_log_chunks WHERE job_id = $1
+            ),
+            job AS (
+                -- Logs are usually written before the job leaves the queue, the finished jobs are
+                -- only probed when it isn't there
+                SELECT created_at FROM job_queue WHERE id = $1
+                UNION ALL
+                SELECT created_at FROM jobs WHERE id = $1
+                LIMIT 1
+            )
+            INSERT INTO job_logs (job_id, job_created_at, exit_code, stdout_zst, stderr_zst, dictionary_id,
+                                  stdout_preview, stderr_preview, stdout_bytes, stderr_bytes, elapsed_ms, created_at)
+            SELECT $1, job.created_at, $2::integer, $3::bytea, $4::bytea, $5::integer, $6::text, $7::text,
+                   $8::integer, $9::integer, $10::integer, $11::timestamp
+            FROM job
+            ON CONFLICT (job_id, job_created_at) DO UPDATE SET
+                exit_code = EXCLUDED.exit_code,
+                stdout = NULL,
+                stderr = NULL,
+                stdout_zst = EXCLUDED.stdout_zst,
+                stderr_zst = EXCLUDED.stderr_zst,
+                dictionary_id = EXCLUDED.dictionary_id,
+                stdout_preview = EXCLUDED.stdout_preview,
+                stderr_preview = EXCLUDED.stderr_preview,
+                stdout_bytes = EXCLUDED.stdout_bytes,
+                stderr_bytes = EXCLUDED.stderr_bytes,
+                elapsed_ms = EXCLUDED.elapsed_ms,
+                created_at = EXCLUDED.created_at
+            RETURNING job_id, pg_notify($12, job_id || ':end')
         """
         row = await self._db_client.fetch_one(
             sql,
             job_log.job_id,
             job_log.exit_code,
-            job_log.stdout,
-            job_log.stderr,
+            self._codec.compress(job_log.stdout),
+            self._codec.compress(job_log.stderr),
+            self._codec.current_dictionary_id,
+            _preview(job_log.stdout),
+            _preview(job_log.stderr),
+            _size(job_log.stdout),
+            _size(job_log.stderr),
             job_log.elapsed_ms,
             job_log.created_at,
+            JOB_LOGS_CHANNEL,
+        )
+        if row is None:
+            raise EntityNotFoundError(f"Job {job_log.job_id} not found, its log was not saved")
+
+        return job_log
+
+    async def append_chunks(self, chunks: list[JobLogChunk]) -> None:
+        if not chunks:
+            return
+
+        sql = """
+            WITH inserted AS (
+                INSERT INTO job_log_chunks (job_id, seq, stream, data, created_at)
+                SELECT * FROM unnest($1::integer[], $2::integer[], $3::varchar[], $4::text[], $5::timestamp[])
+                ON CONFLICT (job_id, seq) DO NOTHING
+                RETURNING job_id
+            )
+            SELECT pg_notify($6, job_id || ':chunk')
+            FROM (SELECT DISTINCT job_id FROM inserted) AS jobs
+        """
+        await self._db_client.execute(
+            sql,
+            [chunk.job_id for chunk in chunks],
+            [chunk.seq for chunk in chunks],
+            [chunk.stream for chunk in chunks],
+            [chunk.data for chunk in chunks],
+            [chunk.created_at for chunk in chunks],
+            JOB_LOGS_CHANNEL,
         )
 
-        return self._row_to_job_log(row)
+    async def find_chunks(self, job_id: int, after_seq: int = 0) -> list[JobLogChunk]:
+        sql = """
+            SELECT job_id, seq, stream, data, created_at
+            FROM job_log_chunks
+            WHERE job_id = $1 AND seq > $2
+            ORDER BY seq ASC
+        """
+        rows = await self._db_client.fetch_many(sql, job_id, after_seq)
+        return [JobLogChunk(**dict(row)) for row in rows]
+
+    async def delete_chunks_before(self, before: date) -> int:
+        # Chunks of jobs that never got a final log, e.g. dropped along with their partition
+        sql = """
+            DELETE FROM job_log_chunks
+            WHERE created_at < $1
+        """
+        result = await self._db_client.execute(sql, before)
+        return int(result.split()[-1])
+
+    async def listen(
+        self,
+        callback: Callable[[str], None],
+        on_terminate: Callable[[], None] | None = None,
+    ) -> Connection:
+        return await self._db_client.listen(JOB_LOGS_CHANNEL, callback, on_terminate)
+
+    async def unlisten(self, conn: Connection) -> None:
+        await self._db_client.unlisten(conn)
+
+    async def find_job_state(self, job_id: int, agent_id: str) -> dict | None:
+        sql = """
+            SELECT j.id as job_id, j.started_at, j.ended_at, jl.exit_code, jl.elapsed_ms
+            FROM all_jobs j
+            LEFT JOIN job_logs jl ON jl.job_id = j.id AND jl.job_created_at = j.created_at
+            WHERE j.id = $1 AND j.agent_id = $2
+        """
+        row = await self._db_client.fetch_one(sql, job_id, agent_id)
+        return dict(row) if row else None
 
     async def find_by_job_id(self, job_id: int) -> JobLog | None:
         sql = """
-            SELECT job_id, exit_code, stdout, stderr, elapsed_ms, created_at
+            SELECT job_id, exit_code, stdout, stderr, stdout_zst, stderr_zst, dictionary_id, elapsed_ms, created_at
             FROM job_logs
             WHERE job_id = $1
         """
         row = await self._db_client.fetch_one(sql, job_id)
-        return self._row_to_job_log(row) if row else None
+        return await self._row_to_job_log(row) if row else None
 
     async def find_by_job_id_with_details(self, job_id: int, agent_id: str) -> dict | None:
         sql = """
@@ -57,17 +214,30 @@ class JobLogRepository:
                 j.started_at,
                 j.ended_at,
                 jl.exit_code,
-                jl.stdout,
-                jl.stderr,
+                -- While the job is running, show what it has printed so far
+                CASE WHEN jl.job_id IS NULL THEN (
+                    SELECT string_agg(c.data, '' ORDER BY c.seq) FROM job_log_chunks c
+                    WHERE c.job_id = j.id AND c.stream = 'stdout'
+                ) ELSE jl.stdout END AS stdout,
+                CASE WHEN jl.job_id IS NULL THEN (
+                    SELECT string_agg(c.data, '' ORDER BY c.seq) FROM job_log_chunks c
+                    WHERE c.job_id = j.id AND c.stream = 'stderr'
+                ) ELSE jl.stderr END AS stderr,
+                jl.stdout_zst,
+                jl.stderr_zst,
+                jl.dictionary_id,
                 jl.elapsed_ms
-            FROM jobs j
-            LEFT JOIN job_logs jl ON j.id = jl.job_id
+            FROM all_jobs j
+            LEFT JOIN job_logs jl ON jl.job_id = j.id AND jl.job_created_at = j.created_at
             WHERE j.id = $1 AND j.agent_id = $2
         """
         row = await self._db_client.fetch_one(sql, job_id, agent_id)
-        return dict(row) if row else None
+        return await self._decode_bodies(row) if row else None
 
-    async def find_by_agent_id(self, agent_id: str, limit: int = 10) -> list[dict]:
+    async def find_by_agent_id(self, agent_id: str, limit: int = 10,
+                               before: tuple[datetime, int] | None = None) -> list[dict]:
+        """Newest first; `before` is the (created_at, job_id) of the last job of the previous page."""
+        # Summaries only, bodies are read one job at a time
         sql = """
             SELECT
                 j.id as job_id,
@@ -76,14 +246,132 @@ class JobLogRepository:
                 j.started_at,
                 j.ended_at,
                 jl.exit_code,
-                jl.stdout,
-                jl.stderr,
+                jl.stdout_preview,
+                jl.stderr_preview,
+                jl.stdout_bytes,
+                jl.stderr_bytes,
                 jl.elapsed_ms
-            FROM jobs j
-            LEFT JOIN job_logs jl ON j.id = jl.job_id
-            WHERE j.agent_id = $1
-            ORDER BY j.created_at DESC
+            FROM all_jobs j
+            LEFT JOIN job_logs jl ON jl.job_id = j.id AND jl.job_created_at = j.created_at
+            WHERE j.agent_id = $1 {keyset}
+            ORDER BY j.created_at DESC, j.id DESC
             LIMIT $2
         """
-        rows = await self._db_client.fetch_many(sql, agent_id, limit)
+        if before is None:
+            rows = await self._db_client.fetch_many(sql.format(keyset=""), agent_id, limit)
+        else:
+            keyset = "AND (j.created_at, j.id) < ($3, $4)"
+            rows = await self._db_client.fetch_many(sql.format(keyset=keyset), agent_id, limit, *before)
         return [dict(row) for row in rows]
+
+    async def find_latest_dictionary(self) -> dict | None:
+        sql = """
+            SELECT id, data FROM job_log_dictionaries
+            ORDER BY id DESC
+            LIMIT 1
+        """
+        row = await self._db_client.fetch_one(sql)
+        return dict(row) if row else None
+
+    async def find_dictionary(self, dictionary_id: int) -> dict | None:
+        sql = """
+            SELECT id, data FROM job_log_dictionaries
+            WHERE id = $1
+        """
+        row = await self._db_client.fetch_one(sql, dictionary_id)
+        return dict(row) if row else None
+
+    async def create_dictionary(self, data: bytes) -> int:
+        sql = """
+            INSERT INTO job_log_dictionaries (data, created_at)
+            VALUES ($1, NOW())
+            RETURNING id
+        """
+        row = await self._db_client.fetch_one(sql, data)
+        self._codec.add_dictionary(row["id"], data, current=True)
+        return row["id"]
+
+    async def find_sample_bodies(self, limit: int) -> list[str]:
+        sql = """
+            SELECT stdout, stderr, stdout_zst, stderr_zst, dictionary_id
+            FROM job_logs
+            ORDER BY created_at DESC
+            LIMIT $1
+        """
+        rows = await self._db_client.fetch_many(sql, limit)
+        samples = []
+        for row in rows:
+            data = await self._decode_bodies(row)
+            samples.extend(body for body in (data["stdout"], data["stderr"]) if body)
+        return samples
+
+    async def compress_uncompressed(self, batch_size: int) -> int:
+        """Compress a batch of bodies still stored as text, returns how many rows were converted."""
+        await self._load_codec()
+
+        sql = """
+            SELECT job_id, job_created_at, stdout, stderr
+            FROM job_logs
+            WHERE stdout IS NOT NULL OR stderr IS NOT NULL
+            LIMIT $1
+        """
+        rows = await self._db_client.fetch_many(sql, batch_size)
+        if not rows:
+            return 0
+
+        sql = """
+            UPDATE job_logs
+            SET stdout = NULL,
+                stderr = NULL,
+                stdout_zst = batch.stdout_zst,
+                stderr_zst = batch.stderr_zst,
+                dictionary_id = $5
+            FROM unnest($1::integer[], $2::timestamp[], $3::bytea[], $4::bytea[])
+                AS batch(job_id, job_created_at, stdout_zst, stderr_zst)
+            WHERE job_logs.job_id = batch.job_id
+              AND job_logs.job_created_at = batch.job_created_at
+              -- Skip rows create() replaced with a compressed log since they were read
+              AND (job_logs.stdout IS NOT NULL OR job_logs.stderr IS NOT NULL)
+        """
+        await self._db_client.execute(
+            sql,
+            [row["job_id"] for row in rows],
+            [row["job_created_at"] for row in rows],
+            [self._codec.compress(row["stdout"]) for row in rows],
+            [self._codec.compress(row["stderr"]) for row in rows],
+            self._codec.current_dictionary_id,
+        )
+        return len(rows)
+
+    async def backfill_summaries(self, batch_size: int) -> int:
+        """Fill in previews and sizes of compressed rows written before they existed."""
+        sql = """
+            SELECT job_id, stdout_zst, stderr_zst, dictionary_id
+            FROM job_logs
+            WHERE (stdout_zst IS NOT NULL AND stdout_bytes IS NULL)
+               OR (stderr_zst IS NOT NULL AND stderr_bytes IS NULL)
+            LIMIT $1
+        """
+        rows = [await self._decode_bodies(row) for row in await self._db_client.fetch_many(sql, batch_size)]
+        if not rows:
+            return 0
+
+        sql = """
+            UPDATE job_logs
+            SET stdout_preview = batch.stdout_preview,
+                stderr_preview = batch.stderr_preview,
+                stdout_bytes = batch.stdout_bytes,
+                stderr_bytes = batch.stderr_bytes
+            FROM unnest($1::integer[], $2::text[], $3::text[], $4::integer[], $5::integer[])
+                AS batch(job_id, stdout_preview, stderr_preview, stdout_bytes, stderr_bytes)
+            WHERE job_logs.job_id = batch.job_id
+        """
+        await self._db_client.execute(
+            sql,
+            [row["job_id"] for row in rows],
+            [_preview(row.get("stdout")) for row in rows],
+            [_preview(row.get("stderr")) for row in rows],
+            [_size(row.get("stdout")) for row in rows],
+            [_size(row.get("stderr")) for row in rows],
+        )
+        return len(rows)
@@ -13,3 +13,6 @@ class Job(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     started_at: datetime | None = Field(default=None)
     ended_at: datetime | None = Field(default=None)
+    claimed_by: str | None = Field(default=None)
+    lease_expires_at: datetime | None = Field(default=None)
+    attempts: int = Field(default=0)
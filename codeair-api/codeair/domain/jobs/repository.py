@@ -1,11 +1,19 @@
 import json
+from datetime import date
 from logging import Logger
+from typing import Callable
 from uuid import UUID
 
-from codeair.clients.database import DatabaseClient, Record
+from codeair.clients.database import Connection, DatabaseClient, Record
+from codeair.domain.job_logs.repository import JOB_LOGS_CHANNEL
 from codeair.domain.jobs import Job
 
-__all__ = ["JobRepository"]
+__all__ = ["JobRepository", "JOBS_CHANNEL"]
+
+# Postgres NOTIFY channel used to wake up workers when new jobs are enqueued
+JOBS_CHANNEL = "codeair_jobs"
+
+PARTITIONED_TABLES = ("job_logs", "jobs")
 
 
 class JobRepository:
@@ -22,59 +30,259 @@ class JobRepository:
             created_at=row["created_at"],
             started_at=row.get("started_at"),
             ended_at=row.get("ended_at"),
+            claimed_by=row.get("claimed_by"),
+            lease_expires_at=row.get("lease_expires_at"),
+            attempts=row.get("attempts", 0),
         )
 
-    async def create(self, job: Job) -> Job:
-        payload_json = json.dumps(job.payload)
+    async def create_for_project(self, project_id: int, payload: dict, dedup_window: float) -> list[Job]:
+        payload_json = json.dumps(payload)
 
+        # A single statement, so either every enabled agent gets its job or none does.
+        # Agents that already have this MR revision queued or ran it within `dedup_window` seconds are skipped.
         sql = """
-            INSERT INTO jobs (agent_id, payload, created_at, started_at, ended_at)
-            VALUES ($1, $2, $3, $4, $5)
-            RETURNING id, agent_id, payload, created_at, started_at, ended_at
+            WITH created AS (
+                INSERT INTO job_queue (agent_id, payload, created_at)
+                SELECT id, $2, NOW()
+                FROM agents
+                WHERE project_id = $1 AND enabled
+                  AND NOT EXISTS (
+                      SELECT 1 FROM jobs
+                      WHERE jobs.agent_id = agents.id
+                        AND jobs.created_at >= NOW() - make_interval(secs => $5)
+                        AND jobs.payload->>'mr_url' = $3
+                        AND COALESCE(jobs.payload->>'head_sha', '') = COALESCE($4::text, '')
+                        AND jobs.started_at IS NOT NULL
+                  )
+                ON CONFLICT (agent_id, (payload->>'mr_url'), (COALESCE(payload->>'head_sha', ''))) DO NOTHING
+                RETURNING id, agent_id, payload, created_at, started_at, NULL::timestamp AS ended_at,
+                          claimed_by, lease_expires_at, attempts
+            )
+            SELECT created.*, pg_notify($6, created.id::text)
+            FROM created
+            ORDER BY created.id ASC
         """
-        row = await self._db_client.fetch_one(
+        rows = await self._db_client.fetch_many(
             sql,
-            job.agent_id,
+            project_id,
             payload_json,
-            job.created_at,
-            job.started_at,
-            job.ended_at,
+            payload.get("mr_url"),
+            payload.get("head_sha"),
+            dedup_window,
+            JOBS_CHANNEL,
         )
+        return [self._row_to_job(row) for row in rows]
 
-        return self._row_to_job(row)
+    async def cancel_superseded_jobs(self, mr_url: str, head_sha: str) -> list[Job]:
+        # Pending jobs for older revisions of the MR leave the queue without running
+        sql = """
+            WITH superseded AS (
+                DELETE FROM job_queue
+                WHERE started_at IS NULL
+                  AND payload->>'mr_url' = $1
+                  AND payload->>'head_sha' IS DISTINCT FROM $2
+                RETURNING id, agent_id, payload, created_at, attempts
+            )
+            INSERT INTO jobs (id, agent_id, payload, created_at, started_at, ended_at,
+                              claimed_by, lease_expires_at, attempts)
+            SELECT id, agent_id, payload, created_at, NULL, NOW(), NULL, NULL, attempts
+            FROM superseded
+            RETURNING id, agent_id, payload, created_at, started_at, ended_at,
+                      claimed_by, lease_expires_at, attempts
+        """
+        rows = await self._db_client.fetch_many(sql, mr_url, head_sha)
+        return [self._row_to_job(row) for row in rows]
 
     async def find_by_agent_id(self, agent_id: UUID) -> list[Job]:
         sql = """
-            SELECT id, agent_id, payload, created_at, started_at, ended_at
-            FROM jobs
+            SELECT id, agent_id, payload, created_at, started_at, ended_at,
+                   claimed_by, lease_expires_at, attempts
+            FROM all_jobs
             WHERE agent_id = $1
             ORDER BY created_at DESC
         """
         rows = await self._db_client.fetch_many(sql, agent_id)
         return [self._row_to_job(row) for row in rows]
 
-    async def claim_next_job(self) -> Job | None:
+    async def listen(
+        self,
+        callback: Callable[[str], None],
+        on_terminate: Callable[[], None] | None = None,
+    ) -> Connection:
+        return await self._db_client.listen(JOBS_CHANNEL, callback, on_terminate)
+
+    async def unlisten(self, conn: Connection) -> None:
+        await self._db_client.unlisten(conn)
+
+    async def claim_next_job(self, worker_id: str, lease_seconds: float) -> Job | None:
         sql = """
-            UPDATE jobs
-            SET started_at = NOW()
+            UPDATE job_queue
+            SET started_at = NOW(),
+                claimed_by = $1,
+                lease_expires_at = NOW() + make_interval(secs => $2),
+                attempts = attempts + 1
             WHERE id = (
-                SELECT id FROM jobs
+                SELECT id FROM job_queue
                 WHERE started_at IS NULL
                 ORDER BY created_at ASC
                 LIMIT 1
                 FOR UPDATE SKIP LOCKED
             )
-            RETURNING id, agent_id, payload, created_at, started_at, ended_at
+            RETURNING id, agent_id, payload, created_at, started_at, NULL::timestamp AS ended_at,
+                      claimed_by, lease_expires_at, attempts
         """
-        row = await self._db_client.fetch_one(sql)
+        row = await self._db_client.fetch_one(sql, worker_id, lease_seconds)
         return self._row_to_job(row) if row else None
 
-    async def complete_job(self, job_id: int) -> Job | None:
+    async def claim_jobs_for_mr(
+        self,
+        worker_id: str,
+        lease_seconds: float,
+        mr_url: str,
+        agent_id: UUID,
+        engine: str,
+    ) -> list[Job]:
+        # Pending jobs of other agents on the same engine for the same MR, if `agent_id` runs on it too
         sql = """
-            UPDATE jobs
-            SET ended_at = NOW()
-            WHERE id = $1
-            RETURNING id, agent_id, payload, created_at, started_at, ended_at
+            UPDATE job_queue
+            SET started_at = NOW(),
+                claimed_by = $1,
+                lease_expires_at = NOW() + make_interval(secs => $2),
+                attempts = attempts + 1
+            WHERE id IN (
+                SELECT job_queue.id FROM job_queue
+                JOIN agents ON agents.id = job_queue.agent_id
+                WHERE job_queue.started_at IS NULL
+                  AND job_queue.payload->>'mr_url' = $3
+                  AND job_queue.agent_id <> $4
+                  AND agents.engine = $5
+                  AND EXISTS (SELECT 1 FROM agents WHERE id = $4 AND engine = $5)
+                FOR UPDATE OF job_queue SKIP LOCKED
+            )
+            RETURNING id, agent_id, payload, created_at, started_at, NULL::timestamp AS ended_at,
+                      claimed_by, lease_expires_at, attempts
         """
-        row = await self._db_client.fetch_one(sql, job_id)
+        rows = await self._db_client.fetch_many(sql, worker_id, lease_seconds, mr_url, agent_id, engine)
+        return [self._row_to_job(row) for row in rows]
+
+    async def extend_lease(self, job_id: int, worker_id: str, lease_seconds: float) -> bool:
+        sql = """
+            UPDATE job_queue
+            SET lease_expires_at = NOW() + make_interval(secs => $3)
+            WHERE id = $1 AND claimed_by = $2
+            RETURNING id
+        """
+        row = await self._db_client.fetch_one(sql, job_id, worker_id, lease_seconds)
+        return row is not None
+
+    async def complete_job(self, job_id: int, worker_id: str) -> Job | None:
+        # The job leaves the queue and is written to the history once
+        sql = """
+            WITH completed AS (
+                DELETE FROM job_queue
+                WHERE id = $1 AND claimed_by = $2
+                RETURNING id, agent_id, payload, created_at, started_at, claimed_by, attempts
+            )
+            INSERT INTO jobs (id, agent_id, payload, created_at, started_at, ended_at,
+                              claimed_by, lease_expires_at, attempts)
+            SELECT id, agent_id, payload, created_at, started_at, NOW(), claimed_by, NULL, attempts
+            FROM completed
+            RETURNING id, agent_id, payload, created_at, started_at, ended_at,
+                      claimed_by, lease_expires_at, attempts, pg_notify($3, id || ':end')
+        """
+        row = await self._db_client.fetch_one(sql, job_id, worker_id, JOB_LOGS_CHANNEL)
         return self._row_to_job(row) if row else None
+
+    async def reclaim_expired_jobs(self, max_attempts: int) -> list[Job]:
+        # Jobs with attempts left go back to the queue, the rest are ended for good
+        sql = """
+            WITH expired AS (
+                SELECT id FROM job_queue
+                WHERE lease_expires_at < NOW()
+                FOR UPDATE SKIP LOCKED
+            ),
+            requeued AS (
+                UPDATE job_queue
+                SET started_at = NULL,
+                    claimed_by = NULL,
+                    lease_expires_at = NULL
+                FROM expired
+                WHERE job_queue.id = expired.id AND job_queue.attempts < $1
+                RETURNING job_queue.id, job_queue.agent_id, job_queue.payload, job_queue.created_at,
+                          job_queue.started_at, NULL::timestamp AS ended_at,
+                          job_queue.claimed_by, job_queue.lease_expires_at, job_queue.attempts
+            ),
+            failed AS (
+                DELETE FROM job_queue
+                USING expired
+                WHERE job_queue.id = expired.id AND job_queue.attempts >= $1
+                RETURNING job_queue.id, job_queue.agent_id, job_queue.payload, job_queue.created_at,
+                          job_queue.started_at, job_queue.claimed_by, job_queue.attempts
+            ),
+            ended AS (
+                INSERT INTO jobs (id, agent_id, payload, created_at, started_at, ended_at,
+                                  claimed_by, lease_expires_at, attempts)
+                SELECT id, agent_id, payload, created_at, started_at, NOW(), claimed_by, NULL, attempts
+                FROM failed
+                RETURNING id, agent_id, payload, created_at, started_at, ended_at,
+                          claimed_by, lease_expires_at, attempts
+            )
+            SELECT * FROM requeued
+            UNION ALL
+            SELECT * FROM ended
+        """
+        rows = await self._db_client.fetch_many(sql, max_attempts)
+        jobs = [self._row_to_job(row) for row in rows]
+
+        if any(job.ended_at is None for job in jobs):
+            await self._db_client.execute("SELECT pg_notify($1, '')", JOBS_CHANNEL)
+
+        return jobs
+
+    async def create_partitions(self, months_ahead: int) -> None:
+        sql = """
+            SELECT codeair_create_job_partitions(NOW()::date, (NOW() + make_interval(months => $1))::date)
+        """
+        await self._db_client.execute(sql, months_ahead)
+
+    async def find_partitions_before(self, month: date) -> list[tuple[str, str]]:
+        """(table, partition) pairs of partitions holding only jobs created before `month`."""
+        sql = """
+            SELECT parent.relname AS table_name, child.relname AS partition_name
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = ANY($1::text[])
+              -- Partitions not named <table>_YYYY_MM (attached by hand, a default one) are left alone
+              AND to_date(substring(child.relname FROM '_([0-9]{4}_[0-9]{2})$'), 'YYYY_MM') < $2
+            ORDER BY array_position($1::text[], parent.relname::text), child.relname
+        """
+        rows = await self._db_client.fetch_many(sql, list(PARTITIONED_TABLES), month)
+        return [(row["table_name"], row["partition_name"]) for row in rows]
+
+    async def drop_partition(self, table_name: str, partition_name: str) -> None:
+        # Detaching concurrently doesn't block claims on the parent table, it can't run inside a
+        # function, so the statements are only quoted by the server
+        row = await self._db_client.fetch_one(
+            """
+            SELECT format('ALTER TABLE %I DETACH PARTITION %I CONCURRENTLY', $1::text, $2::text) AS detach_sql,
+                   format('ALTER TABLE %I DETACH PARTITION %I FINALIZE', $1::text, $2::text) AS finalize_sql,
+                   format('DROP TABLE %I', $2::text) AS drop_sql,
+                   EXISTS (
+                       SELECT 1
+                       FROM pg_inherits
+                       JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                       JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                       WHERE parent.relname = $1 AND child.relname = $2 AND pg_inherits.inhdetachpending
+                   ) AS detach_pending
+            """,
+            table_name,
+            partition_name,
+        )
+        # A concurrent detach that was interrupted leaves the partition pending, only FINALIZE completes it
+        if row["detach_pending"]:
+            self._logger.warning(f"Finalizing interrupted detach of partition {partition_name} of {table_name}")
+            await self._db_client.execute(row["finalize_sql"])
+        else:
+            await self._db_client.execute(row["detach_sql"])
+        await self._db_client.execute(row["drop_sql"])
@@ -1,6 +1,7 @@
 from logging import Logger
 from uuid import UUID, uuid4
 
+from codeair.cache import MISSING, TTLCache
 from codeair.clients import GitLabClient
 from codeair.clients.database import DatabaseClient
 from codeair.domain.projects.models import Project
@@ -9,15 +10,31 @@ __all__ = ["ProjectRepository"]
 
 
 class ProjectRepository:
-    def __init__(self, gitlab_client: GitLabClient, db_client: DatabaseClient, logger: Logger) -> None:
+    def __init__(
+        self,
+        gitlab_client: GitLabClient,
+        db_client: DatabaseClient,
+        logger: Logger,
+        webhook_cache: TTLCache[UUID, int | None],
+    ) -> None:
         self._gitlab_client = gitlab_client
         self._db_client = db_client
         self._logger = logger
+        self._webhook_cache = webhook_cache
 
     async def get_by_id(self, project_id: int, user_token: str) -> Project:
         data = await self._gitlab_client.get_project(project_id, user_token)
         return Project(**data)
 
+    async def get_by_id_if_modified(
+        self,
+        project_id: int,
+        user_token: str,
+        etag: str | None = None,
+    ) -> tuple[Project | None, str | None]:
+        data, etag = await self._gitlab_client.get_project_if_modified(project_id, user_token, etag)
+        return (Project(**data) if data else None), etag
+
     async def search(self, query: str, user_token: str) -> list[Project]:
         projects_data = await self._gitlab_client.search_projects(query, user_token)
         return [Project(**project) for project in projects_data]
@@ -32,6 +49,8 @@ class ProjectRepository:
         """
         webhook_id = uuid4()
         result = await self._db_client.fetch_one(sql, project_id, created_by, webhook_id)
+        # Drop any negative entry cached before the webhook existed
+        self._webhook_cache.delete(result["webhook_id"])
         return result["webhook_id"]
 
     async def get_webhook_id_project_id(self, project_id: int) -> UUID | None:
@@ -39,7 +58,14 @@ class ProjectRepository:
         result = await self._db_client.fetch_one(sql, project_id)
         return result["webhook_id"] if result else None
 
-    async def get_project_id_by_webhook_id(self, webhook_id: UUID) -> int:
+    async def get_project_id_by_webhook_id(self, webhook_id: UUID) -> int | None:
+        project_id = self._webhook_cache.get(webhook_id)
+        if project_id is not MISSING:
+            return project_id
+
         sql = "SELECT id FROM projects WHERE webhook_id = $1"
         result = await self._db_client.fetch_one(sql, webhook_id)
-        return result["id"] if result else None
+        project_id = result["id"] if result else None
+
+        self._webhook_cache.set(webhook_id, project_id)
+        return project_id
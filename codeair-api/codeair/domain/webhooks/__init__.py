@@ -0,0 +1,4 @@
+from codeair.domain.webhooks.models import WebhookInboxEntry
+from codeair.domain.webhooks.repository import WebhookDeliveryRepository, WebhookInboxRepository
+
+__all__ = ["WebhookDeliveryRepository", "WebhookInboxEntry", "WebhookInboxRepository"]
@@ -0,0 +1,16 @@
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel
+
+__all__ = ["WebhookInboxEntry"]
+
+
+class WebhookInboxEntry(BaseModel):
+    id: int
+    webhook_id: UUID
+    event_uuid: UUID | None
+    payload: dict
+    received_at: datetime
+    attempts: int = 0
+    last_error: str | None = None
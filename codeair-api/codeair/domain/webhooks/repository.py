@@ -0,0 +1,137 @@
+import json
+from logging import Logger
+from typing import Callable
+from uuid import UUID
+
+from codeair.cache import MISSING, TTLCache
+from codeair.clients.database import Connection, DatabaseClient, Record
+from codeair.domain.webhooks.models import WebhookInboxEntry
+
+__all__ = ["WebhookDeliveryRepository", "WebhookInboxRepository", "WEBHOOK_INBOX_CHANNEL"]
+
+# Postgres NOTIFY channel used to wake up the dispatcher when an event is appended to the inbox
+WEBHOOK_INBOX_CHANNEL = "codeair_webhook_inbox"
+
+
+class WebhookDeliveryRepository:
+    def __init__(
+        self,
+        db_client: DatabaseClient,
+        logger: Logger,
+        delivery_cache: TTLCache[UUID, bool],
+    ) -> None:
+        self._db_client = db_client
+        self._logger = logger
+        self._delivery_cache = delivery_cache
+
+    async def record(self, event_uuid: UUID, webhook_id: UUID) -> bool:
+        """Records a delivery, False if it was already recorded."""
+        # Retries usually come back to the same process within minutes
+        if self._delivery_cache.get(event_uuid) is not MISSING:
+            return False
+
+        sql = """
+            INSERT INTO webhook_deliveries (event_uuid, webhook_id, received_at)
+            VALUES ($1, $2, NOW())
+            ON CONFLICT (event_uuid) DO NOTHING
+            RETURNING event_uuid
+        """
+        row = await self._db_client.fetch_one(sql, event_uuid, webhook_id)
+        self._delivery_cache.set(event_uuid, True)
+        return row is not None
+
+    async def forget(self, event_uuid: UUID) -> None:
+        """Drops a delivery, so that a retry of it is handled again."""
+        self._delivery_cache.delete(event_uuid)
+        await self._db_client.execute("DELETE FROM webhook_deliveries WHERE event_uuid = $1", event_uuid)
+
+    async def purge(self, older_than: float) -> int:
+        sql = """
+            DELETE FROM webhook_deliveries
+            WHERE received_at < NOW() - make_interval(secs => $1)
+        """
+        result = await self._db_client.execute(sql, older_than)
+        return int(result.split()[-1])
+
+
+class WebhookInboxRepository:
+    def __init__(self, db_client: DatabaseClient, logger: Logger) -> None:
+        self._db_client = db_client
+        self._logger = logger
+
+    async def append(self, webhook_id: UUID, event_uuid: UUID | None, payload: dict) -> None:
+        sql = """
+            WITH appended AS (
+                INSERT INTO webhook_inbox (webhook_id, event_uuid, payload, received_at)
+                VALUES ($1, $2, $3, NOW())
+                RETURNING id
+            )
+            SELECT pg_notify($4, id::text) FROM appended
+        """
+        await self._db_client.execute(sql, webhook_id, event_uuid, json.dumps(payload), WEBHOOK_INBOX_CHANNEL)
+
+    async def claim_batch(self, limit: int, max_attempts: int, claim_seconds: float) -> list[WebhookInboxEntry]:
+        """
+        Oldest entries that are due and have attempts left, hidden from other dispatchers for claim_seconds.
+
+        Each entry is then either deleted once dispatched or released with fail().
+        """
+        sql = """
+            UPDATE webhook_inbox
+            SET available_at = NOW() + make_interval(secs => $3)
+            WHERE id IN (
+                SELECT id FROM webhook_inbox
+                WHERE available_at <= NOW() AND attempts < $2
+                ORDER BY id ASC
+                LIMIT $1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, webhook_id, event_uuid, payload, received_at, attempts, last_error
+        """
+        rows = await self._db_client.fetch_many(sql, limit, max_attempts, claim_seconds)
+        return sorted((self._row_to_entry(row) for row in rows), key=lambda entry: entry.id)
+
+    async def delete(self, entry_id: int) -> None:
+        await self._db_client.execute("DELETE FROM webhook_inbox WHERE id = $1", entry_id)
+
+    async def fail(self, entry_id: int, error: str, retry_delay: float) -> None:
+        sql = """
+            UPDATE webhook_inbox
+            SET attempts = attempts + 1,
+                last_error = $2,
+                available_at = NOW() + make_interval(secs => $3)
+            WHERE id = $1
+        """
+        await self._db_client.execute(sql, entry_id, error, retry_delay)
+
+    async def purge_exhausted(self, max_attempts: int, older_than: float) -> int:
+        # Entries the dispatcher gave up on, kept for older_than seconds to inspect last_error
+        sql = """
+            DELETE FROM webhook_inbox
+            WHERE attempts >= $1
+              AND received_at < NOW() - make_interval(secs => $2)
+        """
+        result = await self._db_client.execute(sql, max_attempts, older_than)
+        return int(result.split()[-1])
+
+    def _row_to_entry(self, row: Record) -> WebhookInboxEntry:
+        payload = json.loads(row["payload"]) if isinstance(row["payload"], str) else row["payload"]
+        return WebhookInboxEntry(
+            id=row["id"],
+            webhook_id=row["webhook_id"],
+            event_uuid=row["event_uuid"],
+            payload=payload,
+            received_at=row["received_at"],
+            attempts=row["attempts"],
+            last_error=row["last_error"],
+        )
+
+    async def listen(
+        self,
+        callback: Callable[[str], None],
+        on_terminate: Callable[[], None] | None = None,
+    ) -> Connection:
+        return await self._db_client.listen(WEBHOOK_INBOX_CHANNEL, callback, on_terminate)
+
+    async def unlisten(self, conn: Connection) -> None:
+        await self._db_client.unlisten(conn)
@@ -0,0 +1,16 @@
+-- +goose Up
+ALTER TABLE jobs
+    ADD COLUMN claimed_by VARCHAR(255) NULL,
+    ADD COLUMN lease_expires_at TIMESTAMP NULL,
+    ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0;
+
+-- For finding running jobs whose worker stopped renewing the lease
+CREATE INDEX idx_jobs_lease_expires_at ON jobs(lease_expires_at) WHERE ended_at IS NULL;
+
+-- +goose Down
+DROP INDEX IF EXISTS idx_jobs_lease_expires_at;
+
+ALTER TABLE jobs
+    DROP COLUMN IF EXISTS claimed_by,
+    DROP COLUMN IF EXISTS lease_expires_at,
+    DROP COLUMN IF EXISTS attempts;
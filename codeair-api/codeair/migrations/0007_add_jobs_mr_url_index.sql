@@ -0,0 +1,6 @@
+-- +goose Up
+-- For finding pending jobs of the same MR to run them together
+CREATE INDEX idx_jobs_pending_mr_url ON jobs((payload->>'mr_url')) WHERE started_at IS NULL;
+
+-- +goose Down
+DROP INDEX IF EXISTS idx_jobs_pending_mr_url;
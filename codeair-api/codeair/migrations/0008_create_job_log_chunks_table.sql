@@ -0,0 +1,15 @@
+-- +goose Up
+-- Output of running jobs, written while they run and removed once the final job log is saved
+CREATE TABLE IF NOT EXISTS job_log_chunks (
+    job_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    stream VARCHAR(16) NOT NULL,
+    data TEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+
+    PRIMARY KEY (job_id, seq),
+    FOREIGN KEY (job_id) REFERENCES jobs(id) ON DELETE CASCADE
+);
+
+-- +goose Down
+DROP TABLE IF EXISTS job_log_chunks;
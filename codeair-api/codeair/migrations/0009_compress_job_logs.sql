@@ -0,0 +1,23 @@
+-- +goose Up
+-- zstd dictionaries trained on job output, rows keep the id of the one they were compressed with
+CREATE TABLE IF NOT EXISTS job_log_dictionaries (
+    id SERIAL PRIMARY KEY,
+    data BYTEA NOT NULL,
+    created_at TIMESTAMP NOT NULL
+);
+
+-- Compressed bodies; stdout/stderr stay for rows written before, until converted with
+-- `python -m codeair.compress_job_logs` (zstd can't be done in SQL)
+ALTER TABLE job_logs
+    ADD COLUMN stdout_zst BYTEA NULL,
+    ADD COLUMN stderr_zst BYTEA NULL,
+    ADD COLUMN dictionary_id INTEGER NULL REFERENCES job_log_dictionaries(id);
+
+-- +goose Down
+-- Compressed bodies can't be restored in SQL, they are dropped
+ALTER TABLE job_logs
+    DROP COLUMN IF EXISTS stdout_zst,
+    DROP COLUMN IF EXISTS stderr_zst,
+    DROP COLUMN IF EXISTS dictionary_id;
+
+DROP TABLE IF EXISTS job_log_dictionaries;
@@ -0,0 +1,22 @@
+-- +goose Up
+-- Enough to list job logs without reading (and decompressing) the bodies
+ALTER TABLE job_logs
+    ADD COLUMN stdout_preview TEXT NULL,
+    ADD COLUMN stderr_preview TEXT NULL,
+    ADD COLUMN stdout_bytes INTEGER NULL,
+    ADD COLUMN stderr_bytes INTEGER NULL;
+
+-- Rows still stored as text; compressed ones are filled in by `python -m codeair.compress_job_logs`
+UPDATE job_logs
+SET stdout_preview = right(stdout, 200),
+    stderr_preview = right(stderr, 200),
+    stdout_bytes = octet_length(stdout),
+    stderr_bytes = octet_length(stderr)
+WHERE stdout_zst IS NULL AND stderr_zst IS NULL;
+
+-- +goose Down
+ALTER TABLE job_logs
+    DROP COLUMN IF EXISTS stdout_preview,
+    DROP COLUMN IF EXISTS stderr_preview,
+    DROP COLUMN IF EXISTS stdout_bytes,
+    DROP COLUMN IF EXISTS stderr_bytes;
@@ -0,0 +1,170 @@
+-- +goose Up
+-- jobs and job_logs become partitioned by month of the job's created_at, so finished history
+-- can be dropped a partition at a time and claims only touch the newest partitions.
+-- Partitioned tables can't be referenced by foreign keys without the partition key, so
+-- job_logs and job_log_chunks no longer reference jobs.
+
+-- +goose StatementBegin
+CREATE OR REPLACE FUNCTION codeair_create_job_partitions(from_month DATE, to_month DATE) RETURNS VOID AS $$
+DECLARE
+    month DATE := date_trunc('month', from_month);
+    suffix TEXT;
+BEGIN
+    -- Every worker runs this periodically
+    PERFORM pg_advisory_xact_lock(hashtext('codeair_create_job_partitions'));
+    WHILE month <= to_month LOOP
+        suffix := to_char(month, 'YYYY_MM');
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF jobs FOR VALUES FROM (%L) TO (%L)',
+            'jobs_' || suffix, month, month + INTERVAL '1 month'
+        );
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF job_logs FOR VALUES FROM (%L) TO (%L)',
+            'job_logs_' || suffix, month, month + INTERVAL '1 month'
+        );
+        month := month + INTERVAL '1 month';
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+-- +goose StatementEnd
+
+ALTER TABLE job_log_chunks DROP CONSTRAINT IF EXISTS job_log_chunks_job_id_fkey;
+
+ALTER TABLE job_logs RENAME TO job_logs_unpartitioned;
+ALTER TABLE jobs RENAME TO jobs_unpartitioned;
+ALTER INDEX job_logs_pkey RENAME TO job_logs_unpartitioned_pkey;
+ALTER INDEX jobs_pkey RENAME TO jobs_unpartitioned_pkey;
+ALTER SEQUENCE jobs_id_seq OWNED BY NONE;
+
+CREATE TABLE jobs (
+    id INTEGER NOT NULL DEFAULT nextval('jobs_id_seq'),
+    agent_id UUID NOT NULL,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    started_at TIMESTAMP NULL,
+    ended_at TIMESTAMP NULL,
+    claimed_by VARCHAR(255) NULL,
+    lease_expires_at TIMESTAMP NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (id, created_at),
+    FOREIGN KEY (agent_id) REFERENCES agents(id) ON DELETE CASCADE
+) PARTITION BY RANGE (created_at);
+
+-- job_created_at is the partition key, it keeps a job's log in the same month as the job
+CREATE TABLE job_logs (
+    job_id INTEGER NOT NULL,
+    job_created_at TIMESTAMP NOT NULL,
+    exit_code INTEGER NOT NULL,
+    stdout TEXT NULL,
+    stderr TEXT NULL,
+    stdout_zst BYTEA NULL,
+    stderr_zst BYTEA NULL,
+    dictionary_id INTEGER NULL REFERENCES job_log_dictionaries(id),
+    stdout_preview TEXT NULL,
+    stderr_preview TEXT NULL,
+    stdout_bytes INTEGER NULL,
+    stderr_bytes INTEGER NULL,
+    elapsed_ms INTEGER NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+
+    PRIMARY KEY (job_id, job_created_at)
+) PARTITION BY RANGE (job_created_at);
+
+SELECT codeair_create_job_partitions(
+    COALESCE((SELECT MIN(created_at) FROM jobs_unpartitioned), NOW())::date,
+    (NOW() + INTERVAL '3 months')::date
+);
+
+INSERT INTO jobs (id, agent_id, payload, created_at, started_at, ended_at, claimed_by, lease_expires_at, attempts)
+SELECT id, agent_id, payload, created_at, started_at, ended_at, claimed_by, lease_expires_at, attempts
+FROM jobs_unpartitioned;
+
+INSERT INTO job_logs (job_id, job_created_at, exit_code, stdout, stderr, stdout_zst, stderr_zst, dictionary_id,
+                      stdout_preview, stderr_preview, stdout_bytes, stderr_bytes, elapsed_ms, created_at)
+SELECT jl.job_id, j.created_at, jl.exit_code, jl.stdout, jl.stderr, jl.stdout_zst, jl.stderr_zst, jl.dictionary_id,
+       jl.stdout_preview, jl.stderr_preview, jl.stdout_bytes, jl.stderr_bytes, jl.elapsed_ms, jl.created_at
+FROM job_logs_unpartitioned jl
+JOIN jobs_unpartitioned j ON j.id = jl.job_id;
+
+DROP TABLE job_logs_unpartitioned;
+DROP TABLE jobs_unpartitioned;
+ALTER SEQUENCE jobs_id_seq OWNED BY jobs.id;
+
+-- Same indexes as before, created on every partition
+CREATE INDEX idx_jobs_agent_id_created_at ON jobs(agent_id, created_at DESC);
+CREATE INDEX idx_jobs_pending_created_at ON jobs(created_at ASC) WHERE started_at IS NULL;
+CREATE INDEX idx_jobs_lease_expires_at ON jobs(lease_expires_at) WHERE ended_at IS NULL;
+CREATE INDEX idx_jobs_pending_mr_url ON jobs((payload->>'mr_url')) WHERE started_at IS NULL;
+CREATE INDEX idx_job_logs_created_at ON job_logs(created_at DESC);
+
+-- +goose Down
+ALTER TABLE job_logs RENAME TO job_logs_partitioned;
+ALTER TABLE jobs RENAME TO jobs_partitioned;
+ALTER INDEX job_logs_pkey RENAME TO job_logs_partitioned_pkey;
+ALTER INDEX jobs_pkey RENAME TO jobs_partitioned_pkey;
+ALTER SEQUENCE jobs_id_seq OWNED BY NONE;
+
+ALTER INDEX idx_jobs_agent_id_created_at RENAME TO idx_jobs_partitioned_agent_id_created_at;
+ALTER INDEX idx_jobs_pending_created_at RENAME TO idx_jobs_partitioned_pending_created_at;
+ALTER INDEX idx_jobs_lease_expires_at RENAME TO idx_jobs_partitioned_lease_expires_at;
+ALTER INDEX idx_jobs_pending_mr_url RENAME TO idx_jobs_partitioned_pending_mr_url;
+ALTER INDEX idx_job_logs_created_at RENAME TO idx_job_logs_partitioned_created_at;
+
+CREATE TABLE jobs (
+    id INTEGER PRIMARY KEY DEFAULT nextval('jobs_id_seq'),
+    agent_id UUID NOT NULL,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    started_at TIMESTAMP NULL,
+    ended_at TIMESTAMP NULL,
+    claimed_by VARCHAR(255) NULL,
+    lease_expires_at TIMESTAMP NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+
+    FOREIGN KEY (agent_id) REFERENCES agents(id) ON DELETE CASCADE
+);
+
+CREATE TABLE job_logs (
+    job_id INTEGER PRIMARY KEY,
+    exit_code INTEGER NOT NULL,
+    stdout TEXT NULL,
+    stderr TEXT NULL,
+    elapsed_ms INTEGER NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    stdout_zst BYTEA NULL,
+    stderr_zst BYTEA NULL,
+    dictionary_id INTEGER NULL REFERENCES job_log_dictionaries(id),
+    stdout_preview TEXT NULL,
+    stderr_preview TEXT NULL,
+    stdout_bytes INTEGER NULL,
+    stderr_bytes INTEGER NULL,
+
+    FOREIGN KEY (job_id) REFERENCES jobs(id) ON DELETE CASCADE
+);
+
+INSERT INTO jobs (id, agent_id, payload, created_at, started_at, ended_at, claimed_by, lease_expires_at, attempts)
+SELECT id, agent_id, payload, created_at, started_at, ended_at, claimed_by, lease_expires_at, attempts
+FROM jobs_partitioned;
+
+INSERT INTO job_logs (job_id, exit_code, stdout, stderr, elapsed_ms, created_at, stdout_zst, stderr_zst,
+                      dictionary_id, stdout_preview, stderr_preview, stdout_bytes, stderr_bytes)
+SELECT job_id, exit_code, stdout, stderr, elapsed_ms, created_at, stdout_zst, stderr_zst,
+       dictionary_id, stdout_preview, stderr_preview, stdout_bytes, stderr_bytes
+FROM job_logs_partitioned;
+
+DROP TABLE job_logs_partitioned;
+DROP TABLE jobs_partitioned;
+ALTER SEQUENCE jobs_id_seq OWNED BY jobs.id;
+
+DELETE FROM job_log_chunks WHERE job_id NOT IN (SELECT id FROM jobs);
+ALTER TABLE job_log_chunks
+    ADD CONSTRAINT job_log_chunks_job_id_fkey FOREIGN KEY (job_id) REFERENCES jobs(id) ON DELETE CASCADE;
+
+CREATE INDEX idx_jobs_agent_id_created_at ON jobs(agent_id, created_at DESC);
+CREATE INDEX idx_jobs_pending_created_at ON jobs(created_at ASC) WHERE started_at IS NULL;
+CREATE INDEX idx_jobs_lease_expires_at ON jobs(lease_expires_at) WHERE ended_at IS NULL;
+CREATE INDEX idx_jobs_pending_mr_url ON jobs((payload->>'mr_url')) WHERE started_at IS NULL;
+CREATE INDEX idx_job_logs_created_at ON job_logs(created_at DESC);
+
+DROP FUNCTION IF EXISTS codeair_create_job_partitions(DATE, DATE);
@@ -0,0 +1,57 @@
+-- +goose Up
+-- Pending and running jobs. Rows leave when the job ends and are written to jobs (history) once,
+-- so claims and lease updates only churn this small table.
+CREATE TABLE IF NOT EXISTS job_queue (
+    id INTEGER PRIMARY KEY DEFAULT nextval('jobs_id_seq'),
+    agent_id UUID NOT NULL,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    started_at TIMESTAMP NULL,
+    claimed_by VARCHAR(255) NULL,
+    lease_expires_at TIMESTAMP NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+
+    FOREIGN KEY (agent_id) REFERENCES agents(id) ON DELETE CASCADE
+);
+
+CREATE INDEX idx_job_queue_pending_created_at ON job_queue(created_at ASC) WHERE started_at IS NULL;
+CREATE INDEX idx_job_queue_pending_mr_url ON job_queue((payload->>'mr_url')) WHERE started_at IS NULL;
+CREATE INDEX idx_job_queue_lease_expires_at ON job_queue(lease_expires_at);
+CREATE INDEX idx_job_queue_agent_id_created_at ON job_queue(agent_id, created_at DESC);
+
+WITH unfinished AS (
+    DELETE FROM jobs
+    WHERE ended_at IS NULL
+    RETURNING id, agent_id, payload, created_at, started_at, claimed_by, lease_expires_at, attempts
+)
+INSERT INTO job_queue (id, agent_id, payload, created_at, started_at, claimed_by, lease_expires_at, attempts)
+SELECT id, agent_id, payload, created_at, started_at, claimed_by, lease_expires_at, attempts
+FROM unfinished;
+
+-- jobs now only holds finished jobs
+DROP INDEX IF EXISTS idx_jobs_pending_created_at;
+DROP INDEX IF EXISTS idx_jobs_pending_mr_url;
+DROP INDEX IF EXISTS idx_jobs_lease_expires_at;
+
+-- Every job, queued or finished, for reads that don't care where it is
+CREATE VIEW all_jobs AS
+SELECT id, agent_id, payload, created_at, started_at, NULL::timestamp AS ended_at,
+       claimed_by, lease_expires_at, attempts
+FROM job_queue
+UNION ALL
+SELECT id, agent_id, payload, created_at, started_at, ended_at,
+       claimed_by, lease_expires_at, attempts
+FROM jobs;
+
+-- +goose Down
+DROP VIEW IF EXISTS all_jobs;
+
+INSERT INTO jobs (id, agent_id, payload, created_at, started_at, ended_at, claimed_by, lease_expires_at, attempts)
+SELECT id, agent_id, payload, created_at, started_at, NULL, claimed_by, lease_expires_at, attempts
+FROM job_queue;
+
+CREATE INDEX idx_jobs_pending_created_at ON jobs(created_at ASC) WHERE started_at IS NULL;
+CREATE INDEX idx_jobs_lease_expires_at ON jobs(lease_expires_at) WHERE ended_at IS NULL;
+CREATE INDEX idx_jobs_pending_mr_url ON jobs((payload->>'mr_url')) WHERE started_at IS NULL;
+
+DROP TABLE IF EXISTS job_queue;
@@ -0,0 +1,11 @@
+-- +goose Up
+-- Fingerprint of the encrypted token (sha256 hex), shown in place of the token and compared on update
+ALTER TABLE agents ADD COLUMN token_hash VARCHAR(64) NULL;
+
+UPDATE agents
+SET token_hash = encode(sha256(convert_to(config->>'token', 'UTF8')), 'hex');
+
+ALTER TABLE agents ALTER COLUMN token_hash SET NOT NULL;
+
+-- +goose Down
+ALTER TABLE agents DROP COLUMN IF EXISTS token_hash;
@@ -0,0 +1,25 @@
+-- +goose Up
+-- Duplicates (same agent, MR and head SHA) end up in history as cancelled. A running job is kept over
+-- pending ones, otherwise the oldest; a duplicate that was already running keeps its started_at
+WITH ranked AS (
+    SELECT id, row_number() OVER (
+        PARTITION BY agent_id, payload->>'mr_url', payload->>'head_sha'
+        ORDER BY started_at IS NULL, id
+    ) AS rank
+    FROM job_queue
+    WHERE payload->>'head_sha' IS NOT NULL
+), duplicates AS (
+    DELETE FROM job_queue
+    WHERE id IN (SELECT id FROM ranked WHERE rank > 1)
+    RETURNING id, agent_id, payload, created_at, started_at, attempts
+)
+INSERT INTO jobs (id, agent_id, payload, created_at, started_at, ended_at, claimed_by, lease_expires_at, attempts)
+SELECT id, agent_id, payload, created_at, started_at, NOW(), NULL, NULL, attempts
+FROM duplicates;
+
+-- One queued job per agent and MR revision; jobs without a head SHA (NULL) are never duplicates
+CREATE UNIQUE INDEX uq_job_queue_agent_mr_head_sha
+    ON job_queue(agent_id, (payload->>'mr_url'), (payload->>'head_sha'));
+
+-- +goose Down
+DROP INDEX IF EXISTS uq_job_queue_agent_mr_head_sha;
@@ -0,0 +1,12 @@
+-- +goose Up
+-- X-Gitlab-Event-UUID of received webhook deliveries, so retried ones are ignored; purged by the worker
+CREATE TABLE IF NOT EXISTS webhook_deliveries (
+    event_uuid UUID PRIMARY KEY,
+    webhook_id UUID NOT NULL,
+    received_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX idx_webhook_deliveries_received_at ON webhook_deliveries(received_at);
+
+-- +goose Down
+DROP TABLE IF EXISTS webhook_deliveries;
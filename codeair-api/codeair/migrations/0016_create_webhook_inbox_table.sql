@@ -0,0 +1,12 @@
+-- +goose Up
+-- Merge request events accepted in async ingestion mode, until the dispatcher turns them into jobs
+CREATE TABLE IF NOT EXISTS webhook_inbox (
+    id BIGSERIAL PRIMARY KEY,
+    webhook_id UUID NOT NULL,
+    event_uuid UUID NULL,
+    payload JSONB NOT NULL,
+    received_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- +goose Down
+DROP TABLE IF EXISTS webhook_inbox;
@@ -0,0 +1,18 @@
+-- +goose Up
+-- Inbox entries are claimed and retried one at a time. available_at is when an entry can be
+-- taken next: after a dispatcher's claim runs out, or after the backoff of a failed attempt.
+-- Entries that used up their attempts stay in the inbox with last_error for inspection.
+ALTER TABLE webhook_inbox
+    ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN last_error TEXT NULL,
+    ADD COLUMN available_at TIMESTAMP NOT NULL DEFAULT NOW();
+
+CREATE INDEX idx_webhook_inbox_available_at ON webhook_inbox(available_at);
+
+-- +goose Down
+DROP INDEX IF EXISTS idx_webhook_inbox_available_at;
+
+ALTER TABLE webhook_inbox
+    DROP COLUMN IF EXISTS available_at,
+    DROP COLUMN IF EXISTS last_error,
+    DROP COLUMN IF EXISTS attempts;
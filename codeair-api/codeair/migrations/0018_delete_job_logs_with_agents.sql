@@ -0,0 +1,35 @@
+-- +goose Up
+-- job_logs and job_log_chunks can't reference jobs: logs are written while the job is still in
+-- job_queue, and chunks only exist while it runs. Remove them along with the agent's jobs instead,
+-- this also covers agents deleted by a cascade from projects.
+
+-- +goose StatementBegin
+CREATE OR REPLACE FUNCTION codeair_delete_agent_job_logs() RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM job_logs jl
+    USING all_jobs j
+    WHERE j.agent_id = OLD.id AND jl.job_id = j.id AND jl.job_created_at = j.created_at;
+
+    DELETE FROM job_log_chunks c
+    USING all_jobs j
+    WHERE j.agent_id = OLD.id AND c.job_id = j.id;
+
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+-- +goose StatementEnd
+
+CREATE TRIGGER trg_agents_delete_job_logs
+    BEFORE DELETE ON agents
+    FOR EACH ROW EXECUTE FUNCTION codeair_delete_agent_job_logs();
+
+-- Logs already orphaned by agents deleted since 0011
+DELETE FROM job_logs jl
+WHERE NOT EXISTS (SELECT 1 FROM all_jobs j WHERE j.id = jl.job_id AND j.created_at = jl.job_created_at);
+
+DELETE FROM job_log_chunks c
+WHERE NOT EXISTS (SELECT 1 FROM all_jobs j WHERE j.id = c.job_id);
+
+-- +goose Down
+DROP TRIGGER IF EXISTS trg_agents_delete_job_logs ON agents;
+DROP FUNCTION IF EXISTS codeair_delete_agent_job_logs();
@@ -0,0 +1,30 @@
+-- +goose Up
+-- NULLs are distinct in a unique index, so jobs without a head SHA were never deduplicated.
+-- Those duplicates go to history as cancelled first, same rules as 0014
+WITH ranked AS (
+    SELECT id, row_number() OVER (
+        PARTITION BY agent_id, payload->>'mr_url'
+        ORDER BY started_at IS NULL, id
+    ) AS rank
+    FROM job_queue
+    WHERE payload->>'head_sha' IS NULL
+), duplicates AS (
+    DELETE FROM job_queue
+    WHERE id IN (SELECT id FROM ranked WHERE rank > 1)
+    RETURNING id, agent_id, payload, created_at, started_at, attempts
+)
+INSERT INTO jobs (id, agent_id, payload, created_at, started_at, ended_at, claimed_by, lease_expires_at, attempts)
+SELECT id, agent_id, payload, created_at, started_at, NOW(), NULL, NULL, attempts
+FROM duplicates;
+
+DROP INDEX IF EXISTS uq_job_queue_agent_mr_head_sha;
+
+-- One queued job per agent and MR revision; a missing head SHA counts as its own revision
+CREATE UNIQUE INDEX uq_job_queue_agent_mr_revision
+    ON job_queue(agent_id, (payload->>'mr_url'), (COALESCE(payload->>'head_sha', '')));
+
+-- +goose Down
+DROP INDEX IF EXISTS uq_job_queue_agent_mr_revision;
+
+CREATE UNIQUE INDEX uq_job_queue_agent_mr_head_sha
+    ON job_queue(agent_id, (payload->>'mr_url'), (payload->>'head_sha'));
@@ -1,6 +1,9 @@
+import asyncio
 from logging import Logger
 from uuid import UUID
 
+from codeair.cache import MISSING, TTLCache
+from codeair.clients.database import Connection
 from codeair.domain.agents import Agent, AgentProvider, AgentRepository, AgentType
 from codeair.domain.errors import EntityNotFoundError, ValidationError
 from codeair.services.token_encryption import TokenEncryption
@@ -16,7 +19,9 @@ class AgentService:
         logger: Logger,
         default_provider: str = "",
         default_model: str = "",
-        default_token: str = ""
+        default_token: str = "",
+        agent_cache: TTLCache[UUID, Agent] | None = None,
+        reconnect_delay: float = 5.0,
     ):
         self._agent_repository = agent_repository
         self._token_encryption = token_encryption
@@ -24,6 +29,14 @@ class AgentService:
         self._default_provider = default_provider
         self._default_model = default_model
         self._default_token = default_token
+        # Agents with decrypted tokens, only used while changes are being listened for
+        self._agent_cache = agent_cache
+        # Bumped by every invalidation, a fill that started before one is not cached
+        self._cache_generation = 0
+        self._reconnect_delay = reconnect_delay
+        self._listener: Connection | None = None
+        self._listener_task: asyncio.Task | None = None
+        self._listening = False
 
     async def create_agent(self, project_id: int, agent: Agent, user_id: int) -> Agent:
         if not agent.name:
@@ -54,28 +67,96 @@ class AgentService:
             agent.config.token = self._default_token
 
         agent.config.token = self._token_encryption.encrypt(agent.config.token)
-        saved_agent = await self._agent_repository.save(project_id, agent, user_id)
-        return self._hash_agent_token(saved_agent)
+        return await self._save_agent(project_id, agent, user_id)
 
     async def list_agents(self, project_id: int) -> list[Agent]:
-        agents = await self._agent_repository.find_by_project_id(project_id)
-        return [self._hash_agent_token(agent) for agent in agents]
+        return await self._agent_repository.find_by_project_id(project_id)
 
     async def get_agent(self, agent_id: UUID) -> Agent:
         agent: Agent | None = await self._agent_repository.find_by_id(agent_id)
         if agent is None:
             raise EntityNotFoundError("Agent not found")
-        return self._hash_agent_token(agent)
+        return agent
 
     async def get_agent_with_raw_token(self, agent_id: UUID) -> Agent:
-        agent: Agent | None = await self._agent_repository.find_by_id(agent_id)
+        cache = self._agent_cache if self._listener is not None else None
+        if cache is not None:
+            cached = cache.get(agent_id)
+            if cached is not MISSING:
+                return cached.model_copy(deep=True)
+
+        generation = self._cache_generation
+        agent: Agent | None = await self._agent_repository.find_by_id_with_encrypted_token(agent_id)
         if agent is None:
             raise EntityNotFoundError("Agent not found")
 
         # Decrypt the token
         agent.config.token = self._token_encryption.decrypt(agent.config.token)
+        # A save notified while the row was being read may have made it stale
+        if cache is not None and self._listener is not None and generation == self._cache_generation:
+            cache.set(agent_id, agent.model_copy(deep=True))
         return agent
 
+    def start_cache_invalidation(self) -> None:
+        """Listens for saved agents in the background, the agent cache is bypassed until connected."""
+        if self._agent_cache is None:
+            return
+        self._listening = True
+        self._listener_task = asyncio.create_task(self._listen())
+
+    async def stop_cache_invalidation(self) -> None:
+        self._listening = False
+        if self._listener_task and not self._listener_task.done():
+            self._listener_task.cancel()
+        if self._listener:
+            listener, self._listener = self._listener, None
+            await self._agent_repository.unlisten(listener)
+        self._invalidate()
+
+    def _invalidate(self, agent_id: UUID | None = None) -> None:
+        """Drops one cached agent, or all of them."""
+        self._cache_generation += 1
+        if self._agent_cache is None:
+            return
+        if agent_id is None:
+            self._agent_cache.clear()
+        else:
+            self._agent_cache.delete(agent_id)
+
+    def _on_agent_saved(self, payload: str) -> None:
+        try:
+            agent_id = UUID(payload)
+        except ValueError:
+            self._logger.warning(f"Malformed agent notification: {payload!r}")
+            self._invalidate()
+            return
+        self._invalidate(agent_id)
+
+    def _on_listener_terminated(self) -> None:
+        if self._listener is None:
+            return  # closed on purpose
+        self._logger.warning("Agent listener connection lost, reconnecting")
+        self._listener = None
+        # Saves made until we listen again would go unnoticed
+        self._invalidate()
+        if self._listening:
+            self._listener_task = asyncio.create_task(self._listen(retry_delay=self._reconnect_delay))
+
+    async def _listen(self, retry_delay: float = 0.0) -> None:
+        while self._listening and self._listener is None:
+            if retry_delay:
+                await asyncio.sleep(retry_delay)
+            try:
+                self._invalidate()
+                self._listener = await self._agent_repository.listen(
+                    self._on_agent_saved,
+                    self._on_listener_terminated,
+                )
+                self._logger.info("Listening for agent changes")
+            except Exception as e:
+                self._logger.error(f"Failed to listen for agent changes: {e}")
+                retry_delay = self._reconnect_delay
+
     async def update_agent(self, project_id: int, agent_id: UUID, agent: Agent, user_id: int) -> Agent:
         existing_agent: Agent | None = await self._agent_repository.find_by_id(agent_id)
 
@@ -84,14 +165,18 @@ class AgentService:
 
         agent.id = existing_agent.id  # Ensure the ID remains the same
 
-        if agent.config.token == self._token_encryption.hash_token(existing_agent.config.token):
+        # The token comes back as its hash when it wasn't changed
+        if agent.config.token == existing_agent.config.token:
+            existing_agent = await self._agent_repository.find_by_id_with_encrypted_token(agent_id)
+            if existing_agent is None:
+                raise EntityNotFoundError("Agent not found")
             agent.config.token = existing_agent.config.token
         else:
             agent.config.token = self._token_encryption.encrypt(agent.config.token)
 
-        saved_agent = await self._agent_repository.save(project_id, agent, user_id)
-        return self._hash_agent_token(saved_agent)
+        return await self._save_agent(project_id, agent, user_id)
 
-    def _hash_agent_token(self, agent: Agent) -> Agent:
-        agent.config.token = self._token_encryption.hash_token(agent.config.token)
-        return agent
+    async def _save_agent(self, project_id: int, agent: Agent, user_id: int) -> Agent:
+        # The hash is of the encrypted token, so it changes whenever the token is re-encrypted
+        token_hash = self._token_encryption.hash_token(agent.config.token)
+        return await self._agent_repository.save(project_id, agent, user_id, token_hash)
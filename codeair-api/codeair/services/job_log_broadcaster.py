@@ -0,0 +1,89 @@
+import asyncio
+from logging import Logger
+
+from codeair.clients.database import Connection
+from codeair.domain.job_logs import JobLogRepository
+
+__all__ = ["JobLogBroadcaster"]
+
+
+class JobLogBroadcaster:
+    """
+    Fans job output notifications out to in-process subscribers.
+
+    One LISTEN connection per process, however many log streams are open. Subscribers
+    get "chunk" when new output was persisted, "end" when the job finished and "sync"
+    after the listener reconnected (notifications may have been missed meanwhile).
+    """
+
+    def __init__(self, logger: Logger, reconnect_delay: float = 5.0) -> None:
+        self._logger = logger
+        self._reconnect_delay = reconnect_delay
+        self._job_log_repository: JobLogRepository | None = None
+        self._subscribers: dict[int, set[asyncio.Queue[str]]] = {}
+        self._listener: Connection | None = None
+        self._listener_task: asyncio.Task | None = None
+        self._running = False
+
+    def start(self, job_log_repository: JobLogRepository) -> None:
+        self._job_log_repository = job_log_repository
+        self._running = True
+        self._listener_task = asyncio.create_task(self._listen())
+
+    async def close(self) -> None:
+        self._running = False
+        if self._listener_task and not self._listener_task.done():
+            self._listener_task.cancel()
+        if self._listener:
+            listener, self._listener = self._listener, None
+            await self._job_log_repository.unlisten(listener)
+
+    def subscribe(self, job_id: int) -> asyncio.Queue[str]:
+        queue: asyncio.Queue[str] = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: int, queue: asyncio.Queue[str]) -> None:
+        queues = self._subscribers.get(job_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[job_id]
+
+    def _publish(self, job_id: int, event: str) -> None:
+        for queue in self._subscribers.get(job_id, ()):
+            queue.put_nowait(event)
+
+    def _on_notification(self, payload: str) -> None:
+        job_id, _, event = payload.partition(":")
+        try:
+            self._publish(int(job_id), event)
+        except ValueError:
+            self._logger.warning(f"Malformed job log notification: {payload!r}")
+
+    def _on_listener_terminated(self) -> None:
+        if self._listener is None:
+            return  # closed on purpose
+        self._logger.warning("Job log listener connection lost, reconnecting")
+        self._listener = None
+        if self._running:
+            self._listener_task = asyncio.create_task(self._listen(retry_delay=self._reconnect_delay))
+
+    async def _listen(self, retry_delay: float = 0.0) -> None:
+        while self._running and self._listener is None:
+            if retry_delay:
+                await asyncio.sleep(retry_delay)
+            try:
+                self._listener = await self._job_log_repository.listen(
+                    self._on_notification,
+                    self._on_listener_terminated,
+                )
+                self._logger.info("Listening for job log notifications")
+            except Exception as e:
+                self._logger.error(f"Failed to listen for job log notifications: {e}")
+                retry_delay = self._reconnect_delay
+
+        # Anything may have happened while we were not listening
+        for job_id in list(self._subscribers):
+            self._publish(job_id, "sync")
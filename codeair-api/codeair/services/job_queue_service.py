@@ -1,6 +1,9 @@
+from datetime import date
 from logging import Logger
+from typing import Callable
 
-from codeair.domain.agents import AgentRepository
+from codeair.clients.database import Connection
+from codeair.domain.job_logs import JobLog, JobLogRepository
 from codeair.domain.jobs import Job
 from codeair.domain.jobs.repository import JobRepository
 
@@ -11,31 +14,87 @@ class JobQueueService:
     def __init__(
         self,
         job_repository: JobRepository,
-        agent_repository: AgentRepository,
+        job_log_repository: JobLogRepository,
         logger: Logger,
+        dedup_window: float = 3600.0,
     ):
         self._job_repository = job_repository
-        self._agent_repository = agent_repository
+        self._job_log_repository = job_log_repository
         self._logger = logger
+        self._dedup_window = dedup_window  # seconds a finished run of the same MR revision counts as a duplicate
 
     async def enqueue_jobs_for_project(self, project_id: int, payload: dict) -> list[Job]:
-        agents = await self._agent_repository.find_by_project_id(project_id)
+        mr_url, head_sha = payload.get("mr_url"), payload.get("head_sha")
+        if mr_url and head_sha:
+            for job in await self._job_repository.cancel_superseded_jobs(mr_url, head_sha):
+                self._logger.info(f"Cancelled job {job.id} for {mr_url}, superseded by revision {head_sha}")
+                await self._job_log_repository.create(JobLog(
+                    job_id=job.id,
+                    exit_code=-4,  # Superseded exit code
+                    stderr=f"Cancelled before it ran: superseded by revision {head_sha}",
+                    elapsed_ms=0,
+                ))
 
-        enabled_agents = [agent for agent in agents if agent.enabled]
+        created_jobs = await self._job_repository.create_for_project(project_id, payload, self._dedup_window)
+        self._logger.debug(f"Enqueued {len(created_jobs)} job(s) for project {project_id}")
+        return created_jobs
+
+    async def listen_for_jobs(
+        self,
+        callback: Callable[[str], None],
+        on_terminate: Callable[[], None] | None = None,
+    ) -> Connection:
+        return await self._job_repository.listen(callback, on_terminate)
 
-        created_jobs = []
-        for agent in enabled_agents:
-            job = Job(
-                agent_id=agent.id,
-                payload=payload,
-            )
-            created_job = await self._job_repository.create(job)
-            created_jobs.append(created_job)
+    async def stop_listening(self, conn: Connection) -> None:
+        await self._job_repository.unlisten(conn)
 
-        return created_jobs
+    async def claim_next_job(self, worker_id: str, lease_seconds: float) -> Job | None:
+        return await self._job_repository.claim_next_job(worker_id, lease_seconds)
+
+    async def claim_jobs_for_mr(self, worker_id: str, lease_seconds: float, job: Job, engine: str) -> list[Job]:
+        mr_url = job.payload.get("mr_url")
+        if not mr_url:
+            return []
+
+        jobs = await self._job_repository.claim_jobs_for_mr(worker_id, lease_seconds, mr_url, job.agent_id, engine)
+        if jobs:
+            self._logger.debug(f"Claimed {len(jobs)} more job(s) for {mr_url} along with job {job.id}")
+        return jobs
+
+    async def extend_lease(self, job_id: int, worker_id: str, lease_seconds: float) -> bool:
+        return await self._job_repository.extend_lease(job_id, worker_id, lease_seconds)
+
+    async def complete_job(self, job_id: int, worker_id: str) -> Job | None:
+        return await self._job_repository.complete_job(job_id, worker_id)
+
+    async def reclaim_expired_jobs(self, max_attempts: int) -> tuple[list[Job], list[Job]]:
+        jobs = await self._job_repository.reclaim_expired_jobs(max_attempts)
+
+        requeued = [job for job in jobs if job.ended_at is None]
+        failed = [job for job in jobs if job.ended_at is not None]
+        for job in requeued:
+            self._logger.warning(f"Lease expired for job {job.id} (attempt {job.attempts}), returned to queue")
+        for job in failed:
+            self._logger.error(f"Lease expired for job {job.id} after {job.attempts} attempt(s), giving up")
+
+        return requeued, failed
+
+    async def maintain_partitions(self, months_ahead: int, retention_months: int) -> date | None:
+        """
+        Creates partitions for the coming months and drops those past retention.
+
+        Returns the first day of the oldest month kept, None if retention is disabled.
+        """
+        await self._job_repository.create_partitions(months_ahead)
+        if retention_months <= 0:
+            return None
 
-    async def claim_next_job(self) -> Job | None:
-        return await self._job_repository.claim_next_job()
+        today = date.today()
+        month_index = today.year * 12 + today.month - 1 - retention_months
+        cutoff = date(month_index // 12, month_index % 12 + 1, 1)
 
-    async def complete_job(self, job_id: int) -> Job | None:
-        return await self._job_repository.complete_job(job_id)
+        for table_name, partition_name in await self._job_repository.find_partitions_before(cutoff):
+            await self._job_repository.drop_partition(table_name, partition_name)
+            self._logger.info(f"Dropped partition {partition_name} of {table_name} (jobs before {cutoff})")
+        return cutoff
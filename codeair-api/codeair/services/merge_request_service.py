@@ -0,0 +1,66 @@
+import re
+import time
+from logging import Logger
+from typing import Any
+
+from codeair.cache import MRContextCache, SingleFlight
+from codeair.clients.gitlab import GitLabClient
+
+__all__ = ["MergeRequestService", "parse_mr_url"]
+
+MR_URL_PATTERN = re.compile(r"^https?://[^/]+/(?P<project>.+?)/-/merge_requests/(?P<iid>\d+)")
+
+
+def parse_mr_url(mr_url: str) -> tuple[str, int] | None:
+    """Split an MR web URL into (project path, MR IID)."""
+    match = MR_URL_PATTERN.match(mr_url)
+    if not match:
+        return None
+    return match.group("project"), int(match.group("iid"))
+
+
+class MergeRequestService:
+    def __init__(
+        self,
+        gitlab_client: GitLabClient,
+        bot_token: str,
+        logger: Logger,
+        mr_context_cache: MRContextCache,
+        mr_context_flight: SingleFlight[str, dict[str, Any]],
+    ) -> None:
+        self._gitlab_client = gitlab_client
+        self._bot_token = bot_token
+        self._logger = logger
+        self._mr_context_cache = mr_context_cache
+        self._mr_context_flight = mr_context_flight
+
+    async def get_mr_context(self, project: int | str, iid: int) -> dict[str, Any]:
+        """
+        MR metadata and diffs at its current head.
+
+        Only the MR itself is fetched each time, the diffs come from the cache
+        when this head SHA has been seen before.
+        """
+        merge_request = await self._gitlab_client.get_merge_request(project, iid, self._bot_token)
+        head_sha = merge_request["head_sha"]
+
+        key = MRContextCache.make_key(project, iid, head_sha)
+        return await self._mr_context_flight.do(key, lambda: self._load_mr_context(project, merge_request))
+
+    async def _load_mr_context(self, project: int | str, merge_request: dict[str, Any]) -> dict[str, Any]:
+        iid, head_sha = merge_request["iid"], merge_request["head_sha"]
+
+        context = await self._mr_context_cache.get(project, iid, head_sha)
+        if context is not None:
+            self._logger.debug(f"MR context cache hit for {project}!{iid} at {head_sha}")
+            return context
+
+        start_time = time.time()
+        diffs = await self._gitlab_client.get_merge_request_diffs(project, iid, self._bot_token)
+        context = {**merge_request, "diffs": diffs}
+        await self._mr_context_cache.set(project, iid, head_sha, context)
+
+        elapsed_ms = int((time.time() - start_time) * 1000)
+        self._logger.info(f"Fetched MR context for {project}!{iid} at {head_sha} "
+                          f"({len(diffs)} file(s), {elapsed_ms}ms)")
+        return context
@@ -1,24 +1,106 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
 from logging import Logger
 
+from codeair.cache import MISSING, SingleFlight, TTLCache
 from codeair.clients.gitlab import GitlabNotFoundError
 from codeair.domain.errors import EntityNotFoundError
 from codeair.domain.projects.models import Project
 from codeair.domain.projects.repository import ProjectRepository
 
-__all__ = ["ProjectService"]
+__all__ = ["ProjectService", "CachedProject"]
+
+
+@dataclass
+class CachedProject:
+    project: Project
+    etag: str | None
+    fetched_at: float = field(default_factory=time.monotonic)
+    revalidation: asyncio.Task | None = None
 
 
 class ProjectService:
-    def __init__(self, project_repository: ProjectRepository, bot_token: str, logger: Logger) -> None:
+    def __init__(
+        self,
+        project_repository: ProjectRepository,
+        bot_token: str,
+        logger: Logger,
+        project_cache: TTLCache[int, CachedProject | None],
+        search_cache: TTLCache[str, list[Project]],
+        search_flight: SingleFlight[str, list[Project]],
+        project_fresh_ttl: float = 60.0,
+    ) -> None:
         self._project_repository = project_repository
         self._bot_token = bot_token
         self._logger = logger
+        self._project_cache = project_cache
+        self._search_cache = search_cache
+        self._search_flight = search_flight
+        self._project_fresh_ttl = project_fresh_ttl
 
     async def search_projects(self, query: str) -> list[Project]:
-        return await self._project_repository.search(query, self._bot_token)
+        # GitLab search is case-insensitive, so "Foo " and "foo" share an entry
+        normalized_query = " ".join(query.split()).lower()
+
+        projects = self._search_cache.get(normalized_query)
+        if projects is not MISSING:
+            return projects
+
+        return await self._search_flight.do(normalized_query, lambda: self._search(normalized_query))
+
+    async def _search(self, query: str) -> list[Project]:
+        projects = await self._project_repository.search(query, self._bot_token)
+        self._search_cache.set(query, projects)
+        return projects
 
     async def get_project_by_id(self, project_id: int) -> Project:
+        cached = self._project_cache.get(project_id)
+
+        if cached is None:
+            raise EntityNotFoundError("Project not found")
+
+        if cached is MISSING:
+            return await self._fetch_project(project_id)
+
+        # Serve stale entries right away and revalidate them in the background
+        if time.monotonic() - cached.fetched_at > self._project_fresh_ttl and cached.revalidation is None:
+            cached.revalidation = asyncio.create_task(self._revalidate_project(project_id, cached))
+
+        return cached.project
+
+    def invalidate_project(self, project_id: int) -> None:
+        self._project_cache.delete(project_id)
+
+    async def _fetch_project(self, project_id: int) -> Project:
         try:
-            return await self._project_repository.get_by_id(project_id, self._bot_token)
+            project, etag = await self._project_repository.get_by_id_if_modified(project_id, self._bot_token)
         except GitlabNotFoundError as e:
+            self._project_cache.set(project_id, None)
             raise EntityNotFoundError("Project not found") from e
+
+        # Without an etag GitLab has nothing to answer "not modified" to, an empty reply is not cached
+        if project is None:
+            self._logger.warning(f"GitLab returned no data for project {project_id}")
+            raise EntityNotFoundError("Project not found")
+
+        self._project_cache.set(project_id, CachedProject(project=project, etag=etag))
+        return project
+
+    async def _revalidate_project(self, project_id: int, cached: CachedProject) -> None:
+        try:
+            project, etag = await self._project_repository.get_by_id_if_modified(
+                project_id, self._bot_token, cached.etag
+            )
+        except GitlabNotFoundError:
+            self._project_cache.set(project_id, None)
+            return
+        except Exception as e:
+            self._logger.warning(f"Failed to revalidate project {project_id}, keeping stale entry: {e}")
+            cached.revalidation = None
+            return
+
+        if project is None:
+            self._logger.debug(f"Project {project_id} not modified")
+            project = cached.project
+        self._project_cache.set(project_id, CachedProject(project=project, etag=etag))
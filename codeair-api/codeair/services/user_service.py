@@ -1,5 +1,6 @@
 from logging import Logger
 
+from codeair.cache import MISSING, SingleFlight, TTLCache
 from codeair.clients import GitLabClient
 from codeair.domain.users import User, UserLoginRecord, UserRepository
 
@@ -13,18 +14,34 @@ class UserService:
         gitlab_client: GitLabClient,
         bot_token: str,
         logger: Logger,
+        bot_user_cache: TTLCache[str, User],
+        bot_user_flight: SingleFlight[str, User],
     ) -> None:
         self._user_repository = user_repository
         self._gitlab_client = gitlab_client
         self._bot_token = bot_token
         self._logger = logger
+        self._bot_user_cache = bot_user_cache
+        self._bot_user_flight = bot_user_flight
 
     async def get_user_info(self, user_token: str) -> User:
         user_data = await self._gitlab_client.get_user_by_token(user_token)
         return User(**user_data)
 
-    async def get_bot_user_info(self) -> User:
-        return await self.get_user_info(self._bot_token)
+    async def get_bot_user_info(self, refresh: bool = False) -> User:
+        # The bot identity doesn't change while the process runs, only the TTL makes us look again
+        if not refresh:
+            bot_user = self._bot_user_cache.get("bot")
+            if bot_user is not MISSING:
+                return bot_user
+
+        return await self._bot_user_flight.do("bot", self._fetch_bot_user_info)
+
+    async def _fetch_bot_user_info(self) -> User:
+        bot_user = await self.get_user_info(self._bot_token)
+        self._bot_user_cache.set("bot", bot_user)
+        self._logger.debug(f"Cached bot user info: id={bot_user.id}, username={bot_user.username}")
+        return bot_user
 
     async def save_user_login(self, user_id: int) -> UserLoginRecord:
         return await self._user_repository.save_login(user_id)
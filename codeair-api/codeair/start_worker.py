@@ -1,7 +1,9 @@
 import asyncio
 import logging
+import signal
 
-from codeair.di import create_agent_worker
+from codeair.config import Config
+from codeair.di import create_agent_worker, create_webhook_dispatcher
 
 
 async def main():
@@ -13,13 +15,28 @@ async def main():
 
     print("CodeAir worker is starting up...")
 
-    worker = await create_agent_worker()
+    workers = [await create_agent_worker()]
     print("Agent worker created successfully")
 
+    # Webhook events accepted into the inbox become jobs here
+    if Config.Webhooks.ASYNC_INGESTION:
+        workers.append(await create_webhook_dispatcher())
+        print("Webhook dispatcher created successfully")
+
+    # Stop claiming new jobs on SIGTERM/SIGINT and let in-flight ones finish
+    def stop():
+        for worker in workers:
+            worker.stop()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop)
+
     try:
-        await worker.run()
+        await asyncio.gather(*(worker.run() for worker in workers))
     finally:
-        await worker.cleanup()
+        for worker in workers:
+            await worker.cleanup()
         print("Worker stopped and cleaned up")
 
 
@@ -1,18 +1,29 @@
 import asyncio
+import os
+import socket
 import time
 from logging import Logger
+from uuid import uuid4
 
 import httpx
+from codeair.clients.database import Connection
+from codeair.clients.http_pool import read_pool_stats
 from codeair.config import Config
 from codeair.domain.agents import Agent, AgentEngine, AgentType
 from codeair.domain.job_logs import JobLog, JobLogRepository
 from codeair.domain.jobs import Job
+from codeair.domain.webhooks import WebhookDeliveryRepository, WebhookInboxRepository
 from codeair.services.agent_service import AgentService
 from codeair.services.job_queue_service import JobQueueService
+from codeair.services.merge_request_service import MergeRequestService, parse_mr_url
 from codeair.workers.base_worker import BaseWorker
+from codeair.workers.job_output import JobOutput
+from codeair.workers.pr_agent_pool import PrAgentRunnerPool, PrAgentRunnerUnavailable
 
 __all__ = ["AgentWorker"]
 
+PR_AGENT_TIMEOUT = 600.0  # 10 minutes
+
 
 class AgentWorker(BaseWorker):
     def __init__(
@@ -22,24 +33,64 @@ class AgentWorker(BaseWorker):
         http_client: httpx.AsyncClient,
         job_log_repository: JobLogRepository,
         logger: Logger,
+        concurrency: int = 1,
+        poll_interval: float = 1.0,
+        notify_poll_interval: float = 30.0,
+        shutdown_timeout: float = 600.0,
+        lease_seconds: float = 60.0,
+        max_attempts: int = 3,
+        reaper_interval: float = 30.0,
+        pr_agent_pool: PrAgentRunnerPool | None = None,
+        batch_mr_jobs: bool = False,
+        merge_request_service: MergeRequestService | None = None,
+        log_max_bytes: int = 1024 * 1024,
+        log_flush_interval: float = 1.0,
+        maintenance_interval: float = 3600.0,
+        partition_months_ahead: int = 3,
+        retention_months: int = 0,
+        webhook_delivery_repository: WebhookDeliveryRepository | None = None,
+        webhook_delivery_retention: float = 86400.0,
+        webhook_inbox_repository: WebhookInboxRepository | None = None,
+        webhook_inbox_max_attempts: int = 5,
     ) -> None:
+        if concurrency < 1:
+            raise ValueError("Worker concurrency must be at least 1")
         self._job_queue_service = job_queue_service
         self._agent_service = agent_service
         self._http_client = http_client
         self._job_log_repository = job_log_repository
         self._logger = logger
         self._running = False
-        self._poll_interval = 1.0  # seconds
-
-    async def _run_mr_describer(self, job: Job, agent: Agent) -> None:
-        mr_url = job.payload.get("mr_url")
-        if not mr_url:
-            self._logger.error(f"No MR URL found in job {job.id} payload")
-            return
-
-        self._logger.info(f"Running pr_agent describe for job {job.id} on {mr_url}")
-
-        env = {
+        self._concurrency = concurrency
+        self._poll_interval = poll_interval  # seconds
+        self._notify_poll_interval = notify_poll_interval  # seconds, fallback while LISTEN is up
+        self._shutdown_timeout = shutdown_timeout  # seconds
+        self._lease_seconds = lease_seconds
+        self._max_attempts = max_attempts
+        self._reaper_interval = reaper_interval  # seconds
+        self._pr_agent_pool = pr_agent_pool
+        self._batch_mr_jobs = batch_mr_jobs  # run jobs for the same MR in one pr_agent child
+        self._merge_request_service = merge_request_service
+        self._log_max_bytes = log_max_bytes  # job output kept per stream, and streamed live per job
+        self._log_flush_interval = log_flush_interval  # seconds
+        self._maintenance_interval = maintenance_interval  # seconds
+        self._partition_months_ahead = partition_months_ahead
+        self._retention_months = retention_months  # 0 keeps all history
+        self._webhook_delivery_repository = webhook_delivery_repository
+        self._webhook_delivery_retention = webhook_delivery_retention  # seconds
+        self._webhook_inbox_repository = webhook_inbox_repository
+        self._webhook_inbox_max_attempts = webhook_inbox_max_attempts  # entries the dispatcher gave up on
+        self._worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:8]}"
+        self._stop_event = asyncio.Event()
+        self._wakeup_event = asyncio.Event()
+        self._slots: list[asyncio.Task] = []
+        self._listener: Connection | None = None
+        self._listener_task: asyncio.Task | None = None
+        self._reaper_task: asyncio.Task | None = None
+        self._maintenance_task: asyncio.Task | None = None
+
+    def _pr_agent_env(self, agent: Agent) -> dict[str, str]:
+        return {
             'CONFIG__GIT_PROVIDER': 'gitlab',
             'CONFIG__MODEL': agent.config.model,
             'GITLAB__URL': Config.GitLab.API_BASE_URL,
@@ -50,122 +101,135 @@ class AgentWorker(BaseWorker):
             # Disable third-party library warnings
             'PYTHONWARNINGS': 'ignore::UserWarning',
         }
-        if agent.config.prompt:
-            env['PR_DESCRIPTION__EXTRA_INSTRUCTIONS'] = agent.config.prompt
-
-        start_time = time.time()
-        process = await asyncio.create_subprocess_exec(
-            '/usr/local/bin/python3', '-m', 'pr_agent.cli',
-            f'--pr_url={mr_url}',
-            'describe',
-            env=env,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-
-        try:
-            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=600.0)  # 10 minutes
-            elapsed_ms = int((time.time() - start_time) * 1000)  # Convert to milliseconds
-
-            job_log = JobLog(
-                job_id=job.id,
-                exit_code=process.returncode,
-                stdout=stdout.decode().strip() if stdout else None,
-                stderr=stderr.decode().strip() if stderr else None,
-                elapsed_ms=elapsed_ms,
-            )
-            await self._job_log_repository.create(job_log)
-        except asyncio.TimeoutError:
-            elapsed_ms = int((time.time() - start_time) * 1000)
-            self._logger.error(f"pr_agent describe timed out after 10 minutes for job {job.id}")
 
-            # Try to kill the process
-            try:
-                process.kill()
-                await process.wait()
-            except Exception as e:
-                self._logger.error(f"Failed to kill process for job {job.id}: {e}")
-
-            # Save log with timeout error
-            job_log = JobLog(
-                job_id=job.id,
-                exit_code=-2,  # Timeout exit code
-                stdout=None,
-                stderr="Process timed out after 10 minutes",
-                elapsed_ms=elapsed_ms,
-            )
-            await self._job_log_repository.create(job_log)
-            raise
+    def _pr_agent_command(self, agent: Agent) -> tuple[str, dict[str, str]] | None:
+        env = self._pr_agent_env(agent)
 
-    async def _run_mr_reviewer(self, job: Job, agent: Agent) -> None:
-        mr_url = job.payload.get("mr_url")
-        if not mr_url:
-            self._logger.error(f"No MR URL found in job {job.id} payload")
-            return
+        if agent.type == AgentType.MR_DESCRIBER:
+            if agent.config.prompt:
+                env['PR_DESCRIPTION__EXTRA_INSTRUCTIONS'] = agent.config.prompt
+            return 'describe', env
 
-        self._logger.info(f"Running pr_agent improve for job {job.id} on {mr_url}")
+        if agent.type == AgentType.MR_REVIEWER:
+            if agent.config.prompt:
+                env['PR_CODE_SUGGESTIONS__EXTRA_INSTRUCTIONS'] = agent.config.prompt
 
-        env = {
-            'CONFIG__GIT_PROVIDER': 'gitlab',
-            'CONFIG__MODEL': agent.config.model,
-            'GITLAB__URL': Config.GitLab.API_BASE_URL,
-            'GITLAB__PERSONAL_ACCESS_TOKEN': Config.GitLab.BOT_TOKEN,
-            'ANTHROPIC__KEY': agent.config.token,
-            'ANTHROPIC_API_BASE': Config.AI.PROVIDER_BASE_URL,
+            env["PR_CODE_SUGGESTIONS__COMMITABLE_CODE_SUGGESTIONS"] = "true"
+            env["PR_CODE_SUGGESTIONS__SUGGESTIONS_SCORE_THRESHOLD"] = "4"
+            env["PR_CODE_SUGGESTIONS__NUM_CODE_SUGGESTIONS_PER_CHUNK"] = "5"
+            return 'improve', env
 
-            # Disable third-party library warnings
-            'PYTHONWARNINGS': 'ignore::UserWarning',
-        }
-        if agent.config.prompt:
-            env['PR_CODE_SUGGESTIONS__EXTRA_INSTRUCTIONS'] = agent.config.prompt
+        return None
 
-        env["PR_CODE_SUGGESTIONS__COMMITABLE_CODE_SUGGESTIONS"] = "true"
-        env["PR_CODE_SUGGESTIONS__SUGGESTIONS_SCORE_THRESHOLD"] = "4"
-        env["PR_CODE_SUGGESTIONS__NUM_CODE_SUGGESTIONS_PER_CHUNK"] = "5"
+    async def _exec_pr_agent(
+        self,
+        commands: list[tuple[list[str], dict[str, str]]],
+        outputs: list[JobOutput],
+    ) -> list[tuple[int | None, int | None]]:
+        if self._pr_agent_pool:
+            try:
+                return await self._pr_agent_pool.run_batch(
+                    commands,
+                    timeout=PR_AGENT_TIMEOUT * len(commands),
+                    on_output=lambda index, stream, data: outputs[index].write(stream, data),
+                )
+            except PrAgentRunnerUnavailable as e:
+                self._logger.warning(f"{e}, falling back to a fresh pr_agent process")
+
+        results = []
+        for (args, env), output in zip(commands, outputs):
+            start_time = time.time()
+            process = await asyncio.create_subprocess_exec(
+                Config.Worker.PR_AGENT_PYTHON, '-m', 'pr_agent.cli', *args,
+                env=env,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                await asyncio.wait_for(asyncio.gather(
+                    output.pump("stdout", process.stdout),
+                    output.pump("stderr", process.stderr),
+                    process.wait(),
+                ), timeout=PR_AGENT_TIMEOUT)
+                results.append((process.returncode, int((time.time() - start_time) * 1000)))
+            except asyncio.TimeoutError:
+                try:
+                    process.kill()
+                    await process.wait()
+                except Exception as e:
+                    self._logger.error(f"Failed to kill pr_agent process: {e}")
+                results.append((None, int((time.time() - start_time) * 1000)))
+        return results
+
+    async def _run_pr_agent(self, runs: list[tuple[Job, str, dict[str, str]]]) -> None:
+        commands = []
+        outputs = []
+        for job, command, env in runs:
+            self._logger.info(f"Running pr_agent {command} for job {job.id} on {job.payload['mr_url']}")
+            commands.append(([f'--pr_url={job.payload["mr_url"]}', command], env))
+            outputs.append(JobOutput(
+                job.id,
+                self._job_log_repository,
+                self._logger,
+                max_bytes=self._log_max_bytes,
+                flush_interval=self._log_flush_interval,
+            ))
 
         start_time = time.time()
-        process = await asyncio.create_subprocess_exec(
-            '/usr/local/bin/python3', '-m', 'pr_agent.cli',
-            f'--pr_url={mr_url}',
-            'improve',
-            env=env,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-
+        for output in outputs:
+            output.start()
         try:
-            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=600.0)  # 10 minutes
-            elapsed_ms = int((time.time() - start_time) * 1000)  # Convert to milliseconds
+            results = await self._exec_pr_agent(commands, outputs)
+        finally:
+            for output in outputs:
+                await output.close()
+
+        # Jobs run one after the other, the one cut off by the timeout gets the time not accounted for
+        unaccounted_ms = int((time.time() - start_time) * 1000)
+        unaccounted_ms -= sum(elapsed_ms for _, elapsed_ms in results if elapsed_ms is not None)
+
+        timed_out = []
+        for (job, command, _), (exit_code, elapsed_ms), output in zip(runs, results, outputs):
+            if elapsed_ms is None:
+                elapsed_ms, unaccounted_ms = max(unaccounted_ms, 0), 0
+            stdout, stderr = output.getvalue("stdout"), output.getvalue("stderr")
+            if exit_code is None:
+                self._logger.error(f"pr_agent {command} timed out after 10 minutes for job {job.id}")
+                timed_out.append(job.id)
+                exit_code = -2  # Timeout exit code
+                stderr = "\n".join(filter(None, [stderr, "Process timed out after 10 minutes"]))
 
             job_log = JobLog(
                 job_id=job.id,
-                exit_code=process.returncode,
-                stdout=stdout.decode().strip() if stdout else None,
-                stderr=stderr.decode().strip() if stderr else None,
+                exit_code=exit_code,
+                stdout=stdout,
+                stderr=stderr,
                 elapsed_ms=elapsed_ms,
             )
             await self._job_log_repository.create(job_log)
-        except asyncio.TimeoutError:
-            elapsed_ms = int((time.time() - start_time) * 1000)
-            self._logger.error(f"pr_agent improve timed out after 10 minutes for job {job.id}")
 
-            # Try to kill the process
-            try:
-                process.kill()
-                await process.wait()
-            except Exception as e:
-                self._logger.error(f"Failed to kill process for job {job.id}: {e}")
+        if timed_out:
+            raise asyncio.TimeoutError(f"pr_agent timed out for job(s) {timed_out}")
 
-            # Save log with timeout error
-            job_log = JobLog(
-                job_id=job.id,
-                exit_code=-2,  # Timeout exit code
-                stdout=None,
-                stderr="Process timed out after 10 minutes",
-                elapsed_ms=elapsed_ms,
-            )
-            await self._job_log_repository.create(job_log)
-            raise
+    async def _get_mr_context(self, job: Job) -> dict | None:
+        # Only the EXTERNAL engine takes a pre-fetched context, pr_agent fetches the MR through its own provider
+        if not self._merge_request_service:
+            return None
+
+        # Every job has the URL, keying the cache by its project path alone keeps one entry per MR revision
+        parsed = parse_mr_url(job.payload["mr_url"])
+        if parsed is not None:
+            project, iid = parsed
+        else:
+            project, iid = job.payload.get("project_id"), job.payload.get("iid")
+            if project is None or iid is None:
+                return None
+
+        try:
+            return await self._merge_request_service.get_mr_context(project, iid)
+        except Exception as e:
+            self._logger.warning(f"Failed to get MR context for job {job.id}: {e}")
+            return None
 
     async def _process_external_engine(self, job: Job, agent: Agent) -> None:
         mr_url = job.payload.get("mr_url")
@@ -180,6 +244,7 @@ class AgentWorker(BaseWorker):
             "provider": agent.config.provider.value,
             "model": agent.config.model,
             "prompt": agent.config.prompt,
+            "mr_context": await self._get_mr_context(job),
         }
 
         self._logger.info(f"Calling external URL {agent.config.external_url} for job {job.id}")
@@ -190,7 +255,7 @@ class AgentWorker(BaseWorker):
         stderr_str = None
 
         try:
-            response = await self._http_client.post(str(agent.config.external_url), json=request_body, timeout=30.0)
+            response = await self._http_client.post(str(agent.config.external_url), json=request_body)
             response.raise_for_status()
 
             try:
@@ -203,7 +268,7 @@ class AgentWorker(BaseWorker):
 
         except httpx.TimeoutException as e:
             exit_code = -2  # Timeout exit code
-            stderr_str = f"HTTP request timed out after 30 seconds: {str(e)}"
+            stderr_str = f"HTTP request timed out after {Config.HTTP.EXTERNAL_TIMEOUT:g} seconds: {str(e)}"
             self._logger.error(f"HTTP timeout calling external URL for job {job.id}: {e}", exc_info=True)
             raise
         except httpx.HTTPStatusError as e:
@@ -227,49 +292,281 @@ class AgentWorker(BaseWorker):
             )
             await self._job_log_repository.create(job_log)
 
-    async def _process_pr_agent_v0_29(self, job: Job, agent: Agent) -> None:
-        if agent.type == AgentType.MR_DESCRIBER:
-            await self._run_mr_describer(job, agent)
-        elif agent.type == AgentType.MR_REVIEWER:
-            await self._run_mr_reviewer(job, agent)
-        else:
-            self._logger.error(f"Unknown agent type {agent.type} for job {job.id}")
+    async def _process_pr_agent_v0_29(self, jobs: list[tuple[Job, Agent]]) -> None:
+        runs = []
+        for job, agent in jobs:
+            if not job.payload.get("mr_url"):
+                self._logger.error(f"No MR URL found in job {job.id} payload")
+                continue
+            command = self._pr_agent_command(agent)
+            if command is None:
+                self._logger.error(f"Unknown agent type {agent.type} for job {job.id}")
+                continue
+            runs.append((job, *command))
+
+        # Describe first, so the review runs on the final MR description
+        runs.sort(key=lambda run: run[1] != 'describe')
+        if runs:
+            await self._run_pr_agent(runs)
+
+    async def _process_jobs(self, jobs: list[Job]) -> None:
+        pr_agent_jobs = []
+        for job in jobs:
+            try:
+                agent = await self._agent_service.get_agent_with_raw_token(job.agent_id)
+
+                if not agent.enabled:
+                    self._logger.info(f"Agent {agent.id} is disabled, skipping job {job.id}")
+                    continue
+
+                self._logger.info(
+                    f"Processing job {job.id} for agent {agent.id} (type={agent.type}, engine={agent.engine})"
+                )
+
+                if agent.engine == AgentEngine.EXTERNAL:
+                    await self._process_external_engine(job, agent)
+                elif agent.engine == AgentEngine.PR_AGENT_V0_29:
+                    pr_agent_jobs.append((job, agent))
+                else:
+                    self._logger.error(f"Unknown engine type {agent.engine} for job {job.id}")
+            except Exception as e:
+                if len(jobs) == 1:
+                    raise
+                self._logger.error(f"Error processing job {job.id}: {e}", exc_info=True)
+
+        if pr_agent_jobs:
+            await self._process_pr_agent_v0_29(pr_agent_jobs)
 
-    async def _process_job(self, job: Job) -> None:
-        agent = await self._agent_service.get_agent_with_raw_token(job.agent_id)
+    async def _claim_batch(self, job: Job) -> list[Job]:
+        if not self._batch_mr_jobs:
+            return [job]
+        try:
+            siblings = await self._job_queue_service.claim_jobs_for_mr(
+                self._worker_id, self._lease_seconds, job, AgentEngine.PR_AGENT_V0_29.value,
+            )
+        except Exception as e:
+            self._logger.error(f"Failed to claim jobs sharing the MR with job {job.id}: {e}")
+            siblings = []
+        return [job, *siblings]
+
+    async def _heartbeat(self, jobs: list[Job]) -> None:
+        jobs = list(jobs)
+        while jobs:
+            await asyncio.sleep(self._lease_seconds / 3)
+            for job in list(jobs):
+                try:
+                    extended = await self._job_queue_service.extend_lease(job.id, self._worker_id, self._lease_seconds)
+                    if not extended:
+                        self._logger.warning(f"Lost lease on job {job.id}, it may be picked up by another worker")
+                        jobs.remove(job)
+                except Exception as e:
+                    self._logger.error(f"Failed to extend lease on job {job.id}: {e}")
+
+    async def _handle_job(self, job: Job) -> None:
+        jobs = await self._claim_batch(job)
+        heartbeat = asyncio.create_task(self._heartbeat(jobs))
+        try:
+            await self._process_jobs(jobs)
+        except Exception as e:
+            # The failure is recorded in the job log, retries are only for jobs whose worker died
+            self._logger.error(f"Error processing job(s) {[job.id for job in jobs]}: {e}", exc_info=True)
+        finally:
+            heartbeat.cancel()
 
-        if not agent.enabled:
-            self._logger.info(f"Agent {agent.id} is disabled, skipping job {job.id}")
+        for job in jobs:
+            if await self._job_queue_service.complete_job(job.id, self._worker_id):
+                self._logger.info(f"Job {job.id} completed")
+            else:
+                self._logger.warning(f"Job {job.id} finished after its lease was taken over")
+
+    def _log_http_pool_stats(self) -> None:
+        # The API's pool endpoint can't see this process, so the external pool is reported here
+        try:
+            stats = read_pool_stats(self._http_client)
+        except Exception as e:
+            self._logger.debug(f"Can't read external HTTP pool stats: {e}")
             return
+        if stats["queued_requests"]:
+            self._logger.warning(f"External HTTP pool is saturated: {stats}")
+        else:
+            self._logger.debug(f"External HTTP pool: {stats}")
 
-        self._logger.info(
-            f"Processing job {job.id} for agent {agent.id} (type={agent.type}, engine={agent.engine})"
+    async def _reap_expired_jobs(self) -> None:
+        while self._running:
+            self._log_http_pool_stats()
+            try:
+                _, failed = await self._job_queue_service.reclaim_expired_jobs(self._max_attempts)
+                for job in failed:
+                    elapsed_ms = 0
+                    if job.started_at and job.ended_at:
+                        elapsed_ms = int((job.ended_at - job.started_at).total_seconds() * 1000)
+                    job_log = JobLog(
+                        job_id=job.id,
+                        exit_code=-3,  # Lease expired exit code
+                        stdout=None,
+                        stderr=f"Worker lease expired after {job.attempts} attempt(s)",
+                        elapsed_ms=elapsed_ms,
+                    )
+                    await self._job_log_repository.create(job_log)
+            except Exception as e:
+                self._logger.error(f"Error reclaiming expired jobs: {e}", exc_info=True)
+            await self._sleep(self._reaper_interval)
+
+    async def _maintain_partitions(self) -> None:
+        cutoff = await self._job_queue_service.maintain_partitions(
+            self._partition_months_ahead,
+            self._retention_months,
         )
+        if cutoff:
+            deleted = await self._job_log_repository.delete_chunks_before(cutoff)
+            if deleted:
+                self._logger.info(f"Deleted {deleted} orphaned job log chunk(s)")
+
+    async def _purge_webhook_deliveries(self) -> None:
+        if self._webhook_delivery_repository:
+            purged = await self._webhook_delivery_repository.purge(self._webhook_delivery_retention)
+            self._logger.debug(f"Purged {purged} webhook delivery id(s)")
+
+    async def _purge_webhook_inbox(self) -> None:
+        if self._webhook_inbox_repository:
+            purged = await self._webhook_inbox_repository.purge_exhausted(
+                self._webhook_inbox_max_attempts,
+                self._webhook_delivery_retention,
+            )
+            if purged:
+                self._logger.info(f"Purged {purged} webhook inbox entries that ran out of attempts")
+
+    async def _run_maintenance(self) -> None:
+        # Each step runs on its own, one failing every time must not starve the others
+        steps = [
+            ("partition maintenance", self._maintain_partitions),
+            ("webhook delivery purge", self._purge_webhook_deliveries),
+            ("webhook inbox purge", self._purge_webhook_inbox),
+        ]
+        while self._running:
+            for name, step in steps:
+                try:
+                    await step()
+                except Exception as e:
+                    self._logger.error(f"Error running {name}: {e}", exc_info=True)
+            await self._sleep(self._maintenance_interval)
+
+    def _on_job_notification(self, payload: str) -> None:
+        self._wakeup_event.set()
+
+    def _on_listener_terminated(self) -> None:
+        if self._listener is None:
+            return  # closed on purpose
+        self._logger.warning("Job listener connection lost, falling back to polling")
+        self._listener = None
+        if self._running:
+            self._listener_task = asyncio.create_task(self._listen_for_jobs(retry_delay=5.0))
+
+    async def _listen_for_jobs(self, retry_delay: float = 0.0) -> None:
+        while self._running and self._listener is None:
+            if retry_delay:
+                await self._sleep(retry_delay)
+                if not self._running:
+                    return
+            try:
+                self._listener = await self._job_queue_service.listen_for_jobs(
+                    self._on_job_notification,
+                    self._on_listener_terminated,
+                )
+                self._logger.info("Listening for job notifications")
+            except Exception as e:
+                self._logger.error(f"Failed to listen for job notifications: {e}")
+                retry_delay = retry_delay or 5.0
 
-        if agent.engine == AgentEngine.EXTERNAL:
-            await self._process_external_engine(job, agent)
-        elif agent.engine == AgentEngine.PR_AGENT_V0_29:
-            await self._process_pr_agent_v0_29(job, agent)
-        else:
-            self._logger.error(f"Unknown engine type {agent.engine} for job {job.id}")
+        # Catch up on anything enqueued while we were not listening
+        self._wakeup_event.set()
 
-    async def run(self) -> None:
-        self._running = True
-        self._logger.info("Agent worker started, waiting for jobs...")
+    async def _sleep(self, delay: float) -> None:
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _wait_for_jobs(self, timeout: float) -> None:
+        waiters = [
+            asyncio.ensure_future(self._wakeup_event.wait()),
+            asyncio.ensure_future(self._stop_event.wait()),
+        ]
+        try:
+            await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+        self._wakeup_event.clear()
+
+    async def _run_slot(self, slot: int) -> None:
+        self._logger.debug(f"Worker slot {slot} started")
 
         while self._running:
             try:
-                job = await self._job_queue_service.claim_next_job()
+                job = await self._job_queue_service.claim_next_job(self._worker_id, self._lease_seconds)
                 if job:
-                    await self._process_job(job)
-                    await self._job_queue_service.complete_job(job.id)
-                    self._logger.info(f"Job {job.id} completed successfully")
+                    self._logger.debug(f"Worker slot {slot} claimed job {job.id}")
+                    # One notification may stand for several jobs, let idle slots check too
+                    self._wakeup_event.set()
+                    await self._handle_job(job)
                 else:
-                    await asyncio.sleep(self._poll_interval)
+                    poll_interval = self._notify_poll_interval if self._listener else self._poll_interval
+                    await self._wait_for_jobs(poll_interval)
             except Exception as e:
-                self._logger.error(f"Error processing job: {e}", exc_info=True)
-                await asyncio.sleep(1)
+                self._logger.error(f"Error processing job in slot {slot}: {e}", exc_info=True)
+                await self._sleep(1.0)
+
+        self._logger.debug(f"Worker slot {slot} stopped")
+
+    async def run(self) -> None:
+        self._running = True
+        self._stop_event.clear()
+        self._logger.info(
+            f"Agent worker {self._worker_id} started with {self._concurrency} slot(s), waiting for jobs..."
+        )
+
+        if self._pr_agent_pool:
+            await self._pr_agent_pool.start()
+        # Slots poll until LISTEN is up, a database that refuses it must not stop the worker
+        self._listener_task = asyncio.create_task(self._listen_for_jobs())
+        self._agent_service.start_cache_invalidation()
+
+        self._reaper_task = asyncio.create_task(self._reap_expired_jobs())
+        self._maintenance_task = asyncio.create_task(self._run_maintenance())
+        self._slots = [asyncio.create_task(self._run_slot(slot)) for slot in range(self._concurrency)]
+        await self._stop_event.wait()
+        await self._drain()
+
+    def stop(self) -> None:
+        self._running = False
+        self._stop_event.set()
+
+    async def _drain(self) -> None:
+        pending = [slot for slot in self._slots if not slot.done()]
+        if not pending:
+            return
+
+        # Let in-flight jobs finish, but don't hang forever on a stuck one
+        self._logger.info(f"Waiting for {len(pending)} worker slot(s) to finish...")
+        _, still_running = await asyncio.wait(pending, timeout=self._shutdown_timeout)
+        for slot in still_running:
+            slot.cancel()
+        if still_running:
+            await asyncio.gather(*still_running, return_exceptions=True)
+            self._logger.warning(f"Cancelled {len(still_running)} slot(s) that did not finish in time")
 
     async def cleanup(self) -> None:
         self._logger.info("Stopping agent worker...")
-        self._running = False
+        self.stop()
+        await self._drain()
+
+        for task in (self._listener_task, self._reaper_task, self._maintenance_task):
+            if task and not task.done():
+                task.cancel()
+        if self._listener:
+            listener, self._listener = self._listener, None
+            await self._job_queue_service.stop_listening(listener)
+        await self._agent_service.stop_cache_invalidation()
+        if self._pr_agent_pool:
+            await self._pr_agent_pool.close()
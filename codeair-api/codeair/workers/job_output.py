@@ -0,0 +1,122 @@
+import asyncio
+import codecs
+from collections import deque
+from logging import Logger
+
+from codeair.domain.job_logs import JobLogChunk, JobLogRepository
+
+__all__ = ["JobOutput", "STREAMS"]
+
+STREAMS = ("stdout", "stderr")
+
+
+class _RingBuffer:
+    """Keeps the last `max_bytes` written."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self._max_bytes = max_bytes
+        self._chunks: deque[bytes] = deque()
+        self._size = 0
+        self.dropped = 0
+
+    def write(self, data: bytes) -> None:
+        self._chunks.append(data)
+        self._size += len(data)
+        while self._size > self._max_bytes:
+            excess = self._size - self._max_bytes
+            head = self._chunks[0]
+            if len(head) <= excess:
+                self._chunks.popleft()
+                self._size -= len(head)
+                self.dropped += len(head)
+            else:
+                self._chunks[0] = head[excess:]
+                self._size -= excess
+                self.dropped += excess
+
+    def getvalue(self) -> bytes:
+        return b"".join(self._chunks)
+
+
+class JobOutput:
+    """
+    Bounded capture of a running job's stdout/stderr.
+
+    The tail of each stream (up to `max_bytes`) is kept for the final job log, and
+    output is persisted as job_log_chunks every `flush_interval` so it can be followed
+    live, up to `max_bytes` per job; past that the chunks stop and only the tail is kept.
+    """
+
+    def __init__(
+        self,
+        job_id: int,
+        job_log_repository: JobLogRepository,
+        logger: Logger,
+        max_bytes: int,
+        flush_interval: float,
+    ) -> None:
+        self._job_id = job_id
+        self._job_log_repository = job_log_repository
+        self._logger = logger
+        self._max_bytes = max_bytes
+        self._flush_interval = flush_interval
+        self._buffers = {stream: _RingBuffer(max_bytes) for stream in STREAMS}
+        self._decoders = {stream: codecs.getincrementaldecoder("utf-8")(errors="replace") for stream in STREAMS}
+        self._pending: list[JobLogChunk] = []
+        self._chunked_bytes = 0
+        self._truncated = False
+        self._seq = 0
+        self._flusher: asyncio.Task | None = None
+
+    def write(self, stream: str, data: bytes) -> None:
+        if not data:
+            return
+        self._buffers[stream].write(data)
+
+        if self._truncated:
+            return
+        if self._chunked_bytes + len(data) > self._max_bytes:
+            self._truncated = True
+            self._add_chunk(stream, "\n[... live output truncated, the end of it will be in the job log ...]\n")
+            return
+        self._chunked_bytes += len(data)
+        self._add_chunk(stream, self._decoders[stream].decode(data))
+
+    def _add_chunk(self, stream: str, text: str) -> None:
+        if text:
+            self._seq += 1
+            self._pending.append(JobLogChunk(job_id=self._job_id, seq=self._seq, stream=stream, data=text))
+
+    def getvalue(self, stream: str) -> str | None:
+        buffer = self._buffers[stream]
+        text = buffer.getvalue().decode(errors="replace").strip()
+        if buffer.dropped:
+            text = f"[... {buffer.dropped} bytes truncated ...]\n{text}"
+        return text or None
+
+    async def flush(self) -> None:
+        chunks, self._pending = self._pending, []
+        try:
+            await self._job_log_repository.append_chunks(chunks)
+        except Exception as e:
+            # Live output is best effort, the final log is what matters
+            self._logger.warning(f"Failed to persist output chunks for job {self._job_id}: {e}")
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def close(self) -> None:
+        if self._flusher:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await self.flush()
+
+    async def pump(self, stream: str, reader: asyncio.StreamReader, chunk_size: int = 64 * 1024) -> None:
+        while data := await reader.read(chunk_size):
+            self.write(stream, data)
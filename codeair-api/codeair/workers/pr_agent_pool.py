@@ -0,0 +1,264 @@
+import asyncio
+import json
+import os
+import shutil
+import signal
+import tempfile
+from logging import Logger
+from pathlib import Path
+from typing import Callable
+
+__all__ = ["PrAgentRunnerPool", "PrAgentRunnerError", "PrAgentRunnerUnavailable"]
+
+RUNNER_SCRIPT = Path(__file__).parent / "pr_agent_runner.py"
+
+OutputCallback = Callable[[int, str, bytes], None]
+
+
+class PrAgentRunnerError(Exception):
+    pass
+
+
+class PrAgentRunnerUnavailable(PrAgentRunnerError):
+    """No runner could take the job, nothing was started."""
+
+
+class _Runner:
+    def __init__(self, process: asyncio.subprocess.Process) -> None:
+        self.process = process
+        self.jobs_done = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    async def send(self, message: dict) -> None:
+        self.process.stdin.write((json.dumps(message) + "\n").encode())
+        await self.process.stdin.drain()
+
+    async def receive(self) -> dict:
+        line = await self.process.stdout.readline()
+        if not line:
+            raise PrAgentRunnerError("pr_agent runner exited unexpectedly")
+        return json.loads(line)
+
+    async def stop(self) -> None:
+        if self.alive:
+            self.process.kill()
+        await self.process.wait()
+
+
+class PrAgentRunnerPool:
+    """
+    Pool of pre-imported pr_agent fork servers (see pr_agent_runner.py).
+
+    Each runner serves one request (a job, or a batch of jobs for one MR) at a time and is
+    replaced after `max_jobs_per_runner` requests, so whatever it accumulates is bounded.
+    """
+
+    def __init__(
+        self,
+        python_path: str,
+        size: int,
+        max_jobs_per_runner: int,
+        logger: Logger,
+        startup_timeout: float = 120.0,
+        tail_interval: float = 0.5,
+    ) -> None:
+        self._python_path = python_path
+        self._size = size
+        self._max_jobs_per_runner = max_jobs_per_runner
+        self._logger = logger
+        self._startup_timeout = startup_timeout
+        self._tail_interval = tail_interval
+        self._idle: asyncio.Queue[_Runner | None] = asyncio.Queue()
+        self._runners: set[_Runner] = set()
+        self._spawning: set[asyncio.Task] = set()
+        self._starting = 0  # runners being spawned, counted before their task gets to run
+        self._closed = False
+
+    async def start(self) -> None:
+        self._starting += self._size
+        await asyncio.gather(*[self._spawn() for _ in range(self._size)])
+        self._logger.info(f"Started {len(self._runners)} pr_agent runner(s)")
+
+    async def _spawn(self) -> None:
+        try:
+            runner = await self._start_runner()
+        finally:
+            self._starting -= 1
+
+        if runner is None:
+            self._idle.put_nowait(None)  # wake up a waiter so it can tell whether any runner is left
+            return
+
+        if self._closed:
+            await runner.stop()
+            return
+
+        self._runners.add(runner)
+        self._idle.put_nowait(runner)
+
+    async def _start_runner(self) -> _Runner | None:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                self._python_path, str(RUNNER_SCRIPT), f"--max-jobs={self._max_jobs_per_runner}",
+                env={"PYTHONWARNINGS": "ignore::UserWarning"},
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+        except OSError as e:
+            self._logger.error(f"Failed to start pr_agent runner: {e}")
+            return None
+        runner = _Runner(process)
+
+        try:
+            message = await asyncio.wait_for(runner.receive(), timeout=self._startup_timeout)
+            if not message.get("ready"):
+                raise PrAgentRunnerError(message.get("error", "pr_agent runner failed to start"))
+        except Exception as e:
+            self._logger.error(f"Failed to start pr_agent runner: {e}")
+            await runner.stop()
+            return None
+        return runner
+
+    def _replace(self) -> None:
+        if self._closed:
+            return
+        self._starting += 1
+        task = asyncio.create_task(self._spawn())
+        self._spawning.add(task)
+        task.add_done_callback(self._spawning.discard)
+
+    async def _release(self, runner: _Runner) -> None:
+        if runner.alive and (not self._max_jobs_per_runner or runner.jobs_done < self._max_jobs_per_runner):
+            self._idle.put_nowait(runner)
+            return
+
+        # Recycled (or broken): let it go and warm up a fresh one in the background
+        self._runners.discard(runner)
+        self._replace()
+        await runner.stop()
+
+    async def run_batch(
+        self,
+        jobs: list[tuple[list[str], dict[str, str]]],
+        timeout: float,
+        on_output: OutputCallback,
+    ) -> list[tuple[int | None, int | None]]:
+        """
+        Run several pr_agent commands back to back in one child.
+
+        Output is passed to `on_output(job_index, stream, data)` as it is written.
+        Returns the exit code and elapsed milliseconds per job, both None for jobs that
+        didn't finish before `timeout` (for the whole batch).
+        """
+        if self._closed:
+            raise PrAgentRunnerError("pr_agent runner pool is closed")
+
+        if not self._runners and not self._starting:
+            self._replace()
+        while (runner := await self._idle.get()) is None:
+            # A spawn failed, keep waiting as long as a runner may still free up or come up
+            if not self._runners and not self._starting:
+                self._idle.put_nowait(None)  # let the other waiters give up too
+                raise PrAgentRunnerUnavailable("No pr_agent runner available")
+
+        output_dir = tempfile.mkdtemp(prefix="codeair-pr-agent-")
+        job_dirs = []
+        for index in range(len(jobs)):
+            job_dirs.append(os.path.join(output_dir, str(index)))
+            os.mkdir(job_dirs[-1])
+
+        tail = _Tail(job_dirs, on_output)
+        tailer = asyncio.create_task(tail.follow(self._tail_interval))
+        try:
+            await self._dispatch(runner, {
+                "jobs": [
+                    {"args": args, "env": env, "output_dir": job_dir}
+                    for (args, env), job_dir in zip(jobs, job_dirs)
+                ],
+            }, timeout)
+            tailer.cancel()
+            await asyncio.gather(tailer, return_exceptions=True)
+            tail.read()
+            return [(_read_int(job_dir, "exit_code"), _read_int(job_dir, "elapsed_ms")) for job_dir in job_dirs]
+        finally:
+            tailer.cancel()
+            runner.jobs_done += 1
+            await self._release(runner)
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+    async def _dispatch(self, runner: _Runner, request: dict, timeout: float) -> None:
+        try:
+            await runner.send(request)
+            pid = (await runner.receive())["pid"]
+        except Exception as e:
+            await runner.stop()
+            raise PrAgentRunnerUnavailable(f"pr_agent runner failed to accept the job: {e}") from e
+
+        try:
+            await asyncio.wait_for(runner.receive(), timeout=timeout)
+        except asyncio.TimeoutError:
+            _kill(pid)
+            try:
+                await asyncio.wait_for(runner.receive(), timeout=10.0)
+            except Exception:
+                await runner.stop()
+        except BaseException:
+            # Cancelled or the runner broke: don't leave the job running behind our back
+            _kill(pid)
+            await runner.stop()
+            raise
+
+    async def close(self) -> None:
+        self._closed = True
+        for task in list(self._spawning):
+            task.cancel()
+        await asyncio.gather(*[runner.stop() for runner in self._runners], return_exceptions=True)
+        self._runners.clear()
+
+
+def _kill(pid: int) -> None:
+    try:
+        os.kill(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+class _Tail:
+    """Follows the stdout/stderr files the runner child writes for each job."""
+
+    def __init__(self, job_dirs: list[str], on_output: OutputCallback, chunk_size: int = 64 * 1024) -> None:
+        self._job_dirs = job_dirs
+        self._on_output = on_output
+        self._chunk_size = chunk_size
+        self._offsets: dict[tuple[int, str], int] = {}
+
+    def read(self) -> None:
+        for index, job_dir in enumerate(self._job_dirs):
+            for stream in ("stdout", "stderr"):
+                offset = self._offsets.get((index, stream), 0)
+                try:
+                    with open(os.path.join(job_dir, stream), "rb") as f:
+                        f.seek(offset)
+                        while data := f.read(self._chunk_size):
+                            offset += len(data)
+                            self._on_output(index, stream, data)
+                except FileNotFoundError:
+                    continue
+                self._offsets[(index, stream)] = offset
+
+    async def follow(self, interval: float) -> None:
+        while True:
+            self.read()
+            await asyncio.sleep(interval)
+
+
+def _read_int(job_dir: str, name: str) -> int | None:
+    try:
+        with open(os.path.join(job_dir, name)) as f:
+            return int(f.read())
+    except (FileNotFoundError, ValueError):
+        return None
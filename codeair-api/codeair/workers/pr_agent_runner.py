@@ -0,0 +1,107 @@
+"""
+Pre-warmed pr_agent fork server.
+
+Started by PrAgentRunnerPool as a standalone script. It imports pr_agent (and its heavy
+dependency tree) once, then forks a child per request, so a job starts with everything already
+imported. Talks JSON lines: requests on stdin, replies on the original stdout.
+
+Request:  {"jobs": [{"args": [...], "env": {...}, "output_dir": "..."}, ...]}
+Replies:  {"pid": <child pid>} as soon as the request is forked, then {"exit_code": <int>}.
+
+Jobs of one request run back to back in the same child. Each builds its own git provider, so a
+command sees the MR as left by the one before it (e.g. improve after describe). Each job's stdout,
+stderr, exit code and elapsed milliseconds are written to its output_dir.
+
+Deliberately doesn't import anything from codeair: it must not need the app's config.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+
+
+def _run_job(job: dict) -> int:
+    os.environ.clear()
+    os.environ.update(job["env"])
+
+    stdout_fd = os.open(os.path.join(job["output_dir"], "stdout"), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    stderr_fd = os.open(os.path.join(job["output_dir"], "stderr"), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    os.dup2(stdout_fd, 1)
+    os.dup2(stderr_fd, 2)
+    os.close(stdout_fd)
+    os.close(stderr_fd)
+
+    try:
+        from pr_agent import cli
+        from pr_agent.config_loader import global_settings
+
+        # Settings may have been read while warming up or by a previous job, pick up this job's environment
+        global_settings.reload()
+
+        sys.argv = ["pr_agent.cli", *job["args"]]
+        cli.run()
+        return 0
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        traceback.print_exc()
+        return 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+
+def _run_child(request: dict) -> int:
+    for job in request["jobs"]:
+        started_at = time.monotonic()
+        exit_code = _run_job(job)
+        elapsed_ms = int((time.monotonic() - started_at) * 1000)
+        with open(os.path.join(job["output_dir"], "elapsed_ms"), "w") as f:
+            f.write(str(elapsed_ms))
+        with open(os.path.join(job["output_dir"], "exit_code"), "w") as f:
+            f.write(str(exit_code))
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-jobs", type=int, default=0, help="exit after this many jobs (0 = never)")
+    options = parser.parse_args()
+
+    # Keep the protocol channel private, anything printed while importing goes to stderr
+    protocol = os.fdopen(os.dup(1), "w", buffering=1)
+    os.dup2(2, 1)
+
+    def reply(message: dict) -> None:
+        protocol.write(json.dumps(message) + "\n")
+
+    try:
+        import pr_agent.cli  # noqa: F401
+    except BaseException as e:
+        reply({"error": f"Failed to import pr_agent: {e!r}"})
+        sys.exit(1)
+
+    reply({"ready": True})
+
+    jobs_done = 0
+    for line in sys.stdin:
+        request = json.loads(line)
+
+        pid = os.fork()
+        if pid == 0:
+            protocol.close()
+            os._exit(_run_child(request))
+
+        reply({"pid": pid})
+        _, status = os.waitpid(pid, 0)
+        reply({"exit_code": os.waitstatus_to_exitcode(status)})
+
+        jobs_done += 1
+        if options.max_jobs and jobs_done >= options.max_jobs:
+            break
+
+
+if __name__ == "__main__":
+    main()
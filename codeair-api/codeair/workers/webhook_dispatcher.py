@@ -0,0 +1,134 @@
+import asyncio
+from logging import Logger
+
+from codeair.clients.database import Connection
+from codeair.domain.projects import ProjectRepository
+from codeair.domain.webhooks import WebhookInboxEntry, WebhookInboxRepository
+from codeair.services.job_queue_service import JobQueueService
+from codeair.workers.base_worker import BaseWorker
+
+__all__ = ["WebhookDispatcher"]
+
+
+class WebhookDispatcher(BaseWorker):
+    """Turns merge request events accepted into the webhook inbox into jobs, retrying each entry on its own."""
+
+    def __init__(
+        self,
+        webhook_inbox_repository: WebhookInboxRepository,
+        project_repository: ProjectRepository,
+        job_queue_service: JobQueueService,
+        logger: Logger,
+        batch_size: int = 100,
+        poll_interval: float = 5.0,
+        max_attempts: int = 5,
+        retry_delay: float = 30.0,
+        claim_seconds: float = 300.0,
+    ) -> None:
+        self._webhook_inbox_repository = webhook_inbox_repository
+        self._project_repository = project_repository
+        self._job_queue_service = job_queue_service
+        self._logger = logger
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval  # seconds, fallback while LISTEN is up or lost
+        self._max_attempts = max_attempts
+        self._retry_delay = retry_delay  # seconds, multiplied by the attempts made so far
+        self._claim_seconds = claim_seconds  # how long a claimed entry is hidden, covers a crashed dispatcher
+        self._running = False
+        self._stop_event = asyncio.Event()
+        self._wakeup_event = asyncio.Event()
+        self._listener: Connection | None = None
+
+    async def _dispatch(self, entry: WebhookInboxEntry) -> None:
+        project_id = await self._project_repository.get_project_id_by_webhook_id(entry.webhook_id)
+        if not project_id:
+            self._logger.warning(f"Dropping inbox entry {entry.id}: webhook {entry.webhook_id} not found")
+            return
+
+        jobs = await self._job_queue_service.enqueue_jobs_for_project(project_id, payload={
+            **entry.payload,
+            "project_id": project_id,
+        })
+        self._logger.debug(f"Inbox entry {entry.id} created {len(jobs)} job(s) for project {project_id}")
+
+    async def _dispatch_batch(self) -> int:
+        entries = await self._webhook_inbox_repository.claim_batch(
+            self._batch_size,
+            self._max_attempts,
+            self._claim_seconds,
+        )
+        for entry in entries:
+            if not self._running:
+                break  # the rest become available again when the claim runs out
+            try:
+                await self._dispatch(entry)
+            except Exception as e:
+                await self._fail(entry, e)
+                continue
+            await self._webhook_inbox_repository.delete(entry.id)
+        return len(entries)
+
+    async def _fail(self, entry: WebhookInboxEntry, error: Exception) -> None:
+        attempts = entry.attempts + 1
+        await self._webhook_inbox_repository.fail(entry.id, str(error), self._retry_delay * attempts)
+        if attempts >= self._max_attempts:
+            self._logger.error(f"Giving up on inbox entry {entry.id} after {attempts} attempt(s): {error}")
+        else:
+            self._logger.warning(f"Failed to dispatch inbox entry {entry.id} (attempt {attempts}): {error}")
+
+    def _on_inbox_notification(self, payload: str) -> None:
+        self._wakeup_event.set()
+
+    def _on_listener_terminated(self) -> None:
+        if self._listener is None:
+            return  # closed on purpose
+        self._logger.warning("Webhook inbox listener connection lost, falling back to polling")
+        self._listener = None
+
+    async def _listen(self) -> None:
+        try:
+            self._listener = await self._webhook_inbox_repository.listen(
+                self._on_inbox_notification,
+                self._on_listener_terminated,
+            )
+            self._logger.info("Listening for webhook inbox notifications")
+        except Exception as e:
+            self._logger.error(f"Failed to listen for webhook inbox notifications: {e}")
+
+    async def _wait(self, timeout: float) -> None:
+        waiters = [
+            asyncio.ensure_future(self._wakeup_event.wait()),
+            asyncio.ensure_future(self._stop_event.wait()),
+        ]
+        try:
+            await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
+    async def run(self) -> None:
+        self._running = True
+        self._stop_event.clear()
+        self._logger.info("Webhook dispatcher started, waiting for inbox entries...")
+
+        while self._running:
+            if self._listener is None:
+                await self._listen()
+            self._wakeup_event.clear()
+            try:
+                while self._running and await self._dispatch_batch() == self._batch_size:
+                    pass
+            except Exception as e:
+                self._logger.error(f"Error dispatching webhook inbox: {e}", exc_info=True)
+            await self._wait(self._poll_interval)
+
+    def stop(self) -> None:
+        self._running = False
+        self._stop_event.set()
+
+    async def cleanup(self) -> None:
+        self._logger.info("Stopping webhook dispatcher...")
+        self.stop()
+        if self._listener:
+            listener, self._listener = self._listener, None
+            await self._webhook_inbox_repository.unlisten(listener)
@@ -0,0 +1,223 @@
+from unittest.mock import patch
+from uuid import UUID, uuid4
+
+from codeair.api.routes import webhooks
+from codeair.api.routes.webhooks import handle_webhook
+from codeair.domain.jobs import Job
+from codeair.domain.projects import ProjectRepository
+from codeair.domain.webhooks import WebhookDeliveryRepository, WebhookInboxRepository
+from codeair.services.job_queue_service import JobQueueService
+from litestar.di import Provide
+from litestar.testing import create_test_client
+from vedro import defer, given, params, scenario, then, when
+
+WEBHOOK_ID = uuid4()
+PROJECT_ID = 42
+MR_URL = "https://gitlab.example.com/group/project/-/merge_requests/1"
+
+
+def merge_request_event(action: str = "open", oldrev: str | None = None) -> dict:
+    object_attributes = {"action": action, "url": MR_URL, "iid": 1, "last_commit": {"id": "abc123"}}
+    if oldrev is not None:
+        object_attributes["oldrev"] = oldrev
+    return {"event_type": "merge_request", "object_attributes": object_attributes}
+
+
+class FakeProjectRepository(ProjectRepository):
+    def __init__(self) -> None:
+        pass
+
+    async def get_project_id_by_webhook_id(self, webhook_id: UUID) -> int | None:
+        return PROJECT_ID if webhook_id == WEBHOOK_ID else None
+
+
+class FakeJobQueueService(JobQueueService):
+    def __init__(self, fail: bool = False) -> None:
+        self.payloads = []
+        self.fail = fail
+
+    async def enqueue_jobs_for_project(self, project_id: int, payload: dict) -> list[Job]:
+        if self.fail:
+            raise RuntimeError("database is down")
+        self.payloads.append(payload)
+        return []
+
+
+class FakeWebhookDeliveryRepository(WebhookDeliveryRepository):
+    def __init__(self) -> None:
+        self.deliveries = set()
+
+    async def record(self, event_uuid: UUID, webhook_id: UUID) -> bool:
+        if event_uuid in self.deliveries:
+            return False
+        self.deliveries.add(event_uuid)
+        return True
+
+    async def forget(self, event_uuid: UUID) -> None:
+        self.deliveries.discard(event_uuid)
+
+
+class FakeWebhookInboxRepository(WebhookInboxRepository):
+    def __init__(self) -> None:
+        self.entries = []
+
+    async def append(self, webhook_id: UUID, event_uuid: UUID | None, payload: dict) -> None:
+        self.entries.append((webhook_id, event_uuid, payload))
+
+
+class AsyncIngestionConfig:
+    class Webhooks:
+        ASYNC_INGESTION = True
+
+
+def async_ingestion_enabled() -> None:
+    patcher = patch.object(webhooks, "Config", AsyncIngestionConfig)
+    patcher.start()
+    defer(patcher.stop)
+
+
+def provide(value):
+    def provider():
+        return value
+    return provider
+
+
+class Fakes:
+    def __init__(self, job_queue_service: JobQueueService | None = None) -> None:
+        self.project_repository = FakeProjectRepository()
+        self.job_queue_service = job_queue_service or FakeJobQueueService()
+        self.webhook_delivery_repository = FakeWebhookDeliveryRepository()
+        self.webhook_inbox_repository = FakeWebhookInboxRepository()
+
+    def client(self):
+        return create_test_client([handle_webhook], dependencies={
+            name: Provide(provide(value), sync_to_thread=False)
+            for name, value in vars(self).items()
+        }, raise_server_exceptions=False)
+
+
+@scenario("Create jobs for new merge request revision", [
+    params(merge_request_event("open")),
+    params(merge_request_event("reopen")),
+    params(merge_request_event("update", oldrev="000aaa")),
+])
+def _(payload: dict):
+    with given:
+        fakes = Fakes()
+
+    with when, fakes.client() as client:
+        response = client.post(f"/api/v1/webhooks/{WEBHOOK_ID}", json=payload)
+
+    with then:
+        assert response.status_code == 200
+        assert response.json() == {"message": f"Created 0 job(s) for project {PROJECT_ID}"}
+        assert fakes.job_queue_service.payloads == [{
+            "mr_url": MR_URL,
+            "iid": 1,
+            "head_sha": "abc123",
+            "project_id": PROJECT_ID,
+        }]
+
+
+@scenario("Acknowledge webhook without creating jobs", [
+    params({"event_type": "push"}),
+    params(merge_request_event("update")),
+    params(merge_request_event("close")),
+])
+def _(payload: dict):
+    with given:
+        fakes = Fakes()
+
+    with when, fakes.client() as client:
+        response = client.post(f"/api/v1/webhooks/{WEBHOOK_ID}", json=payload)
+
+    with then:
+        assert response.status_code == 200
+        assert response.json() == {"message": f"Webhook received for project {PROJECT_ID}"}
+        assert fakes.job_queue_service.payloads == []
+
+
+@scenario("Acknowledge duplicate delivery without creating jobs")
+def _():
+    with given:
+        fakes = Fakes()
+        event_uuid = uuid4()
+        headers = {"X-Gitlab-Event-UUID": str(event_uuid)}
+
+    with when, fakes.client() as client:
+        client.post(f"/api/v1/webhooks/{WEBHOOK_ID}", json=merge_request_event(), headers=headers)
+        response = client.post(f"/api/v1/webhooks/{WEBHOOK_ID}", json=merge_request_event(), headers=headers)
+
+    with then:
+        assert response.status_code == 200
+        assert response.json() == {"message": f"Delivery {event_uuid} already received"}
+        assert len(fakes.job_queue_service.payloads) == 1
+
+
+@scenario("Forget delivery when jobs can't be created")
+def _():
+    with given:
+        fakes = Fakes(FakeJobQueueService(fail=True))
+        event_uuid = uuid4()
+
+    with when, fakes.client() as client:
+        response = client.post(f"/api/v1/webhooks/{WEBHOOK_ID}", json=merge_request_event(), headers={
+            "X-Gitlab-Event-UUID": str(event_uuid),
+        })
+
+    with then:
+        assert response.status_code == 500
+        # GitLab's retry is handled as a new delivery
+        assert event_uuid not in fakes.webhook_delivery_repository.deliveries
+
+
+@scenario("Try to handle webhook that doesn't exist")
+def _():
+    with given:
+        fakes = Fakes()
+        webhook_id = uuid4()
+
+    with when, fakes.client() as client:
+        response = client.post(f"/api/v1/webhooks/{webhook_id}", json=merge_request_event())
+
+    with then:
+        assert response.status_code == 404
+        assert response.json() == {"message": f"Webhook {webhook_id} not found"}
+        assert fakes.job_queue_service.payloads == []
+
+
+@scenario("Queue merge request event when ingestion is async")
+def _():
+    with given:
+        async_ingestion_enabled()
+        fakes = Fakes()
+        event_uuid = uuid4()
+
+    with when, fakes.client() as client:
+        response = client.post(f"/api/v1/webhooks/{WEBHOOK_ID}", json=merge_request_event(), headers={
+            "X-Gitlab-Event-UUID": str(event_uuid),
+        })
+
+    with then:
+        assert response.status_code == 202
+        assert response.json() == {"message": f"Queued webhook {WEBHOOK_ID} event"}
+        assert fakes.webhook_inbox_repository.entries == [
+            (WEBHOOK_ID, event_uuid, {"mr_url": MR_URL, "iid": 1, "head_sha": "abc123"}),
+        ]
+        assert fakes.job_queue_service.payloads == []
+
+
+@scenario("Try to queue event of webhook that doesn't exist")
+def _():
+    with given:
+        async_ingestion_enabled()
+        fakes = Fakes()
+        webhook_id = uuid4()
+
+    with when, fakes.client() as client:
+        response = client.post(f"/api/v1/webhooks/{webhook_id}", json=merge_request_event())
+
+    with then:
+        assert response.status_code == 404
+        assert response.json() == {"message": f"Webhook {webhook_id} not found"}
+        assert fakes.webhook_inbox_repository.entries == []
@@ -0,0 +1,89 @@
+import json
+
+from codeair.cache import MRContextCache
+from vedro import create_tmp_dir, given, scenario, then, when
+
+
+def entry_size(context: dict) -> int:
+    return len(json.dumps(context).encode())
+
+
+@scenario("Get MR context that was set")
+async def _():
+    with given:
+        cache = MRContextCache(str(create_tmp_dir()), max_bytes=1024)
+        context = {"iid": 1, "diffs": [{"new_path": "a.py"}]}
+        await cache.set("group/project", 1, "sha", context)
+
+    with when:
+        results = await cache.get("group/project", 1, "sha"), await cache.get("group/project", 1, "other-sha")
+
+    with then:
+        assert results == (context, None)
+        assert (cache.hits, cache.misses) == (1, 1)
+
+
+@scenario("Evict least recently used MR contexts")
+async def _():
+    with given:
+        directory = create_tmp_dir()
+        context = {"diff": "x" * 100}
+        cache = MRContextCache(str(directory), max_bytes=entry_size(context) * 2)
+        await cache.set("project", 1, "a", context)
+        await cache.set("project", 1, "b", context)
+        await cache.get("project", 1, "a")
+
+    with when:
+        await cache.set("project", 1, "c", context)
+
+    with then:
+        assert await cache.get("project", 1, "a") == context
+        assert await cache.get("project", 1, "b") is None
+        assert await cache.get("project", 1, "c") == context
+        assert cache.total_bytes == entry_size(context) * 2
+        assert len(list(directory.glob("*.json"))) == 2
+
+
+@scenario("Don't store MR context larger than the cache")
+async def _():
+    with given:
+        cache = MRContextCache(str(create_tmp_dir()), max_bytes=10)
+
+    with when:
+        await cache.set("project", 1, "sha", {"diff": "x" * 100})
+
+    with then:
+        assert await cache.get("project", 1, "sha") is None
+        assert len(cache) == 0
+
+
+@scenario("Keep MR contexts across restarts")
+async def _():
+    with given:
+        directory = create_tmp_dir()
+        context = {"iid": 1}
+        await MRContextCache(str(directory), max_bytes=1024).set("project", 1, "sha", context)
+
+    with when:
+        cache = MRContextCache(str(directory), max_bytes=1024)
+
+    with then:
+        assert await cache.get("project", 1, "sha") == context
+        assert cache.total_bytes == entry_size(context)
+
+
+@scenario("Drop corrupt MR context")
+async def _():
+    with given:
+        directory = create_tmp_dir()
+        cache = MRContextCache(str(directory), max_bytes=1024)
+        await cache.set("project", 1, "sha", {"iid": 1})
+        (directory / f"{MRContextCache.make_key('project', 1, 'sha')}.json").write_text("{not json")
+
+    with when:
+        result = await cache.get("project", 1, "sha")
+
+    with then:
+        assert result is None
+        assert len(cache) == 0
+        assert cache.total_bytes == 0
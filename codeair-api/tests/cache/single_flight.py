@@ -0,0 +1,97 @@
+import asyncio
+
+from codeair.cache import SingleFlight
+from vedro import catched, given, scenario, then, when
+
+
+@scenario("Share one call between concurrent callers")
+async def _():
+    with given:
+        flight = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "value"
+
+        tasks = [asyncio.create_task(flight.do("key", fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+
+    with when:
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+    with then:
+        assert results == ["value", "value", "value"]
+        assert calls == 1
+        assert len(flight) == 0
+
+
+@scenario("Don't coalesce different keys")
+async def _():
+    with given:
+        flight = SingleFlight()
+
+        async def fetch(value):
+            await asyncio.sleep(0)
+            return value
+
+    with when:
+        results = await asyncio.gather(flight.do("a", lambda: fetch(1)), flight.do("b", lambda: fetch(2)))
+
+    with then:
+        assert results == [1, 2]
+
+
+@scenario("Pass an error to every caller without keeping it")
+async def _():
+    with given:
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def fail():
+            await release.wait()
+            raise RuntimeError("boom")
+
+        async def succeed():
+            return "value"
+
+        tasks = [asyncio.create_task(flight.do("key", fail)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+    with when:
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    with then:
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert await flight.do("key", succeed) == "value"
+
+
+@scenario("Keep the call going when one caller is cancelled")
+async def _():
+    with given:
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return "value"
+
+        first = asyncio.create_task(flight.do("key", fetch))
+        second = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0)
+
+    with when:
+        first.cancel()
+        release.set()
+        result = await second
+
+    with then:
+        assert result == "value"
+        with catched(asyncio.CancelledError) as exc_info:
+            await first
+        assert exc_info.type is asyncio.CancelledError
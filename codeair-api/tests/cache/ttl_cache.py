@@ -0,0 +1,143 @@
+from unittest.mock import patch
+
+from codeair.cache import MISSING, TTLCache
+from codeair.cache import ttl_cache
+from vedro import catched, defer, given, scenario, then, when
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def patched_clock() -> FakeClock:
+    clock = FakeClock()
+    patcher = patch.object(ttl_cache, "time", clock)
+    patcher.start()
+    defer(patcher.stop)
+    return clock
+
+
+@scenario("Get missing key")
+def _():
+    with given:
+        cache = TTLCache(maxsize=10, ttl=60)
+
+    with when:
+        results = cache.get("key"), cache.get("key", "default")
+
+    with then:
+        assert results == (MISSING, "default")
+        assert cache.misses == 2
+
+
+@scenario("Get cached None")
+def _():
+    with given:
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("key", None)
+
+    with when:
+        result = cache.get("key")
+
+    with then:
+        assert result is None
+        assert cache.hits == 1
+
+
+@scenario("Expire entry after ttl")
+def _():
+    with given:
+        clock = patched_clock()
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("key", "value")
+
+        clock.now += 59
+        assert cache.get("key") == "value"
+
+    with when:
+        clock.now += 1
+        result = cache.get("key")
+
+    with then:
+        assert result is MISSING
+        assert len(cache) == 0
+
+
+@scenario("Expire negative entry after negative ttl")
+def _():
+    with given:
+        clock = patched_clock()
+        cache = TTLCache(maxsize=10, ttl=60, negative_ttl=5)
+        cache.set("found", "value")
+        cache.set("not-found", None)
+
+    with when:
+        clock.now += 5
+        results = cache.get("found"), cache.get("not-found")
+
+    with then:
+        assert results == ("value", MISSING)
+
+
+@scenario("Override ttl per entry")
+def _():
+    with given:
+        clock = patched_clock()
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("key", "value", ttl=1)
+
+    with when:
+        clock.now += 1
+        result = cache.get("key")
+
+    with then:
+        assert result is MISSING
+
+
+@scenario("Evict least recently used entry")
+def _():
+    with given:
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+
+    with when:
+        cache.set("c", 3)
+
+    with then:
+        assert cache.get("a") == 1
+        assert cache.get("b") is MISSING
+        assert cache.get("c") == 3
+
+
+@scenario("Delete and clear entries")
+def _():
+    with given:
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+    with when:
+        cache.delete("a")
+        cache.delete("unknown")
+
+    with then:
+        assert cache.get("a") is MISSING
+        assert len(cache) == 1
+
+        cache.clear()
+        assert len(cache) == 0
+
+
+@scenario("Try to create cache without room")
+def _():
+    with when, catched(ValueError) as exc_info:
+        TTLCache(maxsize=0, ttl=60)
+
+    with then:
+        assert exc_info.type is ValueError
@@ -0,0 +1,184 @@
+import time
+
+import httpx
+from codeair.clients.rate_limit import RateLimiter, RetryPolicy, TokenBucket
+from vedro import given, params, scenario, then, when
+
+
+def response(status_code: int, headers: dict | None = None) -> httpx.Response:
+    return httpx.Response(status_code, headers=headers)
+
+
+@scenario("Retry by response status", [
+    params("GET", 503, True),
+    params("DELETE", 502, True),
+    params("POST", 503, False),
+    params("POST", 429, True),
+    params("GET", 500, False),
+    params("GET", 404, False),
+])
+def _(method, status_code, expected):
+    with given:
+        policy = RetryPolicy(max_retries=3)
+
+    with when:
+        result = policy.can_retry(method, 0, response(status_code))
+
+    with then:
+        assert result is expected
+
+
+@scenario("Retry network errors for idempotent methods only")
+def _():
+    with given:
+        policy = RetryPolicy(max_retries=3)
+
+    with when:
+        results = policy.can_retry("GET", 0), policy.can_retry("POST", 0)
+
+    with then:
+        assert results == (True, False)
+
+
+@scenario("Stop retrying at max retries")
+def _():
+    with given:
+        policy = RetryPolicy(max_retries=2)
+
+    with when:
+        results = policy.can_retry("GET", 1, response(503)), policy.can_retry("GET", 2, response(503))
+
+    with then:
+        assert results == (True, False)
+
+
+@scenario("Cap backoff")
+def _():
+    with given:
+        policy = RetryPolicy(backoff_base=1.0, backoff_max=5.0)
+
+    with when:
+        delays = [policy.backoff(attempt) for attempt in range(10)]
+
+    with then:
+        assert all(0 <= delay <= min(5.0, 2 ** attempt) for attempt, delay in enumerate(delays))
+
+
+@scenario("Wait as long as Retry-After says")
+def _():
+    with given:
+        policy = RetryPolicy(backoff_max=10.0)
+
+    with when:
+        delay = policy.delay_for(response(429, {"Retry-After": "3"}), 0)
+
+    with then:
+        assert delay == 3.0
+
+
+@scenario("Wait until RateLimit-Reset when the quota is spent")
+def _():
+    with given:
+        policy = RetryPolicy(backoff_max=10.0)
+        reset = str(int(time.time()) + 5)
+
+    with when:
+        delay = policy.delay_for(response(429, {"RateLimit-Remaining": "0", "RateLimit-Reset": reset}), 0)
+
+    with then:
+        assert 3.0 < delay <= 5.0
+
+
+@scenario("Give up when the delay is longer than backoff max")
+def _():
+    with given:
+        policy = RetryPolicy(backoff_max=10.0)
+
+    with when:
+        delay = policy.delay_for(response(429, {"Retry-After": "60"}), 0)
+
+    with then:
+        assert delay is None
+
+
+@scenario("Fall back to backoff on unreadable Retry-After")
+def _():
+    with given:
+        policy = RetryPolicy(backoff_base=1.0, backoff_max=10.0)
+
+    with when:
+        delay = policy.delay_for(response(503, {"Retry-After": "soon"}), 1)
+
+    with then:
+        assert 0 <= delay <= 2.0
+
+
+@scenario("Let a burst through the token bucket")
+async def _():
+    with given:
+        bucket = TokenBucket(rate=1.0, burst=3)
+        started_at = time.monotonic()
+
+    with when:
+        for _ in range(3):
+            await bucket.acquire()
+
+    with then:
+        assert time.monotonic() - started_at < 0.1
+
+
+@scenario("Throttle past the burst")
+async def _():
+    with given:
+        bucket = TokenBucket(rate=20.0, burst=1)
+        started_at = time.monotonic()
+
+    with when:
+        await bucket.acquire()
+        await bucket.acquire()
+
+    with then:
+        assert time.monotonic() - started_at >= 0.04
+
+
+@scenario("Keep a bucket per token")
+async def _():
+    with given:
+        limiter = RateLimiter(rate=1.0, burst=1)
+        started_at = time.monotonic()
+
+    with when:
+        await limiter.acquire("token-a")
+        await limiter.acquire("token-b")
+
+    with then:
+        assert time.monotonic() - started_at < 0.1
+
+
+@scenario("Pause a token when its GitLab quota is spent")
+async def _():
+    with given:
+        limiter = RateLimiter(rate=100.0, burst=10)
+        reset = str(time.time() + 0.2)
+        limiter.observe("token", response(200, {"RateLimit-Remaining": "0", "RateLimit-Reset": reset}))
+        started_at = time.monotonic()
+
+    with when:
+        await limiter.acquire("token")
+
+    with then:
+        assert time.monotonic() - started_at >= 0.1
+
+
+@scenario("Never wait with rate limiting disabled")
+async def _():
+    with given:
+        limiter = RateLimiter(rate=0, burst=0)
+        started_at = time.monotonic()
+
+    with when:
+        for _ in range(100):
+            await limiter.acquire("token")
+
+    with then:
+        assert time.monotonic() - started_at < 0.1
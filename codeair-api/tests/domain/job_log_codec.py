@@ -0,0 +1,76 @@
+import random
+
+from codeair.domain.job_logs.compression import JobLogCodec, train_dictionary
+from vedro import given, scenario, then, when
+
+
+def sample_logs(count: int) -> list[str]:
+    rng = random.Random(0)
+    words = ["INFO", "WARNING", "Reviewing", "file", "src/app.py", "line", "suggestion", "score"]
+    return [" ".join(rng.choice(words) for _ in range(100)) for _ in range(count)]
+
+
+@scenario("Round-trip log without dictionary")
+def _():
+    with given:
+        codec = JobLogCodec()
+        text = "pr_agent output\n" * 100
+
+    with when:
+        data = codec.compress(text)
+
+    with then:
+        assert len(data) < len(text)
+        assert codec.decompress(data, None) == text
+
+
+@scenario("Round-trip log with dictionary")
+def _():
+    with given:
+        codec = JobLogCodec()
+        codec.add_dictionary(1, train_dictionary(sample_logs(200), size=4096), current=True)
+        text = sample_logs(1)[0]
+
+    with when:
+        data = codec.compress(text)
+
+    with then:
+        assert codec.current_dictionary_id == 1
+        assert codec.decompress(data, 1) == text
+
+
+@scenario("Decompress with older dictionary")
+def _():
+    with given:
+        codec = JobLogCodec()
+        codec.add_dictionary(1, train_dictionary(sample_logs(200), size=4096), current=True)
+        text = sample_logs(1)[0]
+        data = codec.compress(text)
+
+    with when:
+        codec.add_dictionary(2, train_dictionary(sample_logs(300), size=4096), current=True)
+
+    with then:
+        assert codec.current_dictionary_id == 2
+        assert codec.decompress(data, 1) == text
+
+
+@scenario("Pass None through")
+def _():
+    with given:
+        codec = JobLogCodec()
+
+    with when:
+        results = codec.compress(None), codec.decompress(None, None)
+
+    with then:
+        assert results == (None, None)
+
+
+@scenario("Train no dictionary from too few samples")
+def _():
+    with when:
+        dictionary = train_dictionary(["log"] * 5)
+
+    with then:
+        assert dictionary is None
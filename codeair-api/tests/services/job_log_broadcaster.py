@@ -0,0 +1,89 @@
+import asyncio
+import logging
+
+from codeair.domain.job_logs import JobLogRepository
+from codeair.services.job_log_broadcaster import JobLogBroadcaster
+from vedro import defer, given, scenario, then, when
+
+
+class FakeJobLogRepository(JobLogRepository):
+    def __init__(self) -> None:
+        self.on_notification = None
+        self.on_terminated = None
+
+    async def listen(self, on_notification, on_terminated):
+        self.on_notification = on_notification
+        self.on_terminated = on_terminated
+        return object()
+
+    async def unlisten(self, conn):
+        pass
+
+
+async def started_broadcaster(repository: JobLogRepository) -> JobLogBroadcaster:
+    broadcaster = JobLogBroadcaster(logging.getLogger("test"), reconnect_delay=0.01)
+    broadcaster.start(repository)
+    defer(broadcaster.close)
+    await asyncio.sleep(0)
+    return broadcaster
+
+
+@scenario("Deliver notifications to subscribers of the job")
+async def _():
+    with given:
+        repository = FakeJobLogRepository()
+        broadcaster = await started_broadcaster(repository)
+        queue = broadcaster.subscribe(1)
+        other_queue = broadcaster.subscribe(2)
+
+    with when:
+        repository.on_notification("1:chunk")
+        repository.on_notification("1:end")
+
+    with then:
+        assert [queue.get_nowait(), queue.get_nowait()] == ["chunk", "end"]
+        assert other_queue.empty()
+
+
+@scenario("Deliver nothing after unsubscribe")
+async def _():
+    with given:
+        repository = FakeJobLogRepository()
+        broadcaster = await started_broadcaster(repository)
+        queue = broadcaster.subscribe(1)
+        broadcaster.unsubscribe(1, queue)
+
+    with when:
+        repository.on_notification("1:chunk")
+
+    with then:
+        assert queue.empty()
+
+
+@scenario("Ignore malformed notification")
+async def _():
+    with given:
+        repository = FakeJobLogRepository()
+        broadcaster = await started_broadcaster(repository)
+        queue = broadcaster.subscribe(1)
+
+    with when:
+        repository.on_notification("not-a-job:chunk")
+
+    with then:
+        assert queue.empty()
+
+
+@scenario("Resync subscribers after reconnect")
+async def _():
+    with given:
+        repository = FakeJobLogRepository()
+        broadcaster = await started_broadcaster(repository)
+        queue = broadcaster.subscribe(1)
+
+    with when:
+        repository.on_terminated()
+        event = await asyncio.wait_for(queue.get(), timeout=1)
+
+    with then:
+        assert event == "sync"
@@ -0,0 +1,51 @@
+import asyncio
+import logging
+
+from codeair.domain.webhooks import WebhookInboxRepository
+from codeair.services.job_queue_service import JobQueueService
+from codeair.workers.agent_worker import AgentWorker
+from vedro import given, scenario, then, when
+
+
+class FailingJobQueueService(JobQueueService):
+    def __init__(self) -> None:
+        pass
+
+    async def maintain_partitions(self, months_ahead, retention_months):
+        raise RuntimeError("lock timeout")
+
+
+class FakeWebhookInboxRepository(WebhookInboxRepository):
+    def __init__(self) -> None:
+        self.purges = []
+        self.on_purge = lambda: None
+
+    async def purge_exhausted(self, max_attempts, older_than):
+        self.purges.append((max_attempts, older_than))
+        self.on_purge()
+        return 1
+
+
+@scenario("Purge exhausted webhook inbox entries when partition maintenance fails")
+async def _():
+    with given:
+        repository = FakeWebhookInboxRepository()
+        worker = AgentWorker(
+            FailingJobQueueService(),
+            agent_service=None,
+            http_client=None,
+            job_log_repository=None,
+            logger=logging.getLogger("test"),
+            webhook_delivery_retention=60.0,
+            webhook_inbox_repository=repository,
+            webhook_inbox_max_attempts=3,
+        )
+        # One maintenance round is enough
+        repository.on_purge = worker.stop
+        worker._running = True
+
+    with when:
+        await asyncio.wait_for(worker._run_maintenance(), timeout=1.0)
+
+    with then:
+        assert repository.purges == [(3, 60.0)]
@@ -0,0 +1,126 @@
+import logging
+
+from codeair.domain.job_logs import JobLogRepository
+from codeair.workers.job_output import JobOutput
+from vedro import given, scenario, then, when
+
+
+class FakeJobLogRepository(JobLogRepository):
+    def __init__(self, fail: bool = False) -> None:
+        self.chunks = []
+        self.fail = fail
+
+    async def append_chunks(self, chunks):
+        if self.fail:
+            raise RuntimeError("database is down")
+        self.chunks.extend(chunks)
+
+
+def job_output(repository: JobLogRepository, max_bytes: int = 1024) -> JobOutput:
+    return JobOutput(1, repository, logging.getLogger("test"), max_bytes=max_bytes, flush_interval=60)
+
+
+@scenario("Keep output per stream")
+def _():
+    with given:
+        output = job_output(FakeJobLogRepository())
+
+    with when:
+        output.write("stdout", b"hello ")
+        output.write("stdout", b"world\n")
+        output.write("stderr", b"warning\n")
+
+    with then:
+        assert output.getvalue("stdout") == "hello world"
+        assert output.getvalue("stderr") == "warning"
+
+
+@scenario("Get empty stream")
+def _():
+    with given:
+        output = job_output(FakeJobLogRepository())
+
+    with when:
+        value = output.getvalue("stdout")
+
+    with then:
+        assert value is None
+
+
+@scenario("Keep only the tail of long output")
+def _():
+    with given:
+        output = job_output(FakeJobLogRepository(), max_bytes=10)
+
+    with when:
+        output.write("stdout", b"0123456789")
+        output.write("stdout", b"abcde")
+
+    with then:
+        assert output.getvalue("stdout") == "[... 5 bytes truncated ...]\n56789abcde"
+
+
+@scenario("Flush chunks in order")
+async def _():
+    with given:
+        repository = FakeJobLogRepository()
+        output = job_output(repository)
+        output.write("stdout", b"first")
+        output.write("stderr", b"second")
+
+    with when:
+        await output.flush()
+
+    with then:
+        assert [(chunk.seq, chunk.stream, chunk.data) for chunk in repository.chunks] == [
+            (1, "stdout", "first"),
+            (2, "stderr", "second"),
+        ]
+
+
+@scenario("Decode multibyte characters split across writes")
+async def _():
+    with given:
+        repository = FakeJobLogRepository()
+        output = job_output(repository)
+        data = "héllo".encode()
+
+    with when:
+        output.write("stdout", data[:2])
+        output.write("stdout", data[2:])
+        await output.flush()
+
+    with then:
+        assert "".join(chunk.data for chunk in repository.chunks) == "héllo"
+
+
+@scenario("Stop live output past max bytes")
+async def _():
+    with given:
+        repository = FakeJobLogRepository()
+        output = job_output(repository, max_bytes=10)
+
+    with when:
+        output.write("stdout", b"01234")
+        output.write("stdout", b"5678901234")
+        output.write("stdout", b"more")
+        await output.flush()
+
+    with then:
+        assert len(repository.chunks) == 2
+        assert repository.chunks[0].data == "01234"
+        assert "truncated" in repository.chunks[1].data
+        assert output.getvalue("stdout").endswith("901234more")
+
+
+@scenario("Keep output when flush fails")
+async def _():
+    with given:
+        output = job_output(FakeJobLogRepository(fail=True))
+        output.write("stdout", b"data")
+
+    with when:
+        await output.flush()
+
+    with then:
+        assert output.getvalue("stdout") == "data"
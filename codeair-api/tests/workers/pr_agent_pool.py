@@ -0,0 +1,126 @@
+import logging
+import stat
+import sys
+from pathlib import Path
+
+from codeair.workers.pr_agent_pool import PrAgentRunnerPool, PrAgentRunnerUnavailable
+from vedro import catched, create_tmp_dir, defer, given, scenario, then, when
+
+FAKE_CLI = """\
+import os
+import sys
+import time
+
+
+def run():
+    time.sleep(float(os.environ.get("SLEEP", "0")))
+    print("running", *sys.argv[1:])
+    print("warning", file=sys.stderr)
+    sys.exit(int(os.environ.get("EXIT_CODE", "0")))
+"""
+
+FAKE_CONFIG_LOADER = """\
+class _Settings:
+    def reload(self):
+        pass
+
+
+global_settings = _Settings()
+"""
+
+
+def fake_pr_agent() -> Path:
+    site = create_tmp_dir()
+    package = site / "pr_agent"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "cli.py").write_text(FAKE_CLI)
+    (package / "config_loader.py").write_text(FAKE_CONFIG_LOADER)
+    return site
+
+
+def python_with_path(path: Path, single_runner: bool = False) -> str:
+    # The runner is started with a bare environment, a wrapper puts the fake package on its path
+    # and, with `single_runner`, makes every start but the first fail
+    wrapper_dir = create_tmp_dir()
+    wrapper = wrapper_dir / "python"
+    guard = f"mkdir {wrapper_dir}/started 2>/dev/null || exit 1\n" if single_runner else ""
+    wrapper.write_text(f'#!/bin/sh\n{guard}PYTHONPATH={path} exec {sys.executable} "$@"\n')
+    wrapper.chmod(wrapper.stat().st_mode | stat.S_IEXEC)
+    return str(wrapper)
+
+
+async def started_pool(python_path: str, size: int = 1, max_jobs_per_runner: int = 0) -> PrAgentRunnerPool:
+    pool = PrAgentRunnerPool(python_path, size, max_jobs_per_runner, logging.getLogger("test"), tail_interval=0.05)
+    await pool.start()
+    defer(pool.close)
+    return pool
+
+
+def ignore_output(index: int, stream: str, data: bytes) -> None:
+    pass
+
+
+@scenario("Run batch in pr_agent runner")
+async def _():
+    with given:
+        pool = await started_pool(python_with_path(fake_pr_agent()))
+        output = {}
+
+        def on_output(index: int, stream: str, data: bytes) -> None:
+            output[(index, stream)] = output.get((index, stream), b"") + data
+
+    with when:
+        results = await pool.run_batch([
+            (["--pr_url=mr", "review"], {}),
+            (["--pr_url=mr", "improve"], {"EXIT_CODE": "3", "SLEEP": "0.2"}),
+        ], timeout=30, on_output=on_output)
+
+    with then:
+        (first_exit_code, first_elapsed_ms), (second_exit_code, second_elapsed_ms) = results
+        assert (first_exit_code, second_exit_code) == (0, 3)
+        # Each job is timed on its own
+        assert first_elapsed_ms < 200 <= second_elapsed_ms
+        assert output[(0, "stdout")] == b"running --pr_url=mr review\n"
+        assert output[(1, "stdout")] == b"running --pr_url=mr improve\n"
+        assert output[(1, "stderr")] == b"warning\n"
+
+
+@scenario("Replace recycled pr_agent runner")
+async def _():
+    with given:
+        pool = await started_pool(python_with_path(fake_pr_agent()), max_jobs_per_runner=1)
+        first = await pool.run_batch([(["review"], {})], timeout=30, on_output=ignore_output)
+
+    with when:
+        second = await pool.run_batch([(["review"], {})], timeout=30, on_output=ignore_output)
+
+    with then:
+        assert [exit_code for exit_code, _ in first + second] == [0, 0]
+
+
+@scenario("Use healthy runner when another one failed to start")
+async def _():
+    with given:
+        pool = await started_pool(python_with_path(fake_pr_agent(), single_runner=True), size=2)
+
+    with when:
+        results = [
+            await pool.run_batch([(["review"], {})], timeout=30, on_output=ignore_output)
+            for _ in range(2)
+        ]
+
+    with then:
+        assert [exit_code for result in results for exit_code, _ in result] == [0, 0]
+
+
+@scenario("Try to run batch without pr_agent installed")
+async def _():
+    with given:
+        pool = await started_pool(python_with_path(create_tmp_dir()))
+
+    with when, catched(PrAgentRunnerUnavailable) as exc_info:
+        await pool.run_batch([(["review"], {})], timeout=30, on_output=ignore_output)
+
+    with then:
+        assert exc_info.type is PrAgentRunnerUnavailable
@@ -0,0 +1,131 @@
+import logging
+from datetime import datetime, timezone
+from uuid import UUID, uuid4
+
+from codeair.domain.jobs import Job
+from codeair.domain.projects import ProjectRepository
+from codeair.domain.webhooks import WebhookInboxEntry, WebhookInboxRepository
+from codeair.services.job_queue_service import JobQueueService
+from codeair.workers.webhook_dispatcher import WebhookDispatcher
+from vedro import given, scenario, then, when
+
+KNOWN_WEBHOOK_ID = uuid4()
+
+
+class FakeWebhookInboxRepository(WebhookInboxRepository):
+    def __init__(self, entries: list[WebhookInboxEntry]) -> None:
+        self.entries = {entry.id: entry for entry in entries}
+        self.deleted = []
+
+    async def claim_batch(self, limit, max_attempts, claim_seconds):
+        return [entry for entry in self.entries.values() if entry.attempts < max_attempts][:limit]
+
+    async def delete(self, entry_id):
+        self.deleted.append(entry_id)
+        del self.entries[entry_id]
+
+    async def fail(self, entry_id, error, retry_delay):
+        entry = self.entries[entry_id]
+        self.entries[entry_id] = entry.model_copy(update={"attempts": entry.attempts + 1, "last_error": error})
+
+
+class FakeProjectRepository(ProjectRepository):
+    def __init__(self) -> None:
+        pass
+
+    async def get_project_id_by_webhook_id(self, webhook_id: UUID) -> int | None:
+        return 1 if webhook_id == KNOWN_WEBHOOK_ID else None
+
+
+class FakeJobQueueService(JobQueueService):
+    def __init__(self) -> None:
+        self.payloads = []
+
+    async def enqueue_jobs_for_project(self, project_id: int, payload: dict) -> list[Job]:
+        if payload.get("poison"):
+            raise RuntimeError("cannot enqueue")
+        self.payloads.append(payload)
+        return []
+
+
+def inbox_entry(entry_id: int, webhook_id: UUID = KNOWN_WEBHOOK_ID, **payload) -> WebhookInboxEntry:
+    return WebhookInboxEntry(
+        id=entry_id,
+        webhook_id=webhook_id,
+        event_uuid=None,
+        payload={"iid": entry_id, **payload},
+        received_at=datetime.now(timezone.utc),
+    )
+
+
+def running_dispatcher(repository: WebhookInboxRepository, job_queue_service: JobQueueService) -> WebhookDispatcher:
+    dispatcher = WebhookDispatcher(
+        repository,
+        FakeProjectRepository(),
+        job_queue_service,
+        logging.getLogger("test"),
+        max_attempts=3,
+    )
+    dispatcher._running = True
+    return dispatcher
+
+
+@scenario("Dispatch inbox entries and delete them")
+async def _():
+    with given:
+        repository = FakeWebhookInboxRepository([inbox_entry(1), inbox_entry(2)])
+        job_queue_service = FakeJobQueueService()
+        dispatcher = running_dispatcher(repository, job_queue_service)
+
+    with when:
+        dispatched = await dispatcher._dispatch_batch()
+
+    with then:
+        assert dispatched == 2
+        assert repository.deleted == [1, 2]
+        assert job_queue_service.payloads == [{"iid": 1, "project_id": 1}, {"iid": 2, "project_id": 1}]
+
+
+@scenario("Dispatch other entries when one fails")
+async def _():
+    with given:
+        repository = FakeWebhookInboxRepository([inbox_entry(1, poison=True), inbox_entry(2)])
+        dispatcher = running_dispatcher(repository, FakeJobQueueService())
+
+    with when:
+        await dispatcher._dispatch_batch()
+
+    with then:
+        assert repository.deleted == [2]
+        assert repository.entries[1].attempts == 1
+        assert repository.entries[1].last_error == "cannot enqueue"
+
+
+@scenario("Give up on failing entry after max attempts")
+async def _():
+    with given:
+        repository = FakeWebhookInboxRepository([inbox_entry(1, poison=True)])
+        dispatcher = running_dispatcher(repository, FakeJobQueueService())
+
+    with when:
+        for _ in range(5):
+            await dispatcher._dispatch_batch()
+
+    with then:
+        assert repository.entries[1].attempts == 3
+        assert await dispatcher._dispatch_batch() == 0
+
+
+@scenario("Drop entry of webhook that doesn't exist")
+async def _():
+    with given:
+        repository = FakeWebhookInboxRepository([inbox_entry(1, webhook_id=uuid4())])
+        job_queue_service = FakeJobQueueService()
+        dispatcher = running_dispatcher(repository, job_queue_service)
+
+    with when:
+        await dispatcher._dispatch_batch()
+
+    with then:
+        assert repository.deleted == [1]
+        assert job_queue_service.payloads == []
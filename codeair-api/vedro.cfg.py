@@ -0,0 +1,22 @@
+import os
+
+import vedro
+
+# codeair.config reads these on import, unit scenarios only need them to be present
+for name, value in {
+    "APP_ENCRYPTION_KEY": "0123456789abcdef0123456789abcdef",
+    "APP_WEBHOOK_BASE_URL": "http://codeair.test",
+    "GITLAB_OAUTH_CLIENT_ID": "client-id",
+    "GITLAB_OAUTH_CLIENT_SECRET": "client-secret",
+    "GITLAB_OAUTH_REDIRECT_URI": "http://codeair.test/callback",
+    "GITLAB_API_BASE_URL": "http://gitlab.test",
+    "CODEAIR_BOT_TOKEN": "bot-token",
+    "JWT_SECRET_KEY": "jwt-secret",
+    "DATABASE_URL": "postgresql://codeair@localhost/codeair",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+class Config(vedro.Config):
+    # Unit scenarios for the pure modules, the API is covered end to end by ../tests
+    default_scenarios_dir = "tests/"
@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
 import { useAuth } from './AuthContext';
-import { getJobLog, getProject, getAgent, type JobLogResponse, type Project, type Agent } from './api';
+import { getJobLog, getProject, getAgent, streamJobLog, type JobLogResponse, type Project, type Agent } from './api';
 import { ExternalLink, Home, Folder, Bot, FileText } from 'lucide-react';
 import { Navbar } from './NavBar';
 import { AnsiOutput } from './AnsiOutput';
@@ -38,6 +38,33 @@ export function JobLogDetail({ projectId, agentId, jobId }: JobLogDetailProps) {
       });
   }, [projectId, agentId, jobId, token, user]);
 
+  // Follow the output of a run that hasn't finished yet
+  const isRunning = log !== null && log.ended_at === null;
+  useEffect(() => {
+    if (!token || !user || !isRunning) return;
+
+    const controller = new AbortController();
+    // The stream replays everything printed so far, start from scratch
+    setLog((current) => current && { ...current, stdout: null, stderr: null });
+
+    streamJobLog(projectId, agentId, jobId, token, {
+      onChunk: (chunk) => {
+        setLog((current) => current && { ...current, [chunk.stream]: (current[chunk.stream] ?? '') + chunk.data });
+      },
+      onEnd: () => {
+        getJobLog(projectId, agentId, jobId, token)
+          .then((response) => setLog(response))
+          .catch((err) => console.error('Failed to reload run log:', err));
+      },
+    }, controller.signal).catch((err) => {
+      if (!controller.signal.aborted) {
+        console.error('Failed to follow run log:', err);
+      }
+    });
+
+    return () => controller.abort();
+  }, [projectId, agentId, jobId, token, user, isRunning]);
+
   useEffect(() => {
     if (!token || !user) return;
 
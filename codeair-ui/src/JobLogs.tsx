@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
 import { useAuth } from './AuthContext';
-import { getAgentLogs, type JobLogResponse } from './api';
+import { getAgentLogs, type JobLogSummary } from './api';
 import { Link } from './Link';
 
 interface JobLogsProps {
@@ -10,9 +10,11 @@ interface JobLogsProps {
 
 export function JobLogs({ projectId, agentId }: JobLogsProps) {
   const { token } = useAuth();
-  const [logs, setLogs] = useState<JobLogResponse[]>([]);
+  const [logs, setLogs] = useState<JobLogSummary[]>([]);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
 
   useEffect(() => {
     if (!token) return;
@@ -23,6 +25,7 @@ export function JobLogs({ projectId, agentId }: JobLogsProps) {
     getAgentLogs(projectId, agentId, token, 10)
       .then((response) => {
         setLogs(response.logs);
+        setNextCursor(response.next_cursor);
       })
       .catch((err) => {
         setError(err instanceof Error ? err.message : 'Failed to load logs');
@@ -32,6 +35,23 @@ export function JobLogs({ projectId, agentId }: JobLogsProps) {
       });
   }, [projectId, agentId, token]);
 
+  const loadMore = () => {
+    if (!token || !nextCursor) return;
+
+    setIsLoadingMore(true);
+    getAgentLogs(projectId, agentId, token, 10, nextCursor)
+      .then((response) => {
+        setLogs((current) => [...current, ...response.logs]);
+        setNextCursor(response.next_cursor);
+      })
+      .catch((err) => {
+        setError(err instanceof Error ? err.message : 'Failed to load logs');
+      })
+      .finally(() => {
+        setIsLoadingMore(false);
+      });
+  };
+
   const extractMrId = (mrUrl: string): string => {
     // Extract MR ID from URL like: https://gitlab.com/project/repo/-/merge_requests/123
     const match = mrUrl.match(/merge_requests\/(\d+)/);
@@ -135,6 +155,17 @@ export function JobLogs({ projectId, agentId }: JobLogsProps) {
           </tbody>
         </table>
       </div>
+      {nextCursor && (
+        <div className="has-text-centered">
+          <button
+            className={`button is-small${isLoadingMore ? ' is-loading' : ''}`}
+            onClick={loadMore}
+            disabled={isLoadingMore}
+          >
+            Load more
+          </button>
+        </div>
+      )}
     </div>
   );
 }
@@ -203,13 +203,32 @@ export interface JobLogResponse {
   elapsed_ms: number | null;
 }
 
+export interface JobLogSummary {
+  job_id: number;
+  mr_url: string;
+  created_at: string;
+  started_at: string | null;
+  ended_at: string | null;
+  exit_code: number | null;
+  elapsed_ms: number | null;
+  stdout_preview: string | null;
+  stderr_preview: string | null;
+  stdout_bytes: number | null;
+  stderr_bytes: number | null;
+}
+
 export interface AgentLogsResponse {
   total: number;
-  logs: JobLogResponse[];
+  logs: JobLogSummary[];
+  next_cursor: string | null;
 }
 
-export async function getAgentLogs(projectId: number, agentId: string, token: string, limit: number = 10): Promise<AgentLogsResponse> {
-  const response = await fetch(`${API_BASE_URL}/projects/${projectId}/agents/${agentId}/logs?limit=${limit}`, {
+export async function getAgentLogs(projectId: number, agentId: string, token: string, limit: number = 10, cursor: string | null = null): Promise<AgentLogsResponse> {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (cursor) {
+    params.set('cursor', cursor);
+  }
+  const response = await fetch(`${API_BASE_URL}/projects/${projectId}/agents/${agentId}/logs?${params}`, {
     headers: {
       'Authorization': `Bearer ${token}`,
     },
@@ -231,3 +250,62 @@ export async function getJobLog(projectId: number, agentId: string, jobId: numbe
   }
   return response.json();
 }
+
+export interface JobLogChunkEvent {
+  stream: 'stdout' | 'stderr';
+  data: string;
+}
+
+export interface JobLogEndEvent {
+  exit_code: number | null;
+  elapsed_ms: number | null;
+}
+
+export interface JobLogStreamHandlers {
+  onChunk: (chunk: JobLogChunkEvent) => void;
+  onEnd: (end: JobLogEndEvent) => void;
+}
+
+// Server-Sent Events over fetch, since EventSource can't send the Authorization header
+export async function streamJobLog(
+  projectId: number,
+  agentId: string,
+  jobId: number,
+  token: string,
+  handlers: JobLogStreamHandlers,
+  signal?: AbortSignal,
+): Promise<void> {
+  const response = await fetch(`${API_BASE_URL}/projects/${projectId}/agents/${agentId}/logs/${jobId}/stream`, {
+    headers: {
+      'Authorization': `Bearer ${token}`,
+      'Accept': 'text/event-stream',
+    },
+    signal,
+  });
+  if (!response.ok || !response.body) {
+    throw new Error('Failed to stream job log');
+  }
+
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value.replace(/\r\n/g, '\n');
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const message = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      const data: string[] = [];
+      for (const line of message.split('\n')) {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) data.push(line.slice(5).replace(/^ /, ''));
+      }
+      if (event === 'chunk') handlers.onChunk(JSON.parse(data.join('\n')));
+      else if (event === 'end') handlers.onEnd(JSON.parse(data.join('\n')));
+    }
+  }
+}
@@ -23,5 +23,8 @@ class Config(Section):
     GITLAB_OAUTH_CLIENT_ID: str = env("GITLAB_OAUTH_CLIENT_ID")
     GITLAB_OAUTH_REDIRECT_URI: str = env("GITLAB_OAUTH_REDIRECT_URI")
 
+    # Must match the API: merge request events are then answered with 202 and turned into jobs later
+    WEBHOOKS_ASYNC_INGESTION: bool = env.bool("WEBHOOKS_ASYNC_INGESTION", default=False)
+
 
 Config.prefetch()
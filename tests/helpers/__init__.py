@@ -1,6 +1,8 @@
 from .generate_monotonic_id import generate_monotonic_id
 from .generate_password import generate_password
-from .gitlab import delete_project_webhook, delete_project_webhooks, get_project_webhooks, update_project_webhook
+from .gitlab import (delete_project_webhook, delete_project_webhooks, get_codeair_webhook_id, get_project_webhooks,
+                     update_project_webhook)
 
 __all__ = ("generate_password", "generate_monotonic_id", "get_project_webhooks",
-           "delete_project_webhook", "delete_project_webhooks", "update_project_webhook",)
+           "get_codeair_webhook_id", "delete_project_webhook", "delete_project_webhooks",
+           "update_project_webhook",)
@@ -2,7 +2,7 @@ from http import HTTPStatus
 
 from interfaces.gitlab_api import GitLabAPI
 
-__all__ = ["get_project_webhooks", "delete_project_webhook", "update_project_webhook"]
+__all__ = ["get_project_webhooks", "get_codeair_webhook_id", "delete_project_webhook", "update_project_webhook"]
 
 
 async def get_project_webhooks(project_id: int, token: str) -> list[dict]:
@@ -11,6 +11,13 @@ async def get_project_webhooks(project_id: int, token: str) -> list[dict]:
     return response.json()
 
 
+async def get_codeair_webhook_id(project_id: int, token: str) -> str:
+    webhooks = await get_project_webhooks(project_id, token)
+    urls = [webhook["url"] for webhook in webhooks if "/api/v1/webhooks/" in webhook["url"]]
+    assert len(urls) == 1, urls
+    return urls[0].rstrip("/").rsplit("/", 1)[-1]
+
+
 async def delete_project_webhook(project_id: int, webhook_id: int, token: str) -> None:
     response = await GitLabAPI().delete_project_webhook(project_id, webhook_id, token)
     assert response.status_code == HTTPStatus.NO_CONTENT, response.json()
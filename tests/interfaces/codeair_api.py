@@ -91,13 +91,15 @@ class CodeAirAPI(AsyncHTTPInterface):
                                     headers=headers, json=agent_data)
 
     async def get_agent_logs(self, jwt_token: str | None, project_id: int, agent_id: str,
-                            limit: int | None = None) -> Response:
+                            limit: int | None = None, cursor: str | None = None) -> Response:
         headers = {}
         if jwt_token:
             headers["Authorization"] = f"Bearer {jwt_token}"
         params = {}
         if limit is not None:
             params["limit"] = limit
+        if cursor is not None:
+            params["cursor"] = cursor
         return await self._request("GET", f"/api/v1/projects/{project_id}/agents/{agent_id}/logs",
                                     headers=headers, params=params)
 
@@ -108,3 +110,11 @@ class CodeAirAPI(AsyncHTTPInterface):
             headers["Authorization"] = f"Bearer {jwt_token}"
         return await self._request("GET", f"/api/v1/projects/{project_id}/agents/{agent_id}/logs/{job_id}",
                                     headers=headers)
+
+    async def handle_webhook(self, webhook_id: str, payload: dict,
+                             event_uuid: str | None = None) -> Response:
+        headers = {}
+        if event_uuid:
+            headers["X-Gitlab-Event-UUID"] = event_uuid
+        return await self._request("POST", f"/api/v1/webhooks/{webhook_id}",
+                                    headers=headers, json=payload)
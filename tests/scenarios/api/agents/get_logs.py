@@ -1,12 +1,16 @@
 from http import HTTPStatus
+from uuid import uuid4
 
+from config import Config as cfg
 from contexts import bot_user, logged_in_user
 from contexts.agents import created_agent
 from contexts.gitlab import added_project_member, created_gitlab_project
 from d42 import schema
+from helpers import get_codeair_webhook_id
 from interfaces import CodeAirAPI
 from libs.gitlab import GitLabAccessLevel
-from vedro import given, scenario, then, when
+from schemas.errors import ErrorResponseSchema
+from vedro import given, scenario, skip_if, then, when
 
 
 @scenario("Get agent logs (empty)")
@@ -29,4 +33,83 @@ async def _():
         assert body == schema.dict({
             "total": schema.int(0),
             "logs": schema.list([]),
+            "next_cursor": schema.none,
         })
+
+
+@scenario("Try to get agent logs with invalid cursor")
+async def _():
+    with given:
+        user = await logged_in_user()
+        project = await created_gitlab_project(user)
+        bot = await bot_user()
+        await added_project_member(project, bot.id, GitLabAccessLevel.MAINTAINER, user.token)
+
+        agent = await created_agent(user, project.id)
+
+    with when:
+        response = await CodeAirAPI().get_agent_logs(user.jwt_token, project.id, agent.id, cursor="invalid")
+
+    with then:
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json() == ErrorResponseSchema % {
+            "error": {
+                "code": "BAD_REQUEST",
+                "message": "Invalid cursor",
+                "details": [],
+            }
+        }
+
+
+@scenario[skip_if(lambda: cfg.WEBHOOKS_ASYNC_INGESTION, "Jobs are created by the dispatcher")](
+    "Get agent logs page by page"
+)
+async def _():
+    with given:
+        user = await logged_in_user()
+        project = await created_gitlab_project(user)
+        bot = await bot_user()
+        await added_project_member(project, bot.id, GitLabAccessLevel.MAINTAINER, user.token)
+
+        agent = await created_agent(user, project.id)
+        webhook_id = await get_codeair_webhook_id(project.id, user.token)
+
+        # One MR per job, so none of them supersedes another
+        for iid in range(1, 6):
+            response = await CodeAirAPI().handle_webhook(webhook_id, {
+                "event_type": "merge_request",
+                "object_attributes": {
+                    "action": "open",
+                    "url": f"{project.web_url}/-/merge_requests/{iid}",
+                    "iid": iid,
+                    "last_commit": {"id": uuid4().hex},
+                },
+            })
+            response.raise_for_status()
+
+        all_logs_response = await CodeAirAPI().get_agent_logs(user.jwt_token, project.id, agent.id, limit=100)
+        all_logs_response.raise_for_status()
+        all_logs = all_logs_response.json()["logs"]
+
+    with when:
+        pages = []
+        cursor = None
+        while True:
+            response = await CodeAirAPI().get_agent_logs(user.jwt_token, project.id, agent.id,
+                                                         limit=2, cursor=cursor)
+            assert response.status_code == HTTPStatus.OK
+            pages.append(response.json())
+            cursor = pages[-1]["next_cursor"]
+            if cursor is None:
+                break
+
+    with then:
+        assert [page["total"] for page in pages] == [2, 2, 1]
+
+        job_ids = [log["job_id"] for page in pages for log in page["logs"]]
+        assert len(job_ids) == len(set(job_ids)) == 5
+        assert job_ids == [log["job_id"] for log in all_logs]
+
+        # Newest first, ties on created_at broken by the newer job id
+        order = [(log["created_at"], log["job_id"]) for page in pages for log in page["logs"]]
+        assert order == sorted(order, reverse=True)
@@ -0,0 +1,194 @@
+from http import HTTPStatus
+from uuid import uuid4
+
+from config import Config as cfg
+from contexts import bot_user, logged_in_user
+from contexts.agents import created_agent
+from contexts.gitlab import added_project_member, created_gitlab_project
+from helpers import get_codeair_webhook_id
+from interfaces import CodeAirAPI
+from libs.gitlab import GitLabAccessLevel
+from schemas.webhooks import WebhookResponseSchema
+from vedro import given, params, scenario, skip_if, then, when
+
+
+def merge_request_event(project_url: str, iid: int, head_sha: str, action: str = "open",
+                        oldrev: str | None = None) -> dict:
+    object_attributes = {
+        "action": action,
+        "url": f"{project_url}/-/merge_requests/{iid}",
+        "iid": iid,
+        "last_commit": {"id": head_sha},
+    }
+    # GitLab only sends oldrev on updates that pushed new commits
+    if oldrev is not None:
+        object_attributes["oldrev"] = oldrev
+    return {"event_type": "merge_request", "object_attributes": object_attributes}
+
+
+@scenario[skip_if(lambda: cfg.WEBHOOKS_ASYNC_INGESTION, "Jobs are created by the dispatcher")](
+    "Handle merge request open webhook"
+)
+async def _():
+    with given:
+        user = await logged_in_user()
+        project = await created_gitlab_project(user)
+        bot = await bot_user()
+        await added_project_member(project, bot.id, GitLabAccessLevel.MAINTAINER, user.token)
+
+        await created_agent(user, project.id)
+        await created_agent(user, project.id, agent_type="mr-reviewer")
+        webhook_id = await get_codeair_webhook_id(project.id, user.token)
+        payload = merge_request_event(project.web_url, 1, uuid4().hex)
+
+    with when:
+        response = await CodeAirAPI().handle_webhook(webhook_id, payload)
+
+    with then:
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == WebhookResponseSchema % {
+            "message": f"Created 2 job(s) for project {project.id}",
+        }
+
+
+@scenario[skip_if(lambda: cfg.WEBHOOKS_ASYNC_INGESTION, "Jobs are created by the dispatcher")](
+    "Handle merge request webhook for new revision",
+    [
+        params(action="update", with_oldrev=True),
+        params(action="reopen", with_oldrev=False),
+    ]
+)
+async def _(action: str, with_oldrev: bool):
+    with given:
+        user = await logged_in_user()
+        project = await created_gitlab_project(user)
+        bot = await bot_user()
+        await added_project_member(project, bot.id, GitLabAccessLevel.MAINTAINER, user.token)
+
+        await created_agent(user, project.id)
+        webhook_id = await get_codeair_webhook_id(project.id, user.token)
+
+        old_sha = uuid4().hex
+        await CodeAirAPI().handle_webhook(webhook_id, merge_request_event(project.web_url, 1, old_sha))
+        payload = merge_request_event(project.web_url, 1, uuid4().hex, action=action,
+                                      oldrev=old_sha if with_oldrev else None)
+
+    with when:
+        response = await CodeAirAPI().handle_webhook(webhook_id, payload)
+
+    with then:
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == WebhookResponseSchema % {
+            "message": f"Created 1 job(s) for project {project.id}",
+        }
+
+
+@scenario("Handle merge request update webhook without new commits")
+async def _():
+    with given:
+        user = await logged_in_user()
+        project = await created_gitlab_project(user)
+        bot = await bot_user()
+        await added_project_member(project, bot.id, GitLabAccessLevel.MAINTAINER, user.token)
+
+        await created_agent(user, project.id)
+        webhook_id = await get_codeair_webhook_id(project.id, user.token)
+        # e.g. the title was edited: same head, no oldrev
+        payload = merge_request_event(project.web_url, 1, uuid4().hex, action="update")
+
+    with when:
+        response = await CodeAirAPI().handle_webhook(webhook_id, payload)
+
+    with then:
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == WebhookResponseSchema % {
+            "message": f"Webhook received for project {project.id}",
+        }
+
+
+@scenario[skip_if(lambda: not cfg.WEBHOOKS_ASYNC_INGESTION, "Webhooks are handled synchronously")](
+    "Queue merge request open webhook"
+)
+async def _():
+    with given:
+        user = await logged_in_user()
+        project = await created_gitlab_project(user)
+        bot = await bot_user()
+        await added_project_member(project, bot.id, GitLabAccessLevel.MAINTAINER, user.token)
+
+        await created_agent(user, project.id)
+        webhook_id = await get_codeair_webhook_id(project.id, user.token)
+        payload = merge_request_event(project.web_url, 1, uuid4().hex)
+
+    with when:
+        response = await CodeAirAPI().handle_webhook(webhook_id, payload)
+
+    with then:
+        assert response.status_code == HTTPStatus.ACCEPTED
+        assert response.json() == WebhookResponseSchema % {
+            "message": f"Queued webhook {webhook_id} event",
+        }
+
+
+@scenario("Handle duplicate webhook delivery")
+async def _():
+    with given:
+        user = await logged_in_user()
+        project = await created_gitlab_project(user)
+        bot = await bot_user()
+        await added_project_member(project, bot.id, GitLabAccessLevel.MAINTAINER, user.token)
+
+        await created_agent(user, project.id)
+        webhook_id = await get_codeair_webhook_id(project.id, user.token)
+        payload = merge_request_event(project.web_url, 1, uuid4().hex)
+
+        event_uuid = str(uuid4())
+        first_response = await CodeAirAPI().handle_webhook(webhook_id, payload, event_uuid)
+        first_response.raise_for_status()
+
+    with when:
+        response = await CodeAirAPI().handle_webhook(webhook_id, payload, event_uuid)
+
+    with then:
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == WebhookResponseSchema % {
+            "message": f"Delivery {event_uuid} already received",
+        }
+
+
+@scenario("Handle webhook for other event")
+async def _():
+    with given:
+        user = await logged_in_user()
+        project = await created_gitlab_project(user)
+        bot = await bot_user()
+        await added_project_member(project, bot.id, GitLabAccessLevel.MAINTAINER, user.token)
+
+        await created_agent(user, project.id)
+        webhook_id = await get_codeair_webhook_id(project.id, user.token)
+
+    with when:
+        response = await CodeAirAPI().handle_webhook(webhook_id, {"event_type": "push"})
+
+    with then:
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == WebhookResponseSchema % {
+            "message": f"Webhook received for project {project.id}",
+        }
+
+
+@scenario("Try to handle webhook that doesn't exist")
+async def _():
+    with given:
+        webhook_id = str(uuid4())
+        # The second delivery is answered from the negative cache
+        await CodeAirAPI().handle_webhook(webhook_id, {"event_type": "push"})
+
+    with when:
+        response = await CodeAirAPI().handle_webhook(webhook_id, {"event_type": "push"})
+
+    with then:
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert response.json() == WebhookResponseSchema % {
+            "message": f"Webhook {webhook_id} not found",
+        }
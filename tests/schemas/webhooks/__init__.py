@@ -1,6 +1,6 @@
 from d42 import schema
 
-__all__ = ["WebhookSchema"]
+__all__ = ["WebhookSchema", "WebhookResponseSchema"]
 
 WebhookSchema = schema.dict({
     "id": schema.int.min(1),
@@ -11,3 +11,7 @@ WebhookSchema = schema.dict({
     "enable_ssl_verification": schema.bool(False),
     ...: ...
 })
+
+WebhookResponseSchema = schema.dict({
+    "message": schema.str.len(1, ...),
+})